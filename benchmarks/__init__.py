@@ -0,0 +1,6 @@
+"""
+Benchmark suite for the model's hot paths and end-to-end throughput
+
+python -m benchmarks run --output benchmarks/results/main.json
+python -m benchmarks compare benchmarks/results/main.json benchmarks/results/branch.json
+"""
@@ -0,0 +1,67 @@
+"""
+Command line interface of the benchmark suite
+
+python -m benchmarks run [--quick] [--select NAME ...] [--output PATH]
+python -m benchmarks compare BASE NEW [--tolerance 0.1]
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from .suite import compare, load, run_benchmarks, store
+
+RESULTS_FOLDER = Path(__file__, "../results").resolve()
+
+
+def main(argv=None) -> int:
+    """
+    Runs the command of the arguments and returns the exit code
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks and store the results as JSON")
+    run_parser.add_argument(
+        "--select", nargs="*", help="only run benchmarks containing these names")
+    run_parser.add_argument("--quick", action="store_true", help="smaller inputs and one repeat")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--output", help="defaults to benchmarks/results/<commit>.json")
+    run_parser.add_argument("--verbose", action="store_true", help="log simulation progress")
+
+    compare_parser = commands.add_parser("compare", help="compare two stored results")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument(
+        "--tolerance", type=float, default=0.1,
+        help="relative slowdown that is accepted, defaults to 0.1")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+        results = run_benchmarks(args.select, quick=args.quick, repeat=args.repeat)
+        output = args.output
+        if output is None:
+            RESULTS_FOLDER.mkdir(exist_ok=True)
+            output = RESULTS_FOLDER / f"{results['meta']['commit'] or 'results'}.json"
+        store(results, output)
+        for name, result in results['benchmarks'].items():
+            print(f"{name:<50} {result['value']:>14.6g} {result['unit']}")
+        print(f"Results stored in {output}")
+        return 0
+
+    rows = compare(load(args.base), load(args.new), args.tolerance)
+    for row in rows:
+        flag = "REGRESSION" if row['regression'] else ""
+        print(
+            f"{row['name']:<50} {row['base']:>12.6g} -> {row['new']:>12.6g} "
+            f"{row['unit']:<8} x{row['slowdown']:.2f} {flag}"
+        )
+    regressions = [row for row in rows if row['regression']]
+    print(f"{len(regressions)} regression(s) beyond a tolerance of {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+End-to-end throughput of the default model in blocks per second
+for different numbers of traders and oracles
+
+The exchange of the traders has no spread, so every price move is an
+arbitrage opportunity and the traders trade in most blocks instead of
+finding nothing to do. The number of trades is stored with the result.
+"""
+import copy
+import time
+
+from radcad import Backend, Simulation
+
+from experiments.simulation_configuration import BLOCKS_PER_TIMESTEP
+from model import model
+from model.entities.balance import Balance
+from model.types.base import CryptoAsset, MentoExchange, Stable, TraderType
+from model.types.configs import TraderConfig
+from model.utils.engine import Engine
+from model.utils.trade_ledger import TRADES_RECORD_KEY
+
+from .suite import benchmark
+
+TRADER_COUNTS = [1, 10, 50]
+ORACLE_COUNTS = [1, 10]
+TRADER_EXCHANGE = MentoExchange.CUSD_CELO
+
+
+def blocks_per_second(trader_count: int, oracle_count: int, timesteps: int):
+    """
+    Runs a single run of the default model and measures its throughput
+    """
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=timesteps, runs=1)
+    params = simulation.model.params
+    exchanges = dict(params['mento_exchanges_config'][0])
+    exchanges[TRADER_EXCHANGE] = exchanges[TRADER_EXCHANGE]._replace(spread=0)
+    params.update({
+        'mento_exchanges_config': [exchanges],
+        'traders': [[
+            TraderConfig(
+                trader_type=TraderType.ARBITRAGE_TRADER,
+                count=trader_count,
+                balance=Balance({CryptoAsset.CELO: 500000, Stable.CUSD: 1000000}),
+                exchange=TRADER_EXCHANGE
+            )
+        ]],
+        'oracles': [[
+            oracle._replace(count=oracle_count)
+            for oracle in params['oracles'][0]
+        ]],
+    })
+    simulation.engine = Engine(
+        backend=Backend.SINGLE_PROCESS,
+        deepcopy=False,
+        drop_substeps=True,
+        trade_ledger=True,
+    )
+
+    start = time.perf_counter()
+    simulation.run()
+    duration = time.perf_counter() - start
+    trades = simulation.exceptions[0][TRADES_RECORD_KEY]['columns']['timestep']
+    return {
+        'value': timesteps * BLOCKS_PER_TIMESTEP / duration,
+        'duration': duration,
+        'timesteps': timesteps,
+        'trades': len(trades),
+    }
+
+
+def register(trader_count: int, oracle_count: int):
+    @benchmark(
+        f"end_to_end.traders_{trader_count}.oracles_{oracle_count}",
+        unit="blocks/s",
+        higher_is_better=True
+    )
+    def end_to_end(quick):
+        return blocks_per_second(trader_count, oracle_count, 100 if quick else 1000)
+    return end_to_end
+
+
+for _trader_count in TRADER_COUNTS:
+    for _oracle_count in ORACLE_COUNTS:
+        register(_trader_count, _oracle_count)
@@ -0,0 +1,157 @@
+"""
+Micro-benchmarks of the model's hot paths
+"""
+import copy
+from functools import lru_cache
+
+import pandas as pd
+from cvxpy import Variable
+
+from experiments.post_processing import post_process
+from model.entities.balance import Balance
+from model.entities.strategies import ArbitrageTrading, TraderStrategy
+from model.generators import AccountGenerator, MentoExchangeGenerator, OracleRateGenerator
+from model.generators.markets import MarketPriceGenerator
+from model.system_parameters import parameters
+from model.types.base import CryptoAsset, Fiat, MentoExchange, Stable
+from model.types.pair import Pair
+from model.utils.quantlib_wrapper import QuantLibWrapper
+from model.utils.warm_run import WarmRun
+
+from .suite import benchmark
+
+
+@lru_cache(maxsize=None)
+def warm_run() -> WarmRun:
+    return WarmRun()
+
+
+@benchmark("mento.get_buy_amount")
+def mento_get_buy_amount(_quick):
+    run = warm_run()
+    mento = run.get(MentoExchangeGenerator)
+    state = run.state
+    return lambda: mento.get_buy_amount(MentoExchange.CUSD_CELO, 100, True, state)
+
+
+@benchmark("mento.exchange")
+def mento_exchange(_quick):
+    run = warm_run()
+    mento = run.get(MentoExchangeGenerator)
+    state = run.state
+    return lambda: mento.exchange(MentoExchange.CUSD_CELO, 100, False, state)
+
+
+@benchmark("arbitrage_trading.calculate")
+def arbitrage_trading_calculate(_quick):
+    run = warm_run()
+    trader = next(
+        trader for trader in run.get(AccountGenerator).traders()
+        if isinstance(trader.strategy, ArbitrageTrading)
+    )
+    state = run.state
+    params = run.params
+    return lambda: trader.strategy.calculate(params, state)
+
+
+class SolverStrategy(TraderStrategy):
+    """
+    Minimal convex strategy used to time TraderStrategy.solve
+    """
+
+    def sell_reserve_asset(self, _params, _prev_state):
+        return True
+
+    def define_variables(self):
+        self.variables["sell_amount"] = Variable(pos=True)
+
+    def define_expressions(self, _params, prev_state):
+        buckets = self.mento_buckets(prev_state)
+        self.expressions["oracle_rate_after_trade"] = (
+            buckets['stable'] / buckets['reserve_asset']
+            - self.variables["sell_amount"] / buckets['reserve_asset']
+        )
+
+
+@benchmark("trader_strategy.solve")
+def trader_strategy_solve(_quick):
+    """
+    Times solving the convex program of a minimal strategy with cvxpy
+    """
+    run = warm_run()
+    strategy = SolverStrategy(run.get(AccountGenerator).traders()[0], 1)
+    state = run.state
+    params = run.params
+    strategy.define_variables()
+    strategy.define_expressions(params, state)
+    strategy.define_objective_function(params, state)
+    strategy.define_constraints(params, state)
+    return lambda: strategy.solve(params, state)
+
+
+@benchmark("oracle_rate_generator.aggregation")
+def oracle_rate_generator_aggregation(_quick):
+    run = warm_run()
+    oracles = run.get(OracleRateGenerator)
+    state_history = run.state_history
+    state = run.state
+    return lambda: oracles.aggregation(state_history, state)
+
+
+@benchmark("balance.arithmetic")
+def balance_arithmetic(_quick):
+    balance_a = Balance({CryptoAsset.CELO: 10, Stable.CUSD: 20, Stable.CEUR: 5})
+    balance_b = Balance({CryptoAsset.CELO: 1, Stable.CUSD: 2, Stable.CREAL: 3})
+    return lambda: balance_a + balance_b - balance_b
+
+
+@benchmark("pair.get_rate.direct")
+def pair_get_rate_direct(_quick):
+    state = warm_run().state
+    pair = Pair(CryptoAsset.CELO, Fiat.USD)
+    return lambda: pair.get_rate(state)
+
+
+@benchmark("pair.get_rate.path")
+def pair_get_rate_path(_quick):
+    state = warm_run().state
+    pair = Pair(Stable.CEUR, Fiat.USD)
+    return lambda: pair.get_rate(state)
+
+
+@benchmark("price_impact_valuator.price_impact")
+def price_impact_valuator_price_impact(_quick):
+    run = warm_run()
+    valuator = run.get(MarketPriceGenerator).price_impact_valuator
+    state = run.state
+    pre_floating_supply = run.state_history[-2][-1]['floating_supply']
+    params = run.params
+    return lambda: valuator.price_impact(
+        state['floating_supply'],
+        pre_floating_supply,
+        state['timestep'],
+        state['market_price'],
+        params
+    )
+
+
+@benchmark("quantlib_wrapper.correlated_returns")
+def quantlib_wrapper_correlated_returns(quick):
+    params = warm_run().params
+    wrapper = QuantLibWrapper(
+        params['market_price_processes'],
+        params['market_price_correlation_matrix'],
+        1000 if quick else 10000,
+        1
+    )
+    return wrapper.correlated_returns
+
+
+@benchmark("post_process")
+def post_process_results(_quick):
+    df = pd.DataFrame([
+        state
+        for substeps in warm_run().state_history
+        for state in substeps
+    ])
+    return lambda: post_process(copy.copy(df), parameters=parameters)
@@ -0,0 +1,139 @@
+"""
+Benchmark registry, runner and comparison of stored results
+
+Micro-benchmarks are registered with the @benchmark decorator on a
+setup function which returns the callable to be timed. Throughput
+benchmarks return a dict with their measured value instead and are
+registered with higher_is_better=True.
+"""
+import importlib
+import json
+import logging
+import platform
+import subprocess
+import sys
+import timeit
+from datetime import datetime
+from statistics import median
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+MIN_REPEAT_DURATION = 0.05
+BENCHMARK_MODULES = ('benchmarks.micro', 'benchmarks.end_to_end')
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[bool], Any]
+    unit: str
+    higher_is_better: bool
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, unit: str = "s/call", higher_is_better: bool = False) -> Callable:
+    """
+    Decorator used to register a benchmark setup function, which receives
+    a `quick` flag and returns either the callable to time or, for
+    throughput benchmarks, the measured result.
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, unit, higher_is_better)
+        return setup
+    return decorator
+
+
+def time_callable(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    Times a callable like timeit's autorange and returns seconds per call
+    """
+    timer = timeit.Timer(function)
+    number, duration = timer.autorange()
+    if duration < MIN_REPEAT_DURATION:
+        number = max(1, int(number * MIN_REPEAT_DURATION / max(duration, 1e-9)))
+    timings = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'value': min(timings),
+        'median': median(timings),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def run_benchmarks(selection: Optional[List[str]] = None,
+                   quick: bool = False,
+                   repeat: int = 5) -> Dict[str, Any]:
+    """
+    Runs the registered benchmarks whose name contains any of the
+    selection strings and returns the results in the stored format
+    """
+    # the modules register their benchmarks when they're imported
+    for module in BENCHMARK_MODULES:
+        importlib.import_module(module)
+
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if selection and not any(pattern in name for pattern in selection):
+            continue
+        logging.info("Running benchmark %s", name)
+        measured = bench.setup(quick)
+        if callable(measured):
+            measured = time_callable(measured, repeat=1 if quick else repeat)
+        results[name] = {
+            **measured,
+            'unit': bench.unit,
+            'higher_is_better': bench.higher_is_better,
+        }
+    return {'meta': metadata(quick), 'benchmarks': results}
+
+
+def metadata(quick: bool) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'quick': quick,
+    }
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Compares two stored results and returns one row per common benchmark,
+    flagging it as a regression when it got slower than the tolerance allows
+    """
+    rows = []
+    for name, new_result in new['benchmarks'].items():
+        base_result = base['benchmarks'].get(name)
+        if base_result is None:
+            continue
+        if new_result['higher_is_better']:
+            slowdown = base_result['value'] / new_result['value']
+        else:
+            slowdown = new_result['value'] / base_result['value']
+        rows.append({
+            'name': name,
+            'base': base_result['value'],
+            'new': new_result['value'],
+            'unit': new_result['unit'],
+            'slowdown': slowdown,
+            'regression': slowdown > 1 + tolerance,
+        })
+    return rows
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def store(results: Dict[str, Any], path: str):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
@@ -0,0 +1,68 @@
+"""
+Local HTTP service for queued experiment jobs
+
+POST /jobs                 submit a spec, e.g.
+                           {"parameters": {"reserve_target_weight": [0.5, 0.75]},
+                            "timesteps": 100, "runs": 4}
+GET  /jobs                 status of all jobs
+GET  /jobs/<id>            status of a job with blocks/sec, ETA and per-subset completion
+GET  /jobs/<id>/results    post-processed results of a finished job as Parquet
+
+python -m experiments.job_server --processes 16 --port 8050
+"""
+import argparse
+
+from flask import Flask, jsonify, request, send_file
+
+from experiments.jobs import JobQueue, JobSpec, JobState
+
+
+def create_app(job_queue: JobQueue) -> Flask:
+    """
+    Creates the Flask app serving the jobs of a queue
+    """
+    app = Flask(__name__)
+
+    @app.route('/jobs', methods=['POST'])
+    def submit_job():
+        try:
+            spec = JobSpec.from_json(request.get_json(force=True))
+        except (TypeError, ValueError) as error:
+            return jsonify({'error': str(error)}), 400
+        return jsonify(job_queue.submit(spec).status()), 202
+
+    @app.route('/jobs', methods=['GET'])
+    def list_jobs():
+        return jsonify([job.status() for job in job_queue.jobs.values()])
+
+    @app.route('/jobs/<job_id>')
+    def job_status(job_id):
+        job = job_queue.get(job_id)
+        if job is None:
+            return jsonify({'error': f"Unknown job {job_id}"}), 404
+        return jsonify(job.status())
+
+    @app.route('/jobs/<job_id>/results')
+    def job_results(job_id):
+        job = job_queue.get(job_id)
+        if job is None:
+            return jsonify({'error': f"Unknown job {job_id}"}), 404
+        if job.state != JobState.DONE:
+            return jsonify({'error': f"Job {job_id} is {job.state.value}"}), 409
+        return send_file(
+            job.results.resolve(),
+            mimetype='application/vnd.apache.parquet',
+            as_attachment=True,
+            download_name=job.results.name,
+        )
+
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local HTTP service for experiment jobs")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--results', default='.jobs')
+    parser.add_argument('--port', type=int, default=8050)
+    args = parser.parse_args()
+    create_app(JobQueue(args.results, args.processes)).run(port=args.port, threaded=True)
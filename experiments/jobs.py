@@ -0,0 +1,250 @@
+"""
+Queue of experiment jobs executed one after another on a shared worker pool
+
+A job is specified by overrides of the system parameters, timesteps and
+runs. Jobs wait in a queue and are executed in order by a background
+thread on a persistent pool, so concurrent submissions of several users
+keep the machine busy without competing for its cores. The progress of a
+job is tracked from the runs as they complete and its post-processed
+results are written as Parquet. experiments.job_server serves a JobQueue
+over HTTP.
+"""
+import copy
+import threading
+import time
+import uuid
+from enum import Enum
+from pathlib import Path
+from queue import Queue
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+from radcad import Backend, Model, Simulation
+
+from experiments.post_processing import post_process
+from experiments.simulation_configuration import BLOCKS_PER_TIMESTEP, MONTE_CARLO_RUNS, TIMESTEPS
+from model import model
+from model.system_parameters import parameters
+from model.utils.engine import Engine
+from model.utils.sweep import parameter_sweep
+
+
+class JobState(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobSpec(NamedTuple):
+    """
+    Overrides of the system parameters, timesteps and runs of a job
+    """
+    # Parameter name -> list of values, replacing the default values
+    parameters: Dict[str, List[Any]]
+    timesteps: int = TIMESTEPS
+    runs: int = MONTE_CARLO_RUNS
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "JobSpec":
+        """
+        Validates a JSON spec and converts the values of enum parameters,
+        raises a ValueError if the spec is invalid
+        """
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown fields {sorted(unknown)}")
+        overrides = data.get('parameters', {})
+        if not isinstance(overrides, dict):
+            raise ValueError("parameters has to map parameter names to lists of values")
+        converted = {}
+        for key, values in overrides.items():
+            if key not in parameters:
+                raise ValueError(f"Unknown parameter {key}")
+            if not isinstance(values, list) or not values:
+                raise ValueError(f"The values of {key} have to be a non-empty list")
+            default = parameters[key][0]
+            if isinstance(default, Enum):
+                values = [type(default)(value) for value in values]
+            elif not isinstance(default, (bool, int, float, str)):
+                raise ValueError(f"{key} can't be set from JSON")
+            converted[key] = values
+        spec = cls(converted, data.get('timesteps', TIMESTEPS), data.get('runs', MONTE_CARLO_RUNS))
+        if not 0 < spec.timesteps <= TIMESTEPS:
+            raise ValueError(f"timesteps has to be between 1 and {TIMESTEPS}")
+        if spec.runs < 1:
+            raise ValueError("runs has to be positive")
+        return spec
+
+    def params(self) -> Dict[str, List[Any]]:
+        return {**copy.deepcopy(parameters), **self.parameters}
+
+
+class Job:  # pylint: disable=too-many-instance-attributes
+    """
+    A submitted spec with the progress of its execution, the attributes
+    are the state, progress and timestamps reported by status()
+    """
+    id: str
+    spec: JobSpec
+    state: JobState
+    subsets: int
+    # Completed runs and executed timesteps per subset
+    completed_runs: Dict[int, int]
+    completed_timesteps: int
+    error: Optional[str]
+    results: Optional[Path]
+
+    def __init__(self, spec: JobSpec):
+        self.id = uuid.uuid4().hex[:12]
+        self.spec = spec
+        self.state = JobState.QUEUED
+        self.subsets = max(len(parameter_sweep(spec.params())), 1)
+        self.completed_runs = {}
+        self.completed_timesteps = 0
+        self.error = None
+        self.results = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+
+    def consume(self, run_result):
+        """
+        Counts a completed run, to be used as result callback of the engine
+        """
+        _result, record = run_result
+        with self.lock:
+            subset = record['subset']
+            self.completed_runs[subset] = self.completed_runs.get(subset, 0) + 1
+            self.completed_timesteps += record.get('stop_timestep') or record['timesteps']
+        return run_result
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Returns the state and progress of the job as JSON compatible dict
+        """
+        with self.lock:
+            completed_runs = dict(self.completed_runs)
+            completed_blocks = self.completed_timesteps * BLOCKS_PER_TIMESTEP
+        total_blocks = self.subsets * self.spec.runs * self.spec.timesteps * BLOCKS_PER_TIMESTEP
+        elapsed = ((self.finished or time.time()) - self.started) if self.started else 0.0
+        blocks_per_second = completed_blocks / elapsed if elapsed else None
+        eta = None
+        if self.state == JobState.RUNNING and blocks_per_second:
+            eta = max(total_blocks - completed_blocks, 0) / blocks_per_second
+        return {
+            'id': self.id,
+            'state': self.state.value,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'runs': self.subsets * self.spec.runs,
+            'completed_runs': sum(completed_runs.values()),
+            'blocks_per_second': blocks_per_second,
+            'eta_seconds': eta,
+            'subset_completion': {
+                subset: completed_runs.get(subset, 0) / self.spec.runs
+                for subset in range(self.subsets)
+            },
+            'error': self.error,
+        }
+
+
+class JobQueue:
+    """
+    Executes submitted jobs in order on a persistent pool
+    """
+    results_directory: Path
+    processes: int
+    jobs: Dict[str, Job]
+
+    def __init__(self, results_directory='.jobs', processes: Optional[int] = None):
+        self.results_directory = Path(results_directory)
+        self.results_directory.mkdir(parents=True, exist_ok=True)
+        self.jobs = {}
+        self.queue: "Queue[Optional[Job]]" = Queue()
+        self.pool = None
+        if processes != 1:
+            # pylint: disable=import-outside-toplevel
+            from pathos.multiprocessing import ProcessPool
+            self.pool = ProcessPool(processes)
+        self.processes = self.pool.ncpus if self.pool else 1
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def submit(self, spec: JobSpec) -> Job:
+        job = Job(spec)
+        self.jobs[job.id] = job
+        self.queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def work(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            self.execute(job)
+
+    def execute(self, job: Job):
+        """
+        Runs the simulation of a job and writes its post-processed results,
+        errors are recorded in the job instead of stopping the queue
+        """
+        job.state = JobState.RUNNING
+        job.started = time.time()
+        try:
+            params = job.spec.params()
+            simulation = Simulation(
+                model=Model(
+                    params=params,
+                    initial_state=copy.deepcopy(model.initial_state),
+                    state_update_blocks=model.state_update_blocks,
+                ),
+                timesteps=job.spec.timesteps,
+                runs=job.spec.runs,
+            )
+            simulation.engine = Engine(
+                backend=Backend.PATHOS if self.pool else Backend.SINGLE_PROCESS,
+                processes=self.processes,
+                deepcopy=False,
+                drop_substeps=True,
+                pool=self.pool,
+                result_callback=job.consume,
+            )
+            df = post_process(pd.DataFrame(simulation.run()), parameters=params)
+            path = self.results_directory / f"{job.id}.parquet"
+            parquet_compatible(df).to_parquet(path)
+            job.results = path
+            job.state = JobState.DONE
+        except Exception as error:  # pylint: disable=broad-except
+            job.error = repr(error)
+            job.state = JobState.FAILED
+        finally:
+            job.finished = time.time()
+            job.done.set()
+
+    def close(self):
+        """
+        Finishes the queued jobs and releases the pool
+        """
+        self.queue.put(None)
+        self.thread.join()
+        if self.pool:
+            self.pool.close()
+            self.pool.join()
+            self.pool.clear()
+
+
+def parquet_compatible(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts object columns, e.g. swept enum parameters, to strings
+    """
+    df = df.reset_index()
+    for column in df.columns[df.dtypes == object]:
+        df[column] = df[column].astype(str)
+    return df
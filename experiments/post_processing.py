@@ -2,25 +2,31 @@
 Post processing results
 """
 
+from typing import Union
+
 import pandas as pd
-from radcad.core import generate_parameter_sweep
 
 from model.system_parameters import parameters as base_parameters, Parameters
+from model.utils.sweep import SweepPlan, swept_parameters
 
 
-def assign_parameters(dataframe: pd.DataFrame, parameters: Parameters, set_params=None):
+def assign_parameters(dataframe: pd.DataFrame, parameters: Union[Parameters, SweepPlan],
+                      set_params=None):
     """
     parameters that change in the parameter grid (if there are any)
-    are attached as columns to the end of the dataframe
+    are attached as columns to the end of the dataframe, only the
+    subsets in the dataframe are looked up
     """
-    if set_params:
-        parameter_sweep = generate_parameter_sweep(parameters)
-        parameter_sweep = [{param: subset[param]
-                            for param in set_params} for subset in parameter_sweep]
-
-        for subset_index in dataframe['subset'].unique():
-            for (key, value) in parameter_sweep[subset_index].items():
-                dataframe.loc[dataframe.eval(f'subset == {subset_index}'), key] = value
+    if isinstance(parameters, SweepPlan):
+        values = parameters.frame(dataframe['subset'].unique())
+        for column in values:
+            dataframe[column] = dataframe['subset'].map(values[column])
+    elif set_params:
+        for key in set_params:
+            # radcad repeats the last value of shorter parameter lists
+            values = parameters[key]
+            dataframe[key] = dataframe['subset'].map(
+                lambda subset, values=values: values[min(subset, len(values) - 1)])
     return dataframe
 
 
@@ -30,12 +36,7 @@ def post_process(dataframe: pd.DataFrame, drop_timestep_zero=True, parameters=No
     """
     parameters = parameters or base_parameters
     # Show parameters that have taken more than one value in dataframe
-    grid_keys = []
-    for key, value in parameters.items():
-        if len(value) > 1:
-            grid_keys.append(key)
-
-    assign_parameters(dataframe, parameters, grid_keys)
+    assign_parameters(dataframe, parameters, swept_parameters(parameters))
 
     dataframe = dict_to_columns(dataframe)
     dataframe = dataframe.set_index('timestep')
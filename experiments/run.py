@@ -5,10 +5,13 @@ Executes simulation experiments
 import logging
 import sys
 import time
+from typing import Optional
+
 import pandas as pd
 
 from experiments.default_experiment import experiment
 from experiments.post_processing import post_process
+from model.utils.daemon import run_remote
 
 # Configure logging framework
 # e.g. Use logging.info(...) to log to log file
@@ -21,14 +24,17 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 
 
-def run(executable=experiment):
+def run(executable=experiment, pool: Optional[str] = None):
     """
-    executes experiment
+    executes experiment, in the pool daemon listening on the address pool if given
     """
     logging.info("Running experiment")
     start_time = time.time()
 
-    executable.run()
+    if pool is None:
+        executable.run()
+    else:
+        run_remote(executable, pool)
 
     experiment_duration = time.time() - start_time
     logging.info(f"Experiment complete in {experiment_duration} seconds")
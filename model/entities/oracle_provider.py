@@ -29,7 +29,8 @@ class OracleProvider():
         self.name = name
         self.orace_id = oracle_id
         self.config = config
-        self.rng = rngp.get_rng("Oracle", oracle_id)
+        # seeded by name as ids aren't stable across processes
+        self.rng = rngp.get_rng("Oracle", name)
         self.reports = {pair: None for pair in pairs}
 
     def update(self, state_history, prev_state):
@@ -1,19 +1,12 @@
 """
 Strategy: Arbitrage Trader
 """
-from enum import Enum
 import numpy as np
 
-from model.types.base import MentoBuckets
+from model.types.base import MentoBuckets, TradingRegime
 from .trader_strategy import TraderStrategy
 
 
-class TradingRegime(Enum):
-    SELL_STABLE = "SELL_STABLE"
-    SELL_RESERVE_ASSET = "SELL_RESERVE_ASSET"
-    PASS = "PASS"
-
-
 # pylint: disable=using-constant-test
 # pylint: disable=duplicate-code
 class ArbitrageTrading(TraderStrategy):
@@ -35,35 +28,19 @@ class ArbitrageTrading(TraderStrategy):
         Indicates how the trader will act depending on the relation of mento price
         and market price
         """
-        mento_buckets = self.mento_buckets(prev_state)
-        mento_price = mento_buckets['stable'] / mento_buckets['reserve_asset']
-        market_price = self.market_price(prev_state)
-
-        price_up_profit = (
-            market_price * (1 - self.exchange_config.spread)
-            > mento_price
-        )
-        price_down_profit = (
-            market_price / (1 - self.exchange_config.spread)
-            < mento_price
-        )
-
-        if price_up_profit:
-            return TradingRegime.SELL_STABLE
-        if price_down_profit:
-            return TradingRegime.SELL_RESERVE_ASSET
-        return TradingRegime.PASS
+        return self.observables(prev_state).regime
 
     def define_expressions(self, _params, prev_state):
         """
         Defines and returns the expressions (made of variables and parameters)
         that are used in the optimization (random trader)
         """
-        market_price = self.market_price(prev_state)
+        observables = self.observables(prev_state)
+        market_price = observables.market_price
         mento_buckets = self.mento_buckets(prev_state)
         spread = self.exchange_config.spread
 
-        if self.trading_regime(prev_state) == TradingRegime.SELL_STABLE:
+        if observables.regime == TradingRegime.SELL_STABLE:
             self.expressions["profit"] = (
                 -1 * self.variables["sell_amount"]
                 * mento_buckets['reserve_asset']
@@ -72,7 +49,7 @@ class ArbitrageTrading(TraderStrategy):
                 + (1 - spread) * self.variables["sell_amount"]
                 + market_price * self.variables["sell_amount"]
             )
-        elif self.trading_regime(prev_state) == TradingRegime.SELL_RESERVE_ASSET:
+        elif observables.regime == TradingRegime.SELL_RESERVE_ASSET:
             self.expressions["profit"] = (
                 -self.variables["sell_amount"]
                 * mento_buckets['stable']
@@ -83,29 +60,28 @@ class ArbitrageTrading(TraderStrategy):
             )
 
     def trader_passes_step(self, _params, prev_state):
-        return (self.trading_regime(prev_state) == "PASS") or \
-               (prev_state["timestep"] % self.acting_frequency != 0)
+        return (prev_state["timestep"] % self.acting_frequency != 0) or \
+               (self.trading_regime(prev_state) == TradingRegime.PASS)
 
     # # pylint: disable=attribute-defined-outside-init
     def calculate(self, _params, prev_state):
         """
         Calculates optimal trade if analytical solution is available
         """
-        market_price = self.market_price(prev_state)
+        observables = self.observables(prev_state)
         mento_buckets = self.mento_buckets(prev_state)
         spread = self.exchange_config.spread
-        mento_price = mento_buckets['stable'] / mento_buckets['reserve_asset']
 
-        if market_price * (1 - spread) > mento_price:
+        if observables.regime == TradingRegime.SELL_STABLE:
             self.sell_order_stable(
                 mento_buckets,
-                market_price,
+                observables.market_price,
                 spread
             )
-        elif market_price / (1 - spread) < mento_price:
+        elif observables.regime == TradingRegime.SELL_RESERVE_ASSET:
             self.sell_order_reserve_asset(
                 mento_buckets,
-                market_price,
+                observables.market_price,
                 spread
             )
         else:
@@ -1,13 +1,57 @@
 """
 Strategy: Random Trader
 """
+from typing import NamedTuple
 from cvxpy import Variable
 import numpy as np
 
-from experiments import simulation_configuration
-
 from .trader_strategy import TraderStrategy
 
+ORDER_CHUNK_SIZE = 4096
+
+
+class RandomOrder(NamedTuple):
+    sell_reserve_asset: bool
+    sell_amount: float
+
+
+class RandomOrderStream:
+    """
+    Lazily drawn sequence of random orders indexed by timestep.
+    Orders are drawn in chunks from one generator per order field, so the
+    sequence doesn't depend on the chunk size and only one chunk is held
+    in memory. Indices have to be accessed in non-decreasing chunks.
+    """
+    direction_rng: np.random.Generator
+    amount_rng: np.random.Generator
+    chunk_size: int
+
+    def __init__(self, direction_rng, amount_rng, chunk_size=ORDER_CHUNK_SIZE):
+        self.direction_rng = direction_rng
+        self.amount_rng = amount_rng
+        self.chunk_size = chunk_size
+        self.chunk_start = 0
+        self.sell_reserve_asset = np.empty(0, dtype=bool)
+        self.sell_amount = np.empty(0)
+
+    def __getitem__(self, index: int) -> RandomOrder:
+        if index < self.chunk_start:
+            raise IndexError(
+                f"Order {index} was discarded, the stream is at {self.chunk_start}")
+        while index >= self.chunk_start + len(self.sell_amount):
+            self.draw_chunk()
+        offset = index - self.chunk_start
+        return RandomOrder(
+            bool(self.sell_reserve_asset[offset]),
+            float(self.sell_amount[offset])
+        )
+
+    def draw_chunk(self):
+        self.chunk_start += len(self.sell_amount)
+        self.sell_reserve_asset = self.direction_rng.random(self.chunk_size) < 0.5
+        self.sell_amount = np.abs(self.amount_rng.normal(100, 5, size=self.chunk_size))
+
+
 class RandomTrading(TraderStrategy):
     """
     Random Trading
@@ -16,12 +60,11 @@ class RandomTrading(TraderStrategy):
     def __init__(self, parent, acting_frequency=1):
         # The following is used to define the strategy and needs to be provided in subclass
         super().__init__(parent, acting_frequency)
-        self.generate_sell_amounts()
         self.sell_amount = None
-        self.rng = parent.rngp.get_rng("RandomTrader", self.parent.account_id)
+        self.orders = self.generate_orders()
 
     def sell_reserve_asset(self, _params, prev_state):
-        return self.orders[prev_state["timestep"]]["sell_reserve_asset"]
+        return self.orders[prev_state["timestep"]].sell_reserve_asset
 
     def define_variables(self):
         self.variables["sell_amount"] = Variable(pos=True)
@@ -52,7 +95,7 @@ class RandomTrading(TraderStrategy):
                 self.variables["sell_amount"]
                 <= min(
                     max_budget_reserve_asset,
-                    self.orders[prev_state["timestep"]]["sell_amount"]
+                    self.orders[prev_state["timestep"]].sell_amount
                 )
             )
         else:
@@ -60,31 +103,27 @@ class RandomTrading(TraderStrategy):
                 self.variables["sell_amount"]
                 <= min(
                     max_budget_stable,
-                    self.orders[prev_state["timestep"]]["sell_amount"]
+                    self.orders[prev_state["timestep"]].sell_amount
                 )
             )
 
-    def generate_sell_amounts(
-        self,
-        blocks_per_timestep=simulation_configuration.BLOCKS_PER_TIMESTEP,
-        timesteps=simulation_configuration.TIMESTEPS,
-    ):
+    def generate_orders(self, chunk_size=ORDER_CHUNK_SIZE) -> RandomOrderStream:
         """
-        This function generates lognormal returns
+        Creates the order stream seeded from the trader's RNGProvider,
+        the account name is used as context because account ids
+        are derived from a namespace that changes between processes
         """
-        # timesteps_per_year = constants.blocks_per_year // blocks_per_timestep
-        sample_size = timesteps * blocks_per_timestep + 1
-        # TODO parametrise random params incl. seed
-        sell_gold = self.rng.binomial(1, 0.5, sample_size)
-        orders = np.vstack(
-            [sell_gold, np.abs(self.rng.normal(100, 5, size=sample_size))]
-        )
-        self.orders = np.core.records.fromarrays(
-            orders, names=["sell_reserve_asset", "sell_amount"]
+        # TODO parametrise random params
+        rngp = self.parent.rngp
+        account_name = self.parent.account_name
+        return RandomOrderStream(
+            rngp.get_rng("RandomTrader", account_name, "sell_reserve_asset"),
+            rngp.get_rng("RandomTrader", account_name, "sell_amount"),
+            chunk_size
         )
 
     def calculate(self, _params, prev_state):
         """
         Calculates optimal trade if analytical solution is available
         """
-        self.sell_amount = self.orders[prev_state["timestep"]]["sell_amount"]
+        self.sell_amount = self.orders[prev_state["timestep"]].sell_amount
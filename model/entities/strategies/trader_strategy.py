@@ -13,7 +13,7 @@ import logging
 from cvxpy import Maximize, Minimize, Problem, Variable
 import cvxpy
 
-from model.types.base import MentoBuckets
+from model.types.base import MarketObservables, MentoBuckets
 from model.types.pair import Pair
 from model.types.configs import MentoExchangeConfig
 if TYPE_CHECKING:
@@ -27,12 +27,10 @@ class TraderStrategy:
 
     """
     parent: "Trader"
-    exchange_config: MentoExchangeConfig
 
     def __init__(self, parent: "Trader", acting_frequency):
         self.parent = parent
         self.acting_frequency = acting_frequency
-        self.exchange_config = self.mento.configs.get(self.parent.config.exchange)
 
         # The following is used to define the strategy and needs to be
         #  provided in subclass
@@ -45,6 +43,10 @@ class TraderStrategy:
         self.sell_amount = None
         self.order = None
 
+    @property
+    def exchange_config(self) -> MentoExchangeConfig:
+        return self.parent.exchange_config
+
     @property
     def reference_fiat(self):
         return self.exchange_config.reference_fiat
@@ -203,13 +205,12 @@ class TraderStrategy:
                 }
         return trade
 
+    def observables(self, prev_state) -> MarketObservables:
+        return self.mento.observables(self.parent.config.exchange, prev_state)
+
     def market_price(self, prev_state) -> float:
         # TODO: Do we need to quote in equivalent Fiat for Stable?
-        return (
-            prev_state["market_price"].get(
-                Pair(self.reserve_asset, self.reference_fiat))
-            / prev_state["market_price"].get(Pair(self.stable, self.reference_fiat))
-        )
+        return self.observables(prev_state).market_price
 
     def mento_buckets(self, prev_state) -> MentoBuckets:
         return prev_state["mento_buckets"].get(self.parent.config.exchange)
@@ -6,6 +6,7 @@ Agents implement the Actor type.
 from typing import TYPE_CHECKING
 from copy import deepcopy
 from uuid import UUID
+import numpy as np
 
 from model.generators.mento import MentoExchangeGenerator
 from model.entities import strategies
@@ -24,7 +25,6 @@ class Trader(Account):
     """
     strategy: strategies.TraderStrategy
     config: TraderConfig
-    exchange_config: MentoExchangeConfig
     mento: MentoExchangeGenerator
     rngp: RNGProvider
 
@@ -40,12 +40,15 @@ class Trader(Account):
         self.rngp = rngp
         self.mento = self.parent.container.get(MentoExchangeGenerator)
         self.config = config
-        self.exchange_config = self.mento.configs.get(self.config.exchange)
 
         strategy_class = getattr(strategies, config.trader_type.value)
         assert strategy_class is not None, f"{config.trader_type.value} is not a strategy"
         self.strategy = strategy_class(self)
 
+    @property
+    def exchange_config(self) -> MentoExchangeConfig:
+        return self.mento.configs.get(self.config.exchange)
+
     def execute(
         self,
         params,
@@ -55,6 +58,24 @@ class Trader(Account):
         Execute the agent's state change
         """
         order = self.strategy.return_optimal_trade(params, prev_state)
+        return self.settle(order, prev_state)
+
+    def settle(self, order, prev_state):
+        """
+        Settle an order against the buckets in prev_state, orders with a
+        min_buy_amount that the buckets no longer fill are dropped
+        """
+        if order is not None and order.get("min_buy_amount") is not None:
+            buy_amount = self.mento.get_buy_amount(
+                exchange=self.config.exchange,
+                sell_amount=order["sell_amount"],
+                sell_reserve_asset=order["sell_reserve_asset"],
+                prev_state=prev_state,
+                min_buy_amount=order["min_buy_amount"],
+            )
+            if np.isnan(buy_amount):
+                order = None
+
         if order is None:
             return {
                 "mento_buckets": prev_state["mento_buckets"],
@@ -74,6 +95,19 @@ class Trader(Account):
         )
 
         self.balance += delta
+        if self.mento.ledger is not None:
+            self.mento.ledger.record(
+                timestep=prev_state["timestep"],
+                trader=self.account_name,
+                exchange=self.config.exchange,
+                sell_reserve_asset=sell_reserve_asset,
+                sell_amount=sell_amount,
+                buy_amount=delta.get(
+                    self.exchange_config.stable if sell_reserve_asset
+                    else self.exchange_config.reserve_asset
+                ),
+                spread=self.exchange_config.spread,
+            )
         reserve_delta = Balance({
             self.exchange_config.reserve_asset:
                 -1 * delta.get(self.exchange_config.reserve_asset),
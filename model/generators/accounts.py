@@ -3,13 +3,15 @@ Accounts Generator
 
 Account management, equivalent to addresses on the blockchain
 """
+import heapq
 from uuid import UUID, uuid4, uuid5
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 from model.entities.account import Account
 from model.entities.trader import Trader
 from model.entities.balance import Balance
-from model.types.configs import TraderConfig
+from model.types.base import TraderExecutionMode
+from model.types.configs import TraderConfig, TraderExecutionConfig
 from model.utils import update_from_signal
 from model.utils.generator import Generator, state_update_blocks
 from model.utils.generator_container import GeneratorContainer
@@ -22,7 +24,7 @@ class AccountGenerator(Generator):
     """
     AccountsManager Generator
     """
-    accounts_by_id: Dict[UUID, Account] = {}
+    accounts_by_id: Dict[UUID, Account]
     reserve: Account
     # Holds the amount of floating supply in circulation
     # with entities that aren't tracked as part of the
@@ -30,15 +32,22 @@ class AccountGenerator(Generator):
     untracked_floating_supply: Balance
     container: GeneratorContainer
     rngp: RNGProvider
+    # Traders with their position of creation grouped by the
+    # acting_frequency of their strategy
+    schedule: Dict[int, List[Tuple[int, Trader]]]
+    execution: TraderExecutionConfig
 
     def __init__(self,
                  reserve_inventory: Balance,
                  initial_floating_supply: Balance,
                  traders: List[TraderConfig],
                  container: GeneratorContainer,
-                 rngp: RNGProvider):
+                 rngp: RNGProvider,
+                 execution: TraderExecutionConfig = TraderExecutionConfig()):
         self.container = container
         self.rngp = rngp
+        self.execution = execution
+        self.accounts_by_id = {}
         self.reserve = self.create_reserve_account(
             initial_balance=reserve_inventory
         )
@@ -51,6 +60,11 @@ class AccountGenerator(Generator):
                 )
 
         self.untracked_floating_supply = initial_floating_supply - self.tracked_floating_supply
+        self.schedule = {}
+        for position, trader in enumerate(self.traders()):
+            self.schedule.setdefault(trader.strategy.acting_frequency, []).append(
+                (position, trader)
+            )
 
     @classmethod
     def from_parameters(cls, params, initial_state, container):
@@ -59,11 +73,15 @@ class AccountGenerator(Generator):
             Balance(initial_state["floating_supply"]),
             params["traders"],
             container,
-            params["rngp"]
+            params["rngp"],
+            params["trader_execution"]
         )
 
         return accounts
 
+    def update_parameters(self, params):
+        self.execution = params["trader_execution"]
+
     def create_reserve_account(self, initial_balance: Balance):
         """
         separate reserve account which is not part of the self.all_accounts list
@@ -89,28 +107,78 @@ class AccountGenerator(Generator):
 
     @state_update_blocks("traders")
     def traders_execute(self):
+        if not self.schedule:
+            return []
         return [
             {
-                "description": f"""
-                    Trader update blocks for {trader.account_id}
+                "description": """
+                    Trader update block executing the traders which act
+                    in the timestep one after another
                 """,
                 "policies": {
-                    "trader_policy": self.get_trader_policy(trader.account_id)
+                    "trader_policy": self.get_trader_policy()
                 },
                 "variables": {
                     "mento_buckets": update_from_signal("mento_buckets"),
                     "reserve_balance": update_from_signal("reserve_balance"),
                     "floating_supply": update_from_signal("floating_supply"),
                 },
-            } for trader in self.traders()
+            }
         ]
 
-    def get_trader_policy(self, account_id):
+    def get_trader_policy(self):
+        """
+        Policy executing the due traders of a timestep according to the
+        execution mode
+        """
         def policy(params, _substep, _state_history, prev_state):
-            trader = self.get(account_id)
-            return trader.execute(params, prev_state)
+            traders = self.due_traders(prev_state["timestep"])
+            state = dict(prev_state)
+            if self.execution.mode == TraderExecutionMode.TWO_PHASE:
+                orders = self.decide_orders(traders, params, prev_state)
+                for trader, order in zip(traders, orders):
+                    state.update(trader.settle(order, state))
+            else:
+                for trader in traders:
+                    state.update(trader.execute(params, state))
+            return {
+                "mento_buckets": state["mento_buckets"],
+                "reserve_balance": state["reserve_balance"],
+                "floating_supply": state["floating_supply"],
+            }
         return policy
 
+    def due_traders(self, timestep: int) -> List[Trader]:
+        """
+        Traders whose acting_frequency divides the timestep in the
+        order they were created, traders that aren't due are never visited
+        """
+        due = [
+            traders
+            for acting_frequency, traders in self.schedule.items()
+            if timestep % acting_frequency == 0
+        ]
+        return [trader for _, trader in heapq.merge(*due)]
+
+    def decide_orders(self, traders: List[Trader], params, prev_state) -> List[Optional[Dict]]:
+        """
+        Decides the orders of all traders against the same prev_state
+        before any of them is settled. Every order may at most lose
+        max_slippage of the quoted buy amount when it's settled after the
+        orders of previous traders.
+        """
+        orders = [
+            trader.strategy.return_optimal_trade(params, prev_state)
+            for trader in traders
+        ]
+        return [
+            {
+                **order,
+                "min_buy_amount": order["buy_amount"] * (1 - self.execution.max_slippage)
+            } if order is not None else None
+            for order in orders
+        ]
+
     def traders(self) -> List[Trader]:
         return [
             account
@@ -3,21 +3,33 @@ market price generator and related functions
 """
 
 import logging
+from typing import Optional
+
 import numpy as np
 
-from experiments.simulation_configuration import TOTAL_BLOCKS
+from experiments import simulation_configuration
 from model.system_parameters import Parameters
 
 from model.types.base import MarketPriceModel
-from model.utils.data_feed import DATA_FOLDER, DataFeed
+from model.utils.data_feed import DATA_FOLDER, load_data_feed
 from model.utils.generator import Generator
+from model.utils.importance_sampling import tilt
+from model.utils.path_sampling import antithetic_normals, sobol_normals
 from model.utils.price_impact_valuator import PriceImpactValuator
 from model.utils.quantlib_wrapper import QuantLibWrapper
 from model.utils.rng_provider import RNGProvider
+from model.utils.shared_paths import (
+    SHARED_PATHS_PARAM_KEY, SharedIncrements, SharedPathStore, path_key
+)
 
 # raise numpy warnings as errors
 np.seterr(all='raise')
 
+PATH_NORMALS = {
+    MarketPriceModel.ANTITHETIC: antithetic_normals,
+    MarketPriceModel.SOBOL: sobol_normals,
+}
+
 
 class MarketPriceGenerator(Generator):
     """
@@ -39,29 +51,39 @@ class MarketPriceGenerator(Generator):
         increments=None,
     ):
         self.model = model
-        self.increments = increments
+        self._increments = increments
+        # Cumulative log likelihood ratio of the increments when they're tilted
+        self._log_weights = None
+        # Set when the increments are views of a shared memory block, after the
+        # views so that they're released first
+        self.shared_increments: Optional[SharedIncrements] = None
+        self.shared_memory = None
         self.price_impact_valuator = PriceImpactValuator(
-            impacted_assets, TOTAL_BLOCKS)
+            impacted_assets, simulation_configuration.TOTAL_BLOCKS)
         self.rng = rngp.get_rng("MarketPriceGenerator")
 
+    @staticmethod
+    def generates_paths(model: MarketPriceModel) -> bool:
+        """
+        Whether the model generates increments from QuantLib processes,
+        which can be shared between runs
+        """
+        return model == MarketPriceModel.QUANTLIB or model in PATH_NORMALS
+
     @classmethod
     def from_parameters(cls, params: Parameters, _initial_state, _container):
         model = params["market_price_model"]
-        if model == MarketPriceModel.QUANTLIB:
+        if cls.generates_paths(model):
             market_price_generator = cls(
                 model,
                 params['impacted_assets'],
                 params['rngp']
             )
-            seed_sequence = params['rngp'].__seed__(["QuantLib"])
-            quant_lib_seed = int(seed_sequence.generate_state(1)[0])
-            quant_lib_wrapper = QuantLibWrapper(
-                params['market_price_processes'],
-                params['market_price_correlation_matrix'],
-                TOTAL_BLOCKS,
-                quant_lib_seed
-            )
-            market_price_generator.increments = quant_lib_wrapper.correlated_returns()
+            store = params.get(SHARED_PATHS_PARAM_KEY)
+            if store is None:
+                market_price_generator.quantlib_returns(params)
+            else:
+                market_price_generator.shared_quantlib_returns(params, store)
         elif model == MarketPriceModel.PRICE_IMPACT:
             market_price_generator = cls(model, params['impacted_assets'], params['rngp'])
         elif model == MarketPriceModel.HIST_SIM:
@@ -74,6 +96,79 @@ class MarketPriceGenerator(Generator):
             logging.info("increments updated")
         return market_price_generator
 
+    def quantlib_returns(self, params: Parameters):
+        """
+        Creates the increments of the QuantLib processes from QuantLib's
+        sequence or from the normals of the model, tilted if configured
+        """
+        processes = params['market_price_processes']
+        seed_sequence = params['rngp'].__seed__(["QuantLib"])
+        # QuantLib seeds from the clock when the seed is 0
+        quant_lib_seed = max(int(seed_sequence.generate_state(1)[0]), 1)
+        quant_lib_wrapper = QuantLibWrapper(
+            processes,
+            params['market_price_correlation_matrix'],
+            simulation_configuration.TOTAL_BLOCKS,
+            quant_lib_seed
+        )
+        importance_sampling = params.get('importance_sampling')
+        normals = None
+        if self.model in PATH_NORMALS:
+            normals = PATH_NORMALS[self.model](
+                params['rngp'], simulation_configuration.TOTAL_BLOCKS, len(processes))
+        elif importance_sampling is not None:
+            normals = quant_lib_wrapper.normals()
+        if importance_sampling is not None:
+            normals, self.log_weights = tilt(normals, [
+                importance_sampling.shift.get(config.pair, 0.0) for config in processes
+            ])
+        self.increments = quant_lib_wrapper.correlated_returns(normals)
+
+    def shared_quantlib_returns(self, params: Parameters, store: SharedPathStore):
+        """
+        Uses the shared increments of the path set of the run,
+        which are created and published if no run created them yet
+        """
+        key = path_key(params)
+        handle = store.get(key)
+        if handle is None:
+            self.quantlib_returns(params)
+            handle = store.publish(key, self.increments, self.log_weights)
+        # attached from the block when needed, like in every other process
+        self._increments, self._log_weights = None, None
+        self.shared_increments = handle
+
+    @property
+    def increments(self):
+        if self._increments is None and self.shared_increments is not None:
+            self.attach_shared_increments()
+        return self._increments
+
+    @increments.setter
+    def increments(self, increments):
+        self._increments = increments
+
+    @property
+    def log_weights(self):
+        if self._increments is None and self.shared_increments is not None:
+            self.attach_shared_increments()
+        return self._log_weights
+
+    @log_weights.setter
+    def log_weights(self, log_weights):
+        self._log_weights = log_weights
+
+    def attach_shared_increments(self):
+        self._increments, self._log_weights, self.shared_memory = \
+            self.shared_increments.attach()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.shared_increments is not None:
+            # copies only carry the handle and attach when they need the increments
+            state.update(_increments=None, _log_weights=None, shared_memory=None)
+        return state
+
     def market_price(self, state):
         """
         This method returns a market price
@@ -107,13 +202,12 @@ class MarketPriceGenerator(Generator):
         """Passes a historic scenario or creates a random sample from a set of
         historical log-returns"""
         # TODO Consider different sampling options
-        # TODO Random Seed
-        data_feed = DataFeed(data_folder=DATA_FOLDER)
+        data_feed = load_data_feed(DATA_FOLDER)
         data = data_feed.data.copy()
         if self.model == MarketPriceModel.HIST_SIM:
-            random_index_array = np.random.randint(low=0,
+            random_index_array = self.rng.integers(low=0,
                                                    high=data_feed.length - 1,
-                                                   size=TOTAL_BLOCKS)
+                                                   size=simulation_configuration.TOTAL_BLOCKS)
             data = data_feed.data[random_index_array, :]
         increments = {}
         for index, asset in enumerate(data_feed.assets):
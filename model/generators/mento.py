@@ -4,17 +4,22 @@ Mento generator
 Handles one or more mento instances
 """
 
-from typing import Any, Dict, Set
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set, Tuple
 import numpy as np
 
 from model.constants import blocktime_seconds
 from model.entities.balance import Balance
-from model.types.base import MentoBuckets, MentoExchange, Stable
+from model.types.base import (
+    MarketObservables, MentoBuckets, MentoExchange, Stable, TradingRegime
+)
 from model.types.pair import Pair
 from model.types.configs import MentoExchangeConfig
 from model.utils.generator import Generator, state_update_blocks
 from model.utils import update_from_signal
 
+if TYPE_CHECKING:
+    from model.utils.trade_ledger import TradeLedger
+
 # raise numpy warnings as errors
 np.seterr(all='raise')
 
@@ -31,10 +36,16 @@ class MentoExchangeGenerator(Generator):
     """
     configs: Dict[MentoExchange, MentoExchangeConfig]
     active_exchanges: Set[MentoExchange]
+    # (timestep, buckets, observables) per exchange shared by all traders
+    observables_cache: Dict[MentoExchange, Tuple[int, MentoBuckets, MarketObservables]]
+    # Records the settled swaps when the Engine runs with trade_ledger=True
+    ledger: Optional["TradeLedger"]
 
     def __init__(self, configs: Dict[Stable, MentoExchangeConfig], active_exchanges: Set[Stable]):
         self.configs = configs
         self.active_exchanges = active_exchanges
+        self.observables_cache = {}
+        self.ledger = None
 
     @classmethod
     def from_parameters(cls, params, _initial_state, _container):
@@ -43,6 +54,11 @@ class MentoExchangeGenerator(Generator):
             set(params['mento_exchanges_active'])
         )
 
+    def update_parameters(self, params):
+        self.configs = params['mento_exchanges_config']
+        self.active_exchanges = set(params['mento_exchanges_active'])
+        self.observables_cache = {}
+
     @state_update_blocks('bucket_update')
     def bucket_update(self):
         return [{
@@ -112,6 +128,44 @@ class MentoExchangeGenerator(Generator):
         )
         return MentoBuckets(stable=stable_bucket, reserve_asset=reserve_asset_bucket)
 
+    def observables(self, exchange: MentoExchange, prev_state) -> MarketObservables:
+        """
+        Returns the market observables of an exchange, they are computed once
+        per timestep and recomputed when a trade moved the buckets
+        """
+        buckets = prev_state['mento_buckets'][exchange]
+        cached = self.observables_cache.get(exchange)
+        if cached is not None:
+            timestep, cached_buckets, observables = cached
+            if timestep == prev_state['timestep'] and cached_buckets == buckets:
+                return observables
+
+        config = self.configs[exchange]
+        market_price = (
+            prev_state['market_price'].get(Pair(config.reserve_asset, config.reference_fiat))
+            / prev_state['market_price'].get(Pair(config.stable, config.reference_fiat))
+        )
+        mento_price = buckets['stable'] / buckets['reserve_asset']
+        lower_band = market_price * (1 - config.spread)
+        upper_band = market_price / (1 - config.spread)
+
+        if lower_band > mento_price:
+            regime = TradingRegime.SELL_STABLE
+        elif upper_band < mento_price:
+            regime = TradingRegime.SELL_RESERVE_ASSET
+        else:
+            regime = TradingRegime.PASS
+
+        observables = MarketObservables(
+            market_price=market_price,
+            mento_price=mento_price,
+            lower_band=lower_band,
+            upper_band=upper_band,
+            regime=regime
+        )
+        self.observables_cache[exchange] = (prev_state['timestep'], buckets, observables)
+        return observables
+
     def get_buy_amount(
             self,
             exchange: MentoExchange,
@@ -148,6 +202,7 @@ class MentoExchangeGenerator(Generator):
         """
         config = self.configs.get(exchange)
         assert config is not None
+        self.observables_cache.pop(exchange, None)
 
         buy_amount = self.get_buy_amount(
             exchange, sell_amount, sell_reserve_asset, prev_state)
@@ -6,7 +6,7 @@ By using a dataclass to represent the System Parameters:
 * Ensure that all System Parameters are initialized
 """
 
-from typing import List, Dict, TypedDict
+from typing import List, Dict, Optional, TypedDict
 from QuantLib import GeometricBrownianMotionProcess
 
 from model.entities.balance import Balance
@@ -27,7 +27,9 @@ from model.types.configs import (
     MentoExchangeConfig,
     OracleConfig,
     TraderConfig,
-    ImpactDelayConfig
+    TraderExecutionConfig,
+    ImpactDelayConfig,
+    ImportanceSamplingConfig
 )
 from model.utils.rng_provider import RNGProvider
 
@@ -45,11 +47,13 @@ class Parameters(TypedDict):
     market_price_model: MarketPriceModel
     market_price_processes: List[MarketPriceConfig]
     market_price_correlation_matrix: List[List[float]]
+    importance_sampling: Optional[ImportanceSamplingConfig]
     average_daily_volume: Dict[Pair, float]
     impact_delay: ImpactDelayConfig
     impacted_assets: List[Pair]
     variance_market_price: Dict[Currency, Dict[Fiat, float]]
     traders: List[TraderConfig]
+    trader_execution: TraderExecutionConfig
     reserve_inventory: Dict[Currency, float]
     reserve_target_weight: float
     oracles: List[OracleConfig]
@@ -66,11 +70,13 @@ class InitParameters(TypedDict):
     market_price_model: List[MarketPriceModel]
     market_price_processes: List[List[MarketPriceConfig]]
     market_price_correlation_matrix: List[List[List[float]]]
+    importance_sampling: List[Optional[ImportanceSamplingConfig]]
     average_daily_volume: List[Dict[Pair, float]]
     impact_delay: List[ImpactDelayConfig]
     impacted_assets: List[List[Pair]]
     variance_market_price: List[Dict[Currency, Dict[Fiat, float]]]
     traders: List[List[TraderConfig]]
+    trader_execution: List[TraderExecutionConfig]
     reserve_inventory: List[Dict[Currency, float]]
     reserve_target_weight: List[float]
     oracle_pairs: List[List[Pair]]
@@ -193,6 +199,11 @@ parameters = InitParameters(
         ]
     ],
 
+    # Tilts the market price increments of the QUANTLIB, ANTITHETIC and SOBOL
+    # models, every run is weighted by its likelihood ratio, see
+    # model.utils.importance_sampling
+    importance_sampling=[None],
+
     average_daily_volume=[{
         Pair(CryptoAsset.CELO, Fiat.USD): 1000000,
         Pair(CryptoAsset.CELO, Fiat.EUR): 1000000,
@@ -248,6 +259,8 @@ parameters = InitParameters(
         ]
     ],
 
+    trader_execution=[TraderExecutionConfig()],
+
     reserve_inventory=[{
         CryptoAsset.CELO: 10000000.0,
         CryptoAsset.BTC: 1000.0,
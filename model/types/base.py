@@ -2,7 +2,7 @@
 Various Python types used in the model
 """
 from __future__ import annotations
-from typing import TypedDict, Union
+from typing import NamedTuple, TypedDict, Union
 from enum import Enum
 
 
@@ -56,8 +56,53 @@ class MentoBuckets(TypedDict):
     reserve_asset: float
 
 
+class TradingRegime(Enum):
+    SELL_STABLE = "SELL_STABLE"
+    SELL_RESERVE_ASSET = "SELL_RESERVE_ASSET"
+    PASS = "PASS"
+
+
+class MarketObservables(NamedTuple):
+    """
+    Prices of a mento exchange that trader strategies act on
+    """
+    # reserve asset price in stable on the market
+    market_price: float
+    # reserve asset price in stable implied by the buckets
+    mento_price: float
+    # market price net of the spread when selling stables to mento
+    lower_band: float
+    # market price net of the spread when selling reserve asset to mento
+    upper_band: float
+    regime: TradingRegime
+
+
+class TraderExecutionMode(Enum):
+    """
+    How the traders due in a timestep are executed
+    """
+    # decide and settle one trader after another
+    SEQUENTIAL = "sequential"
+    # decide all orders against the same state, then settle one after another
+    TWO_PHASE = "two_phase"
+
+
+class SweepMethod(Enum):
+    """
+    How the parameter subsets of a sweep plan are chosen
+    """
+    # every combination of the grid values of the dimensions
+    GRID = "grid"
+    LATIN_HYPERCUBE = "latin_hypercube"
+    SOBOL = "sobol"
+
+
 class MarketPriceModel(Enum):
     QUANTLIB = "quantlib"
+    # QuantLib processes driven by antithetic pairs of runs
+    ANTITHETIC = "antithetic"
+    # QuantLib processes driven by scrambled Sobol points in Brownian bridge order
+    SOBOL = "sobol"
     PRICE_IMPACT = "price_impact"
     HIST_SIM = "hist_sim"
     SCENARIO = "scenario"
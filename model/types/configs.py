@@ -2,7 +2,7 @@
 Typing for Configs
 """
 
-from typing import Any, NamedTuple
+from typing import Any, Dict, NamedTuple
 from model.entities.balance import Balance
 
 from model.types.base import (AggregationMethod,
@@ -12,6 +12,7 @@ from model.types.base import (AggregationMethod,
                               MentoExchange,
                               OracleType,
                               Stable,
+                              TraderExecutionMode,
                               TraderType)
 from model.types.pair import Pair
 
@@ -23,6 +24,13 @@ class TraderConfig(NamedTuple):
     exchange: MentoExchange
 
 
+class TraderExecutionConfig(NamedTuple):
+    mode: TraderExecutionMode = TraderExecutionMode.SEQUENTIAL
+    # Fraction by which a settled buy amount may fall short of the quote
+    # the decision was based on before the order is dropped
+    max_slippage: float = 0.0
+
+
 class MentoExchangeConfig(NamedTuple):
     reserve_asset: CryptoAsset
     stable: Stable
@@ -40,6 +48,12 @@ class MarketPriceConfig(NamedTuple):
     param_2: float
 
 
+class ImportanceSamplingConfig(NamedTuple):
+    # Mean of the standard normal increments driving the process of each pair,
+    # e.g. a negative shift for CELO/USD makes reserve shortfalls more likely
+    shift: Dict[Pair, float]
+
+
 class OracleConfig(NamedTuple):
     type: OracleType
     count: int
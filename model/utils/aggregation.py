@@ -0,0 +1,421 @@
+"""
+Streaming aggregation of Monte Carlo runs
+
+With Engine(aggregation=Aggregation()) every run is reduced to a
+timesteps x metrics array in its worker, and the engine folds these
+into per-(subset, timestep) P² quantile estimators and running
+moments as runs complete. Unless keep_results is set the raw state
+histories are dropped, so memory grows with timesteps x metrics
+instead of runs x timesteps x state.
+
+engine = Engine(aggregation=Aggregation(metrics={
+    'reserve_ratio': state_variable('reserve_ratio'),
+    'mento_rate_cusd_celo': mento_rate(MentoExchange.CUSD_CELO),
+}))
+...
+engine.aggregator.summary()
+
+With a baseline_subset the metrics of every other subset are also
+compared run by run with the baseline. Under common random numbers the
+paired differences vary much less than the subsets themselves, so
+paired_summary() resolves differences between subsets with fewer runs.
+"""
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from model.types.base import CryptoAsset, Fiat, MentoExchange
+from model.types.pair import Pair
+from .execution import RunExecution, RunHook
+
+METRICS_RECORD_KEY = 'metrics'
+
+Metric = Callable[[Dict[str, Any]], float]
+
+
+def _state_variable(name, state):
+    return state[name]
+
+
+def state_variable(name: str) -> Metric:
+    return partial(_state_variable, name)
+
+
+def _market_price(pair, state):
+    return state['market_price'][pair]
+
+
+def market_price(pair: Pair) -> Metric:
+    return partial(_market_price, pair)
+
+
+def _mento_rate(exchange, state):
+    buckets = state['mento_buckets'][exchange]
+    # buckets are empty before their first update
+    if not buckets['reserve_asset']:
+        return np.nan
+    return buckets['stable'] / buckets['reserve_asset']
+
+
+def mento_rate(exchange: MentoExchange) -> Metric:
+    return partial(_mento_rate, exchange)
+
+
+class ReadOnlyMetrics(Mapping):
+    """
+    Metrics by name that can't be modified, for defaults shared
+    by all Aggregations
+    """
+
+    def __init__(self, metrics: Dict[str, Metric]):
+        self.metrics = dict(metrics)
+
+    def __getitem__(self, name: str) -> Metric:
+        return self.metrics[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.metrics)
+
+    def __len__(self) -> int:
+        return len(self.metrics)
+
+
+DEFAULT_METRICS = ReadOnlyMetrics({
+    'reserve_ratio': state_variable('reserve_ratio'),
+    'collateralisation_ratio': state_variable('collateralisation_ratio'),
+    'mento_rate_cusd_celo': mento_rate(MentoExchange.CUSD_CELO),
+    'mento_rate_ceur_celo': mento_rate(MentoExchange.CEUR_CELO),
+    'mento_rate_creal_celo': mento_rate(MentoExchange.CREAL_CELO),
+    'market_price_celo_usd': market_price(Pair(CryptoAsset.CELO, Fiat.USD)),
+})
+
+
+class Aggregation(NamedTuple):
+    metrics: Mapping[str, Metric] = DEFAULT_METRICS
+    quantiles: Tuple[float, ...] = (0.01, 0.05, 0.5, 0.95, 0.99)
+    # Whether to return the state histories of the runs as well
+    keep_results: bool = False
+    # Subset the other subsets are compared with run by run
+    baseline_subset: Optional[int] = None
+
+
+class P2Quantiles:
+    """
+    P² estimators (Jain & Chlamtac, 1985) of several quantiles for a batch
+    of independent streams, one per element. Every estimator keeps five
+    markers, NaN observations are skipped.
+    """
+    quantiles: np.ndarray
+    # Number of observations per element
+    count: np.ndarray
+    # Marker heights, positions and desired positions with shape (quantiles, 5, elements)
+    heights: np.ndarray
+    positions: np.ndarray
+    desired: np.ndarray
+
+    def __init__(self, quantiles: Sequence[float], size: int):
+        self.quantiles = np.asarray(quantiles, dtype=float)
+        shape = (len(self.quantiles), 5, size)
+        self.count = np.zeros(size, dtype=np.int64)
+        self.heights = np.full(shape, np.nan)
+        self.positions = np.broadcast_to(
+            np.arange(1, 6, dtype=float)[None, :, None], shape
+        ).copy()
+        p = self.quantiles[:, None]
+        self.increments = np.hstack([0 * p, p / 2, p, (1 + p) / 2, 1 + 0 * p])[:, :, None]
+        self.desired = np.broadcast_to(1 + 4 * self.increments, shape).copy()
+
+    def add(self, values: np.ndarray):
+        """
+        Adds one observation per element, the first five observations
+        of an element become its markers
+        """
+        valid = ~np.isnan(values)
+        update = np.nonzero(valid & (self.count >= 5))[0]
+        initialise = np.nonzero(valid & (self.count < 5))[0]
+        if len(update):
+            with np.errstate(all='ignore'):
+                self.update(update, values[update])
+        if len(initialise):
+            self.heights[:, self.count[initialise], initialise] = values[initialise]
+            self.count[initialise] += 1
+            complete = initialise[self.count[initialise] == 5]
+            self.heights[:, :, complete] = np.sort(self.heights[:, :, complete], axis=1)
+
+    def update(self, elements: np.ndarray, values: np.ndarray):
+        """
+        Adds one observation per element to estimators that have their
+        five markers and moves the middle markers towards their desired
+        positions
+        """
+        heights = self.heights[:, :, elements]
+        positions = self.positions[:, :, elements]
+        desired = self.desired[:, :, elements] + self.increments
+        self.count[elements] += 1
+
+        heights[:, 0] = np.minimum(heights[:, 0], values)
+        heights[:, 4] = np.maximum(heights[:, 4], values)
+        cell = (
+            (values >= heights[:, 1]).astype(int)
+            + (values >= heights[:, 2])
+            + (values >= heights[:, 3])
+        )
+        positions[:, 1:] += np.arange(1, 5)[None, :, None] > cell[:, None, :]
+
+        for i in (1, 2, 3):
+            offset = desired[:, i] - positions[:, i]
+            move = (
+                ((offset >= 1) & (positions[:, i + 1] - positions[:, i] > 1))
+                | ((offset <= -1) & (positions[:, i - 1] - positions[:, i] < -1))
+            )
+            step = np.sign(offset)
+            heights[:, i] = np.where(move, self._moved_height(heights, positions, i, step),
+                                     heights[:, i])
+            positions[:, i] += np.where(move, step, 0)
+
+        self.heights[:, :, elements] = heights
+        self.positions[:, :, elements] = positions
+        self.desired[:, :, elements] = desired
+
+    @staticmethod
+    def _moved_height(heights: np.ndarray, positions: np.ndarray, i: int, step: np.ndarray):
+        """
+        Height of marker i moved by step, predicted piecewise-parabolically
+        or linearly where the parabola leaves the neighbouring heights
+        """
+        below, height, above = heights[:, i - 1], heights[:, i], heights[:, i + 1]
+        position_below, position, position_above = (
+            positions[:, i - 1], positions[:, i], positions[:, i + 1]
+        )
+        parabolic = height + step / (position_above - position_below) * (
+            (position - position_below + step) * (above - height)
+            / (position_above - position)
+            + (position_above - position - step) * (height - below)
+            / (position - position_below)
+        )
+        linear = np.where(
+            step > 0,
+            height + (above - height) / (position_above - position),
+            height - (below - height) / (position_below - position),
+        )
+        return np.where((below < parabolic) & (parabolic < above), parabolic, linear)
+
+    def values(self) -> np.ndarray:
+        """
+        Estimates with shape (quantiles, elements), exact for
+        elements with fewer than five observations
+        """
+        estimates = self.heights[:, 2].copy()
+        partial_elements = np.nonzero((self.count > 0) & (self.count < 5))[0]
+        if len(partial_elements):
+            estimates[:, partial_elements] = np.nanquantile(
+                self.heights[0][:, partial_elements], self.quantiles, axis=0
+            )
+        estimates[:, self.count == 0] = np.nan
+        return estimates
+
+
+class RunningMoments:
+    """
+    Welford's running mean and variance for a batch of elements, NaN
+    observations are skipped
+    """
+
+    def __init__(self, size: int):
+        self.count = np.zeros(size, dtype=np.int64)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+
+    def add(self, values: np.ndarray):
+        valid = ~np.isnan(values)
+        self.count += valid
+        with np.errstate(all='ignore'):
+            delta = np.where(valid, values - self.mean, 0)
+            self.mean += np.where(valid, delta / np.maximum(self.count, 1), 0)
+            self.m2 += np.where(valid, delta * (values - self.mean), 0)
+
+    def variance(self) -> np.ndarray:
+        with np.errstate(all='ignore'):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+
+class AggregationHook(RunHook):
+    """
+    Reduces a run to an array of its metrics per timestep
+    """
+    aggregation: Aggregation
+
+    def __init__(self, aggregation: Aggregation):
+        self.aggregation = aggregation
+
+    def after_run(self, run_execution: RunExecution):
+        metrics = self.aggregation.metrics.values()
+        values = np.full((run_execution.run_args.timesteps + 1, len(metrics)), np.nan)
+        for substeps in run_execution.result:
+            state = substeps[-1]
+            if state['timestep'] < len(values):
+                values[state['timestep']] = [metric(state) for metric in metrics]
+        run_execution.record[METRICS_RECORD_KEY] = values
+        # the parent only needs the metrics, not the generators of the run
+        run_execution.compact_record = True
+        if not self.aggregation.keep_results:
+            run_execution.result.clear()
+
+
+class SubsetAggregate(NamedTuple):
+    timesteps: int
+    quantiles: P2Quantiles
+    moments: RunningMoments
+
+
+class MonteCarloAggregator:
+    """
+    Folds the metrics of completed runs into per-(subset, timestep) summaries
+    """
+    aggregation: Aggregation
+    subsets: Dict[Tuple[int, int], SubsetAggregate]
+    # Moments of the differences to the baseline per (simulation, subset)
+    differences: Dict[Tuple[int, int], RunningMoments]
+    # Metrics per (simulation, run) and subset that wait for their pair
+    unpaired: Dict[Tuple[int, int], Dict[int, np.ndarray]]
+    # Number of subsets per (simulation, run) compared with the baseline
+    paired: Dict[Tuple[int, int], int]
+    # Number of subsets per simulation, once known
+    subset_counts: Dict[int, int]
+
+    def __init__(self, aggregation: Aggregation):
+        self.aggregation = aggregation
+        self.subsets = {}
+        self.differences = {}
+        self.unpaired = {}
+        self.paired = {}
+        self.subset_counts = {}
+
+    def consume(self, run_result):
+        """
+        Adds the metrics in the record of a run result returned by execute_run
+        """
+        _result, record = run_result
+        values = record.pop(METRICS_RECORD_KEY, None)
+        if values is not None:
+            self.add(record['simulation'], record['subset'], values)
+            if self.aggregation.baseline_subset is not None:
+                self.pair(record['simulation'], record['run'], record['subset'], values)
+        return run_result
+
+    def add(self, simulation: int, subset: int, values: np.ndarray):
+        """
+        Folds the metrics of a run into the quantiles and moments of its subset
+        """
+        key = (simulation, subset)
+        if key not in self.subsets:
+            self.subsets[key] = SubsetAggregate(
+                len(values),
+                P2Quantiles(self.aggregation.quantiles, values.size),
+                RunningMoments(values.size),
+            )
+        aggregate = self.subsets[key]
+        assert len(values) == aggregate.timesteps, "Runs of a subset need the same timesteps"
+        aggregate.quantiles.add(values.ravel())
+        aggregate.moments.add(values.ravel())
+
+    def expect_subsets(self, simulation: int, subsets: int):
+        """
+        Sets the number of subsets of a simulation so that baselines
+        are released once every subset of their run is paired
+        """
+        self.subset_counts[simulation] = subsets
+
+    def pair(self, simulation: int, run: int, subset: int, values: np.ndarray):
+        """
+        Adds the differences to the baseline of the run for the subsets
+        of the run that are complete
+        """
+        baseline_subset = self.aggregation.baseline_subset
+        pending = self.unpaired.setdefault((simulation, run), {})
+        pending[subset] = values
+        baseline = pending.get(baseline_subset)
+        if baseline is None:
+            return
+        for other in [other for other in pending if other != baseline_subset]:
+            key = (simulation, other)
+            if key not in self.differences:
+                self.differences[key] = RunningMoments(baseline.size)
+            self.differences[key].add((pending.pop(other) - baseline).ravel())
+            self.paired[(simulation, run)] = self.paired.get((simulation, run), 0) + 1
+        if self.paired.get((simulation, run), 0) + 1 == self.subset_counts.get(simulation):
+            del self.unpaired[(simulation, run)]
+            del self.paired[(simulation, run)]
+
+    def release_pairs(self, simulation: int):
+        """
+        Drops the pending runs of a simulation once no further runs of
+        their subsets will complete, e.g. after a batch of runs that
+        not every subset took part in
+        """
+        for key in [key for key in self.unpaired if key[0] == simulation]:
+            del self.unpaired[key]
+            self.paired.pop(key, None)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Returns one row per simulation, subset, timestep and metric with the
+        number of runs, mean, standard deviation and quantile estimates
+        """
+        metrics = list(self.aggregation.metrics)
+        frames = []
+        for (simulation, subset), aggregate in self.subsets.items():
+            frame = pd.DataFrame({
+                'simulation': simulation,
+                'subset': subset,
+                'timestep': np.repeat(np.arange(aggregate.timesteps), len(metrics)),
+                'metric': np.tile(metrics, aggregate.timesteps),
+                'count': aggregate.moments.count,
+                'mean': aggregate.moments.mean,
+                'std': np.sqrt(aggregate.moments.variance()),
+            })
+            for quantile, values in zip(self.aggregation.quantiles,
+                                        aggregate.quantiles.values()):
+                frame[f"p{quantile * 100:g}"] = values
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def paired_summary(self) -> pd.DataFrame:
+        """
+        Returns one row per simulation, subset, timestep and metric with the
+        mean difference to the baseline subset over paired runs, its standard
+        error and 95% confidence interval, and the variance reduction of
+        pairing: the factor by which independent runs would need to be more
+        numerous to estimate the difference as precisely
+        """
+        metrics = list(self.aggregation.metrics)
+        frames = []
+        for (simulation, subset), moments in self.differences.items():
+            timesteps = self.subsets[(simulation, subset)].timesteps
+            independent_variance = (
+                self.subsets[(simulation, subset)].moments.variance()
+                + self.subsets[(simulation, self.aggregation.baseline_subset)].moments.variance()
+            )
+            with np.errstate(all='ignore'):
+                stderr = np.sqrt(moments.variance() / moments.count)
+                variance_reduction = independent_variance / moments.variance()
+            frames.append(pd.DataFrame({
+                'simulation': simulation,
+                'subset': subset,
+                'timestep': np.repeat(np.arange(timesteps), len(metrics)),
+                'metric': np.tile(metrics, timesteps),
+                'count': moments.count,
+                'mean_difference': moments.mean,
+                'std_difference': np.sqrt(moments.variance()),
+                'stderr': stderr,
+                'ci_low': moments.mean - 1.96 * stderr,
+                'ci_high': moments.mean + 1.96 * stderr,
+                'variance_reduction': variance_reduction,
+            }))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
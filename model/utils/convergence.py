@@ -0,0 +1,160 @@
+"""
+Adaptive Monte Carlo run counts
+
+With Engine(aggregation=Aggregation(...), convergence=Convergence(targets=[
+    PrecisionTarget('collateralisation_ratio', half_width=0.01),
+    PrecisionTarget('collateralisation_ratio', half_width=0.05, statistic=0.05),
+])) every subset first executes the runs of its simulation, then further
+batches of runs until the confidence intervals of all targets are narrow
+enough or max_runs is reached. Noisy subsets thus get more runs than
+quiet ones. engine.convergence_monitor.report() lists the achieved
+precision per subset and target.
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from .aggregation import METRICS_RECORD_KEY, Aggregation
+
+
+class PrecisionTarget(NamedTuple):
+    """
+    Precision to which a statistic of a metric has to be estimated
+    """
+    # Name of a metric of the aggregation
+    metric: str
+    # Largest acceptable half-width of the confidence interval
+    half_width: float
+    # 'mean' or the quantile to estimate, e.g. 0.05
+    statistic: Union[str, float] = 'mean'
+    # Timestep of the metric, defaults to the last timestep a run reached
+    timestep: Optional[int] = None
+    # Whether half_width is relative to the magnitude of the estimate
+    relative: bool = False
+
+
+class Convergence(NamedTuple):
+    """
+    Targets of the adaptive run counts and the batches to reach them with
+    """
+    targets: List[PrecisionTarget]
+    # Number of runs added to a subset that hasn't converged
+    batch_size: int = 10
+    # Number of runs after which a subset stops regardless
+    max_runs: int = 1000
+    confidence: float = 0.95
+
+
+class TargetPrecision(NamedTuple):
+    estimate: float
+    half_width: float
+    converged: bool
+
+
+class ConvergenceMonitor:
+    """
+    Collects the target metrics of completed runs per (simulation, subset)
+    and decides which subsets need more runs
+    """
+    convergence: Convergence
+    # Metric column of every target
+    columns: List[int]
+    # Values of every target per (simulation, subset)
+    values: Dict[Tuple[int, int], List[List[float]]]
+
+    def __init__(self, convergence: Convergence, aggregation: Aggregation):
+        metrics = list(aggregation.metrics)
+        for target in convergence.targets:
+            assert target.metric in metrics, f"{target.metric} isn't an aggregated metric"
+        self.convergence = convergence
+        self.columns = [metrics.index(target.metric) for target in convergence.targets]
+        self.values = {}
+        self.z_score = norm.ppf((1 + convergence.confidence) / 2)
+
+    def consume(self, run_result):
+        """
+        Reads the target metrics in the record of a run result returned by
+        execute_run, to be called before the aggregator drops them
+        """
+        _result, record = run_result
+        metrics = record.get(METRICS_RECORD_KEY)
+        if metrics is not None:
+            values = self.values.setdefault(
+                (record['simulation'], record['subset']),
+                [[] for _ in self.convergence.targets],
+            )
+            for target_values, target, column in zip(
+                    values, self.convergence.targets, self.columns):
+                target_values.append(target_value(metrics[:, column], target.timestep))
+        return run_result
+
+    def precision(self, simulation: int, subset: int) -> List[TargetPrecision]:
+        """
+        Returns the precision of every target for the runs of a subset so far
+        """
+        values = self.values.get((simulation, subset), [[] for _ in self.convergence.targets])
+        return [
+            self.target_precision(target, np.array(target_values))
+            for target, target_values in zip(self.convergence.targets, values)
+        ]
+
+    def target_precision(self, target: PrecisionTarget, values: np.ndarray) -> TargetPrecision:
+        """
+        Returns the estimate of the statistic of a target and the half-width
+        of its confidence interval, NaN values are left out
+        """
+        values = np.sort(values[~np.isnan(values)])
+        count = len(values)
+        if count < 2:
+            return TargetPrecision(np.nan, np.inf, False)
+        if target.statistic == 'mean':
+            estimate = values.mean()
+            half_width = self.z_score * values.std(ddof=1) / np.sqrt(count)
+        else:
+            # distribution-free interval from the binomial count below the quantile
+            quantile = target.statistic
+            estimate = np.quantile(values, quantile)
+            spread = self.z_score * np.sqrt(count * quantile * (1 - quantile))
+            lower = int(np.clip(np.floor(count * quantile - spread), 0, count - 1))
+            upper = int(np.clip(np.ceil(count * quantile + spread), 0, count - 1))
+            half_width = (values[upper] - values[lower]) / 2
+        limit = target.half_width * (abs(estimate) if target.relative else 1)
+        return TargetPrecision(float(estimate), float(half_width), bool(half_width <= limit))
+
+    def converged(self, simulation: int, subset: int) -> bool:
+        return all(precision.converged for precision in self.precision(simulation, subset))
+
+    def report(self) -> pd.DataFrame:
+        """
+        Returns one row per simulation, subset and target with the number
+        of runs, the estimate and the achieved and targeted half-width
+        """
+        rows = []
+        for (simulation, subset), values in sorted(self.values.items()):
+            for target, target_values, precision in zip(
+                    self.convergence.targets, values, self.precision(simulation, subset)):
+                rows.append({
+                    'simulation': simulation,
+                    'subset': subset,
+                    'metric': target.metric,
+                    'statistic': target.statistic,
+                    'runs': len(target_values),
+                    'estimate': precision.estimate,
+                    'half_width': precision.half_width,
+                    'target_half_width': target.half_width,
+                    'converged': precision.converged,
+                })
+        return pd.DataFrame(rows)
+
+
+def target_value(values: np.ndarray, timestep: Optional[int]) -> float:
+    """
+    Value of a metric over the timesteps of a run at timestep,
+    or at the last timestep it was recorded at
+    """
+    if timestep is not None:
+        return values[timestep] if timestep < len(values) else np.nan
+    recorded = np.nonzero(~np.isnan(values))[0]
+    return values[recorded[-1]] if len(recorded) else np.nan
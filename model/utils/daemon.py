@@ -0,0 +1,202 @@
+"""
+Warm worker pool daemon for repeated experiments
+
+Every fresh interpreter and every spawned worker pays for importing
+radcad, QuantLib, cvxpy and pandas and for reading the historical data
+before the first run. A PoolDaemon pays this once: it imports the model,
+loads the data feeds, forks a persistent pool of workers and then
+executes the simulations and experiments submitted to it over a local
+socket, streaming their run results back as they complete.
+
+python -m model.utils.daemon --processes 8
+
+and in a notebook
+
+df, exceptions = experiments.run.run(experiment, pool=DEFAULT_ADDRESS)
+
+Experiments that use the SINGLE_PROCESS backend are executed in the
+daemon process, all others in its pool. The hooks of the executable are
+called in the daemon.
+"""
+import argparse
+import importlib
+import logging
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+import dill
+from radcad.utils import extract_exceptions
+
+# Imported by the daemon before it forks its workers
+WARM_MODULES = ('experiments.default_experiment',)
+DEFAULT_ADDRESS = os.path.join(tempfile.gettempdir(), f"mento2-model-pool-{os.getuid()}.sock")
+# Engine state that is sent back to the client once an executable completes
+ENGINE_STATE = ('aggregator', 'convergence_monitor', 'scheduler', 'telemetry_report')
+
+
+def key_path(address: str) -> Path:
+    return Path(f"{address}.key")
+
+
+def send(connection, message):
+    # dill, as run records may refer to closures of generators
+    connection.send_bytes(dill.dumps(message))
+
+
+def receive(connection):
+    return dill.loads(connection.recv_bytes())
+
+
+class PoolDaemon:
+    """
+    Serves submitted executables one at a time with a warm pool
+    """
+    address: str
+    processes: int
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, processes: Optional[int] = None):
+        # pylint: disable=import-outside-toplevel
+        from model.utils.data_feed import DATA_FOLDER, load_data_feed
+        from pathos.multiprocessing import ProcessPool
+
+        for module in WARM_MODULES:
+            importlib.import_module(module)
+        load_data_feed(DATA_FOLDER)
+        self.address = address
+        # forked after the imports, so workers start warm
+        self.pool = ProcessPool(processes)
+        self.processes = self.pool.ncpus
+
+    def serve(self):
+        """
+        Accepts connections until a client asks the daemon to shut down
+        """
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        authkey = secrets.token_bytes(32)
+        path = key_path(self.address)
+        with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as file:
+            file.write(authkey)
+        logging.info("Serving a pool of %s processes on %s", self.processes, self.address)
+        try:
+            with Listener(self.address, family='AF_UNIX', authkey=authkey) as listener:
+                while True:
+                    with listener.accept() as connection:
+                        request, executable = receive(connection)
+                        if request == 'shutdown':
+                            break
+                        self.execute(connection, executable)
+        finally:
+            path.unlink(missing_ok=True)
+            self.pool.close()
+            self.pool.join()
+            self.pool.clear()
+
+    def execute(self, connection, executable):
+        """
+        Runs a simulation or experiment on the warm pool and streams its
+        run results, then the state of its engine, over the connection
+        """
+        engine = executable.engine
+
+        def stream(run_result):
+            send(connection, ('result', run_result))
+            return run_result
+
+        engine.pool = self.pool
+        engine.result_callback = stream
+        try:
+            executable.run()
+        except Exception:  # pylint: disable=broad-except
+            send(connection, ('error', traceback.format_exc()))
+            return
+        finally:
+            engine.pool = None
+            engine.result_callback = None
+        send(connection, ('done', {key: getattr(engine, key, None) for key in ENGINE_STATE}))
+
+
+def connect(address: str = DEFAULT_ADDRESS):
+    return Client(address, family='AF_UNIX', authkey=key_path(address).read_bytes())
+
+
+def stream_runs(executable, address: str = DEFAULT_ADDRESS) -> Iterator[Any]:
+    """
+    Submits a simulation or experiment to the daemon and yields its
+    run results as they complete. The engine state such as the
+    aggregator is copied to the engine of the executable at the end.
+    """
+    engine = executable.engine
+    # iterators of previous runs can't be pickled
+    engine._run_generator = iter(())  # pylint: disable=protected-access
+    with connect(address) as connection:
+        send(connection, ('run', executable))
+        while True:
+            kind, message = receive(connection)
+            if kind == 'result':
+                yield message
+            elif kind == 'error':
+                raise RuntimeError(f"Execution in the pool daemon failed:\n{message}")
+            else:
+                for key, value in message.items():
+                    setattr(engine, key, value)
+                return
+
+
+def run_remote(executable, address: str = DEFAULT_ADDRESS) -> List[dict]:
+    """
+    Same as executable.run(), but executes it in the daemon
+    """
+    run_results: List[Any] = sorted(stream_runs(executable, address), key=lambda result: (
+        result[1]['simulation'], result[1]['run'], result[1]['subset']))
+    executable.results, executable.exceptions = (
+        extract_exceptions(run_results) if run_results else ([], []))
+    return executable.results
+
+
+def shutdown(address: str = DEFAULT_ADDRESS):
+    with connect(address) as connection:
+        send(connection, ('shutdown', None))
+
+
+def start_daemon(
+    address: str = DEFAULT_ADDRESS,
+    processes: Optional[int] = None,
+    timeout: float = 120.0,
+) -> subprocess.Popen:
+    """
+    Starts a daemon in the background and waits until it accepts
+    connections. The caller owns the returned process and ends it with
+    shutdown(address) or by terminating it.
+    """
+    command = [sys.executable, '-m', 'model.utils.daemon', '--address', address]
+    if processes:
+        command += ['--processes', str(processes)]
+    key_path(address).unlink(missing_ok=True)
+    # outlives this function, so it can't be managed by a with block
+    process = subprocess.Popen(  # pylint: disable=consider-using-with
+        command, cwd=Path(__file__, '../../..').resolve())
+    deadline = time.time() + timeout
+    while not (key_path(address).exists() and os.path.exists(address)):
+        if process.poll() is not None or time.time() > deadline:
+            process.kill()
+            raise RuntimeError(f"The pool daemon didn't start on {address}")
+        time.sleep(0.1)
+    return process
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--address', default=DEFAULT_ADDRESS)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    PoolDaemon(args.address, args.processes).serve()
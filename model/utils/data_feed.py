@@ -2,12 +2,13 @@
 DataFeed class used for loading and parsing of
 historical data required by the simulation.
 """
+from functools import lru_cache
 from pathlib import Path
 import os
 import numpy as np
 import pandas as pd
 
-from experiments.simulation_configuration import DATA_SOURCE
+from experiments import simulation_configuration
 # pylint: disable = unused-import
 # pylint: disable = redefined-outer-name
 import data.mock_data  # this is necessary to create mock data if not existent
@@ -24,12 +25,13 @@ class DataFeed:
     Performs data conversion for generators
     """
 
-    def __init__(self, data_folder):
+    def __init__(self, data_folder, data_source=None):
         self.data_folder = data_folder
+        self.data_source = data_source or simulation_configuration.DATA_SOURCE
 
-        if DATA_SOURCE == 'mock':
+        if self.data_source == 'mock':
             self.historical_data = self.load_mock_data(MOCK_DATA_FILE_NAME)
-        elif DATA_SOURCE == 'historical':
+        elif self.data_source == 'historical':
             self.historical_data = self.load_historical_data(HISTORICAL_DATA_FILE_NAME)
         else:
             raise NotImplementedError("Data source not supported")
@@ -66,3 +68,16 @@ class DataFeed:
         calculates log returns out of a data frame with price time series in its columns
         """
         return data_frame.apply(lambda column: np.log((column/column.shift(1)).dropna()))
+
+
+def load_data_feed(data_folder) -> DataFeed:
+    """
+    The DataFeed of a data folder for the configured data source,
+    read once per process and data source
+    """
+    return _load_data_feed(data_folder, simulation_configuration.DATA_SOURCE)
+
+
+@lru_cache(maxsize=None)
+def _load_data_feed(data_folder, data_source) -> DataFeed:
+    return DataFeed(data_folder=data_folder, data_source=data_source)
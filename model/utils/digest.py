@@ -0,0 +1,164 @@
+"""
+Rolling digests of the states of runs
+
+With Engine(digest=StateDigest()) every run folds the canonical form of
+its state after each timestep into a rolling sha256: keys are sorted,
+enums serialized by name and floats rounded to a number of significant
+digits. The exception record of a run keeps the final digest and the
+digest at every `checkpoint_interval` timesteps, so two executions of
+the same runs, e.g. by an alternate engine or a vectorized code path,
+can be compared in constant memory instead of diffing their state
+dataframes. As the digest is rolling, every checkpoint after the first
+divergence differs too and divergences() finds the first differing
+checkpoint by bisection.
+
+Floats that differ by less than the precision can still round to
+different digits, so the precision should stay well below the
+differences that matter.
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .execution import RunExecution, RunHook
+from .fingerprint import canonical
+
+DIGEST_RECORD_KEY = 'digest'
+# State variables that identify the run rather than its state
+RUN_VARIABLES = ('simulation', 'subset', 'run', 'substep')
+
+
+class StateDigest(NamedTuple):
+    # Significant digits that floats are rounded to
+    precision: int = 12
+    # Timesteps between checkpoints of the rolling digest
+    checkpoint_interval: int = 100
+    # Further state variables left out of the digest
+    exclude: Sequence[str] = ()
+
+
+def quantize(value: float, precision: int) -> str:
+    # + 0.0 turns -0.0 into 0.0
+    return f"{value + 0.0:.{precision - 1}e}"
+
+
+def state_bytes(state: Dict[str, Any], digest: StateDigest) -> bytes:
+    """
+    Canonical serialization of the digested variables of a state
+    """
+    excluded = set(RUN_VARIABLES) | set(digest.exclude)
+    variables = {key: value for key, value in state.items() if key not in excluded}
+    data = canonical(variables, floats=lambda value: quantize(value, digest.precision))
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+class StateDigestHook(RunHook):
+    """
+    Folds the state after every timestep into the digest of the run
+    """
+    digest: StateDigest
+    # (timestep, digest) at every checkpoint
+    checkpoints: List[Tuple[int, str]]
+
+    def __init__(self, digest: StateDigest):
+        self.digest = digest
+        self.sha = None
+        self.checkpoints = []
+
+    def before_run(self, run_execution: RunExecution):
+        # created in the worker, as hashes can't be pickled
+        self.sha = hashlib.sha256()
+        self.update(run_execution.state)
+
+    def after_step(self, run_execution: RunExecution):
+        self.update(run_execution.state)
+
+    def update(self, state: Dict[str, Any]):
+        self.sha.update(state_bytes(state, self.digest))
+        timestep = state['timestep']
+        if timestep % self.digest.checkpoint_interval == 0:
+            self.checkpoints.append((timestep, self.sha.hexdigest()))
+
+    def after_run(self, run_execution: RunExecution):
+        run_execution.record[DIGEST_RECORD_KEY] = {
+            'timestep': run_execution.state['timestep'],
+            'digest': self.sha.hexdigest(),
+            'checkpoints': self.checkpoints,
+        }
+
+
+def digest_table(exceptions: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Returns the final digest of every run in the exceptions of an
+    executed simulation or experiment
+    """
+    return pd.DataFrame([
+        {
+            'simulation': record['simulation'],
+            'subset': record['subset'],
+            'run': record['run'] + 1,
+            'timestep': record[DIGEST_RECORD_KEY]['timestep'],
+            'digest': record[DIGEST_RECORD_KEY]['digest'],
+        }
+        for record in exceptions
+        if DIGEST_RECORD_KEY in record
+    ], columns=['simulation', 'subset', 'run', 'timestep', 'digest'])
+
+
+def first_divergence(
+    expected: Dict[str, Any],
+    actual: Dict[str, Any],
+) -> Optional[Tuple[Optional[int], int]]:
+    """
+    Returns the timesteps of the last equal and the first differing
+    checkpoint of two digests of a run, or None if they're equal. The
+    first differing checkpoint is the final timestep if all checkpoints
+    are equal.
+    """
+    if expected['digest'] == actual['digest'] and expected['timestep'] == actual['timestep']:
+        return None
+    checkpoints = list(zip(expected['checkpoints'], actual['checkpoints']))
+    # checkpoints are equal up to the first divergence and differ after it
+    index, end = 0, len(checkpoints)
+    while index < end:
+        middle = (index + end) // 2
+        if checkpoints[middle][0] == checkpoints[middle][1]:
+            index = middle + 1
+        else:
+            end = middle
+    last_equal = checkpoints[index - 1][0][0] if index > 0 else None
+    if index < len(checkpoints):
+        return last_equal, checkpoints[index][1][0]
+    return last_equal, min(expected['timestep'], actual['timestep'])
+
+
+def divergences(
+    expected: List[Dict[str, Any]],
+    actual: List[Dict[str, Any]],
+) -> pd.DataFrame:
+    """
+    Compares the digests in the exceptions of two executions of the same
+    runs and returns the runs that differ, with the timesteps between
+    which they diverged. Runs missing from either execution are reported
+    without timesteps.
+    """
+    def by_run(exceptions):
+        return {
+            (record['simulation'], record['subset'], record['run'] + 1): record[DIGEST_RECORD_KEY]
+            for record in exceptions
+            if DIGEST_RECORD_KEY in record
+        }
+
+    expected_digests, actual_digests = by_run(expected), by_run(actual)
+    rows = []
+    for key in sorted(set(expected_digests) | set(actual_digests)):
+        if key not in expected_digests or key not in actual_digests:
+            rows.append((*key, None, None))
+            continue
+        divergence = first_divergence(expected_digests[key], actual_digests[key])
+        if divergence is not None:
+            rows.append((*key, *divergence))
+    return pd.DataFrame(rows, columns=[
+        'simulation', 'subset', 'run', 'last_equal_timestep', 'first_different_timestep'])
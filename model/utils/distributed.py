@@ -0,0 +1,62 @@
+"""
+Execution of runs on a dask.distributed cluster
+
+With Engine(distributed=Distributed('tcp://scheduler:8786')) the runs of
+a simulation or experiment are submitted as tasks to the workers of a
+dask cluster, which may span several hosts. Without an address a
+LocalCluster with engine.processes single-threaded worker processes is
+started, so the same code runs on one machine.
+
+Tasks are retried when they raise or when their worker is lost, and
+results are collected in order as they complete, so combined with a
+ResultCache the finished runs of an interrupted sweep are kept. With an
+Aggregation the workers only return the metrics of their runs.
+"""
+from collections import deque
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional
+
+
+class Distributed(NamedTuple):
+    # Address of the dask scheduler, a LocalCluster is started if None
+    address: Optional[str] = None
+    # Number of times a task is resubmitted after an exception or a lost worker
+    retries: int = 3
+    # Number of tasks submitted ahead of the oldest pending one
+    window: int = 1000
+
+
+def iterate_distributed(
+    distributed: Distributed,
+    processes: Optional[int],
+    function: Callable[[Any], Any],
+    tasks: Iterable[Any],
+) -> Iterator[Any]:
+    """
+    Maps function over tasks on a dask cluster and yields
+    the results in order as soon as they are available
+    """
+    # pylint: disable=import-outside-toplevel
+    import dask
+    from dask.distributed import Client, LocalCluster
+
+    # tasks of lost workers are rescheduled up to allowed-failures times
+    with dask.config.set({'distributed.scheduler.allowed-failures': distributed.retries}):
+        if distributed.address is None:
+            cluster = LocalCluster(n_workers=processes, threads_per_worker=1, processes=True)
+            client = Client(cluster)
+        else:
+            cluster = None
+            client = Client(distributed.address)
+        try:
+            pending = deque()
+            for task in tasks:
+                pending.append(client.submit(
+                    function, task, retries=distributed.retries, pure=False))
+                if len(pending) >= distributed.window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            client.close()
+            if cluster is not None:
+                cluster.close()
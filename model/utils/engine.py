@@ -2,14 +2,34 @@
 radCAD Engine extension to give us more control over how simulations happen
 """
 import copy
-from functools import reduce
-from typing import Any, Callable, Dict, List, NamedTuple
+import logging
+from functools import partial, reduce
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Union
 from radcad.engine import Engine as RadCadEngine
-from radcad import core, wrappers
+from radcad import wrappers
+from radcad.backends import Backend
+from radcad.utils import extract_exceptions
 
 from model.utils.rng_provider import RNGProvider
 
+from .aggregation import Aggregation, AggregationHook, MonteCarloAggregator
+from .convergence import Convergence, ConvergenceMonitor
+from .digest import StateDigest, StateDigestHook
+from .distributed import Distributed
+from .execution import RunExecution, RunHook, batch_pool, execute_run, iterate_tasks
 from .generator_container import GENERATOR_CONTAINER_PARAM_KEY, GeneratorContainer
+from .importance_sampling import ImportanceWeightHook
+from .memory_profiling import MemoryProfile, MemoryProfileHook
+from .profiling import TimingHook
+from .reduction import Reduction, ReductionHook
+from .result_cache import CACHE_KEY_RECORD_KEY, CachedRun, ResultCache
+from .shared_paths import SHARED_PATHS_PARAM_KEY, SharedPathStore
+from .scheduling import CostScheduler, RunTimeHook, Scheduling
+from .stop_conditions import StopCondition, StopConditionHook
+from .sweep import parameter_sweep, swept_parameters
+from .telemetry import Telemetry, TelemetryHook, TelemetryMonitor, TelemetryReport
+from .trade_ledger import TradeLedgerHook
 
 
 class SimulationConfig(NamedTuple):
@@ -17,14 +37,527 @@ class SimulationConfig(NamedTuple):
     state: Dict[str, Any]
     state_update_blocks: List[Any]
     run_index: int
+    # Only set when subsets draw independent random numbers
+    subset_index: Optional[int] = None
 
 # pylint: disable=too-many-locals,protected-access,too-few-public-methods
-class Engine(RadCadEngine):
+# Every option of the engine and the monitor it creates is an attribute
+class Engine(RadCadEngine):  # pylint: disable=too-many-instance-attributes
     """
     Extends the radcad.Engine with the ability to:
     - Inject generators into a simulation run
     - Dynamically generate state update blocks based on the generators
+    - Fork a simulation into branches after a shared warm-up
+    - Stop runs early once one of its stop_conditions is met
+    - Time every policy and state update function
+    - Sample the memory footprint of runs
+    - Record every executed Mento swap in a trade ledger
+    - Aggregate metrics across runs without keeping the runs
+    - Reduce runs to a few values in their worker
+    - Load runs from a content-addressed result cache instead of simulating them
+    - Stream the parameter subsets of a SweepPlan without materializing them
+    - Draw common random numbers in every parameter subset of a run
+    - Weight runs with tilted market increments by their likelihood ratio
+    - Add runs to subsets until metrics reach a target precision
+    - Dispatch the runs of a sweep longest first by their estimated cost
+    - Execute runs on a dask cluster spanning several hosts
+    - Share the market price paths of runs with the workers through shared memory
+    - Execute runs in a persistent pool and stream their results
+    - Report the throughput and progress of runs while they execute
+    - Digest the states of runs to compare executions in constant memory
+
+    Additional options:
+        **stop_conditions (List[StopCondition]): Conditions evaluated after every
+            timestep, the stopping timestep and reason are added to the
+            exception record of the run. Defaults to `[]`.
+        **timing (bool): Whether to time and count the calls of all policy and
+            state update functions, see model.utils.profiling. Defaults to `False`.
+        **memory_profile (MemoryProfile): Sample RSS, tracemalloc and the size of
+            the state history and generators, see model.utils.memory_profiling.
+            Defaults to `None`.
+        **trade_ledger (bool): Whether to record all swaps of a run in a trade
+            ledger, see model.utils.trade_ledger. Defaults to `False`.
+        **aggregation (Aggregation): Metrics whose per-timestep mean, variance
+            and quantiles across runs are summarized in `engine.aggregator`,
+            see model.utils.aggregation. Defaults to `None`.
+        **reduction (Reduction): Reducers that fold the states of every run into
+            a few values as its timesteps are executed, which are returned in
+            place of the state history, see model.utils.reduction. Defaults to `None`.
+        **result_cache (ResultCache): On-disk cache that runs are loaded from and
+            stored in, see model.utils.result_cache. Defaults to `None`.
+        **common_random_numbers (bool): Whether every stochastic source draws the
+            same stream for a run index in every parameter subset, which pairs
+            runs across subsets. Otherwise subsets draw independent streams.
+            Subsets that sweep rng_seed draw the streams of their seeds, so they
+            remain independent replications. Defaults to `True`.
+        **convergence (Convergence): Precision targets for aggregated metrics,
+            every subset executes the runs of its simulation and then batches of
+            further runs until the targets or a maximum number of runs are reached,
+            see model.utils.convergence. Requires `aggregation`. Defaults to `None`.
+        **scheduling (Scheduling): Estimate the cost of every run from its parameters
+            and a history of timings and dispatch runs longest first, the
+            utilization of the workers is reported by `engine.scheduler`,
+            see model.utils.scheduling. Defaults to `None`.
+        **shared_paths (bool): Whether the market price increments of the QuantLib
+            based models are created once per path set in shared memory that
+            workers attach to, see model.utils.shared_paths. Defaults to `False`.
+        **telemetry (Telemetry): Periodically report blocks per second, completed
+            runs, the timestep of running runs, RSS and the slowest blocks to
+            the log, a progress bar or a Prometheus text file, see
+            model.utils.telemetry. Runs on remote hosts only report once they
+            complete. Defaults to `None`.
+        **digest (StateDigest): Keep a rolling digest of the canonical states of
+            every run with checkpoints in its exception record to compare
+            executions without their state history, see model.utils.digest.
+            Defaults to `None`.
+        **pool: A persistent pool with an imap method that runs are executed in
+            instead of a fresh pool, unless the backend is SINGLE_PROCESS, see
+            model.utils.daemon. Defaults to `None`.
+        **result_callback (Callable): Called with every run result as it completes
+            and returns it, e.g. to stream results. Defaults to `None`.
+        **distributed (Distributed): Execute runs on a dask cluster instead of the
+            backend, with retries of failed tasks, see model.utils.distributed.
+            Defaults to `None`.
     """
+    stop_conditions: List[StopCondition]
+    timing: bool
+    memory_profile: Optional[MemoryProfile]
+    trade_ledger: bool
+    aggregation: Optional[Aggregation]
+    aggregator: Optional[MonteCarloAggregator]
+    reduction: Optional[Reduction]
+    result_cache: Optional[ResultCache]
+    common_random_numbers: bool
+    convergence: Optional[Convergence]
+    convergence_monitor: Optional[ConvergenceMonitor]
+    scheduling: Optional[Scheduling]
+    scheduler: Optional[CostScheduler]
+    distributed: Optional[Distributed]
+    telemetry: Optional[Telemetry]
+    digest: Optional[StateDigest]
+    telemetry_monitor: Optional[TelemetryMonitor]
+    # Final report of the last run with telemetry
+    telemetry_report: Optional[TelemetryReport]
+    pool: Optional[Any]
+    result_callback: Optional[Callable[[Any], Any]]
+    shared_paths: bool
+    path_store: Optional[SharedPathStore]
+
+    def __init__(self, **kwargs):
+        self.stop_conditions = kwargs.pop("stop_conditions", [])
+        self.timing = kwargs.pop("timing", False)
+        self.memory_profile = kwargs.pop("memory_profile", None)
+        self.trade_ledger = kwargs.pop("trade_ledger", False)
+        self.aggregation = kwargs.pop("aggregation", None)
+        self.aggregator = None
+        self.reduction = kwargs.pop("reduction", None)
+        self.result_cache = kwargs.pop("result_cache", None)
+        self.common_random_numbers = kwargs.pop("common_random_numbers", True)
+        self.convergence = kwargs.pop("convergence", None)
+        self.convergence_monitor = None
+        self.scheduling = kwargs.pop("scheduling", None)
+        self.scheduler = None
+        self.distributed = kwargs.pop("distributed", None)
+        self.telemetry = kwargs.pop("telemetry", None)
+        self.digest = kwargs.pop("digest", None)
+        self.telemetry_monitor = None
+        self.telemetry_report = None
+        self.pool = kwargs.pop("pool", None)
+        self.result_callback = kwargs.pop("result_callback", None)
+        self.shared_paths = kwargs.pop("shared_paths", False)
+        self.path_store = None
+        super().__init__(**kwargs)
+
+    def run_hooks(self) -> List[RunHook]:
+        """
+        Returns a fresh set of hooks for a run based on the engine options
+        """
+        # First, so that the run time includes the other hooks
+        hooks = [RunTimeHook()] if self.scheduling else []
+        hooks.append(ImportanceWeightHook())
+        if self.telemetry_monitor:
+            hooks.append(TelemetryHook(
+                self.telemetry_monitor.directory,
+                self.telemetry.interval,
+                self.telemetry.block_timing))
+        if self.timing:
+            hooks.append(TimingHook())
+        if self.memory_profile:
+            hooks.append(MemoryProfileHook(self.memory_profile))
+        if self.trade_ledger:
+            hooks.append(TradeLedgerHook())
+        if self.stop_conditions:
+            hooks.append(StopConditionHook(self.stop_conditions))
+        if self.digest:
+            hooks.append(StateDigestHook(self.digest))
+        # Last, as they drop the history of the run
+        if self.aggregation:
+            hooks.append(AggregationHook(self.aggregation))
+        if self.reduction:
+            hooks.append(ReductionHook(self.reduction))
+        return hooks
+
+    def execute_runs(self, tasks: Iterable[Union[RunExecution, CachedRun]]) -> List[Any]:
+        """
+        Executes the runs on the backend, loads the cached ones, stores
+        new results in the cache and feeds them to the aggregator as they
+        complete. Results are returned in the order of the tasks, or by
+        simulation, run and subset if some were loaded or scheduled.
+        """
+        loaded = []
+
+        def pending():
+            for task in tasks:
+                if isinstance(task, CachedRun):
+                    loaded.append(self.result_cache.load(task))
+                else:
+                    yield task
+
+        results = iterate_tasks(
+            self, partial(execute_run, raise_exceptions=self.raise_exceptions), pending())
+        if self.result_cache:
+            results = chain(map(self.result_cache.store_result, results), loaded)
+        if self.scheduler:
+            results = map(self.scheduler.consume, results)
+        if self.telemetry_monitor:
+            results = map(self.telemetry_monitor.consume, results)
+        if self.convergence_monitor:
+            results = map(self.convergence_monitor.consume, results)
+        if self.aggregator:
+            results = map(self.aggregator.consume, results)
+        if self.result_callback:
+            results = map(self.result_callback, results)
+        results = list(results)
+        if self.scheduler:
+            self.scheduler.save()
+        if loaded or self.scheduler:
+            results.sort(key=lambda result: (
+                result[1]['simulation'], result[1]['run'], result[1]['subset']))
+        return results
+
+    # pylint: disable=too-many-arguments
+    def prepare_run(
+        self,
+        simulation_index: int,
+        timesteps: int,
+        run_index: int,
+        subset_index: int,
+        params: Dict[str, Any],
+        initial_state: Dict[str, Any],
+        state_update_blocks: List[Dict[str, Any]],
+    ) -> Union[RunExecution, CachedRun]:
+        """
+        Prepares the RunExecution of a run, or returns a CachedRun
+        if its result is in the result cache
+        """
+        rng_subset = None if self.common_random_numbers else subset_index
+        key = self.cache_key(
+            params, initial_state, state_update_blocks, run_index, rng_subset, timesteps)
+        if key is not None and key in self.result_cache:
+            return CachedRun(key, simulation_index, run_index, subset_index, params)
+
+        params = copy.deepcopy(params)
+        if self.path_store is not None:
+            params[SHARED_PATHS_PARAM_KEY] = self.path_store
+        config = __prepare_simulation_config__(SimulationConfig(
+            params,
+            initial_state,
+            state_update_blocks,
+            run_index,
+            rng_subset))
+        if self.path_store is not None:
+            Engine._share_market_paths(config.params)
+        run_execution = RunExecution(wrappers.RunArgs(
+            simulation_index,
+            timesteps,
+            run_index,
+            subset_index,
+            copy.deepcopy(config.state),
+            config.state_update_blocks,
+            config.params,
+            self.deepcopy,
+            self.drop_substeps,
+        ), hooks=self.run_hooks())
+        if key is not None:
+            run_execution.record[CACHE_KEY_RECORD_KEY] = key
+        return run_execution
+
+    @staticmethod
+    def _share_market_paths(params: Dict[str, Any]):
+        """
+        Creates the market price generator of a run before it's sent to a
+        worker, so that its increments are published by this process and
+        the worker only receives their handle
+        """
+        # pylint: disable=import-outside-toplevel
+        from model.generators.markets import MarketPriceGenerator
+        if MarketPriceGenerator.generates_paths(params['market_price_model']):
+            params[GENERATOR_CONTAINER_PARAM_KEY].get(MarketPriceGenerator)
+
+    # pylint: disable=too-many-arguments
+    def cache_key(self, params, initial_state, state_update_blocks, run_index, rng_subset,
+                  timesteps) -> Optional[str]:
+        """
+        Key of a run in the result cache, runs aren't cached while timing
+        or profiling memory as their records are measurements
+        """
+        if self.result_cache is None or self.timing or self.memory_profile:
+            return None
+        engine_options = {
+            'drop_substeps': self.drop_substeps,
+            'stop_conditions': self.stop_conditions,
+            'trade_ledger': self.trade_ledger,
+            'aggregation': self.aggregation,
+            'reduction': self.reduction,
+            'digest': self.digest,
+            'rng_subset': rng_subset,
+        }
+        return self.result_cache.key(
+            params, initial_state, state_update_blocks, run_index, timesteps, engine_options)
+
+    def _run(self, executable=None, **kwargs):
+        """
+        Same as radcad.Engine._run, but executes runs with RunExecution
+        """
+        if not executable:
+            raise Exception("Experiment or simulation required as Executable argument")
+        if kwargs:
+            raise Exception(f"Invalid Engine option in {kwargs}")
+        if not isinstance(self.backend, Backend):
+            backends = [backend.name for backend in Backend]
+            raise Exception(f"Execution backend must be one of {backends}")
+        self.executable = executable
+
+        simulations = (
+            executable.simulations
+            if isinstance(executable, wrappers.Experiment)
+            else [executable]
+        )
+        configs = [
+            (
+                sim.model.initial_state,
+                sim.model.state_update_blocks,
+                sim.model.params,
+                sim.timesteps,
+                sim.runs,
+            )
+            for sim in simulations
+        ]
+
+        experiment = executable if isinstance(executable, wrappers.Experiment) else None
+        self.executable._before_experiment(experiment=experiment)
+
+        self.aggregator = MonteCarloAggregator(self.aggregation) if self.aggregation else None
+        self.scheduler = CostScheduler(self.scheduling) if self.scheduling else None
+        self.path_store = SharedPathStore() if self.shared_paths else None
+        self.telemetry_monitor = None
+        if self.telemetry:
+            self.telemetry_monitor = TelemetryMonitor(
+                self.telemetry, None if self.convergence else Engine._count_runs(simulations))
+            self.telemetry_monitor.start()
+        try:
+            if self.convergence:
+                assert self.aggregation, "Convergence requires an aggregation of the metrics"
+                self.convergence_monitor = ConvergenceMonitor(self.convergence, self.aggregation)
+                result = self._run_adaptive(configs)
+            else:
+                self.convergence_monitor = None
+                self._run_generator = (
+                    self._run_scheduled(configs) if self.scheduler else self._run_stream(configs))
+                result = self.execute_runs(self._run_generator)
+        finally:
+            if self.path_store is not None:
+                self.path_store.close()
+                self.path_store = None
+            if self.telemetry_monitor is not None:
+                self.telemetry_report = self.telemetry_monitor.stop()
+                self.telemetry_monitor = None
+
+        self.executable.results, self.executable.exceptions = extract_exceptions(result)
+        self.executable._after_experiment(experiment=experiment)
+        return self.executable.results
+
+    def run_forked(
+        self,
+        simulation: wrappers.Simulation,
+        warmup_timesteps: int,
+        branches: List[Dict[str, Any]],
+    ):
+        """
+        Simulates the first warmup_timesteps of every run once, then forks
+        the state and generators into one branch per entry in branches,
+        each of which overrides some of the parameters for the remaining
+        timesteps. Branches are labelled as subsets in the results and
+        are executed in a pool unless the backend is SINGLE_PROCESS.
+        Run hooks such as stop conditions only apply to the branches.
+
+        Parameters that are only read when generators are created (e.g.
+        `traders` or `market_price_processes`) don't take effect in the
+        branches.
+        """
+        param_sweep = parameter_sweep(simulation.model.params)
+        assert len(param_sweep) == 1, "Forking requires a single parameter subset"
+        assert 0 < warmup_timesteps < simulation.timesteps, \
+            "warmup_timesteps has to be within the simulation timesteps"
+
+        self.executable = simulation
+        tasks = []
+        for run_index in range(0, simulation.runs):
+            config = __prepare_simulation_config__(SimulationConfig(
+                copy.deepcopy(param_sweep[0]),
+                simulation.model.initial_state,
+                simulation.model.state_update_blocks,
+                run_index))
+            warmup = RunExecution(wrappers.RunArgs(
+                simulation.index,
+                warmup_timesteps,
+                run_index,
+                0,
+                copy.deepcopy(config.state),
+                config.state_update_blocks,
+                config.params,
+                self.deepcopy,
+                self.drop_substeps))
+            warmup.execute()
+
+            for subset_index, overrides in enumerate(branches):
+                tasks.append(__fork_run__(
+                    warmup,
+                    subset_index,
+                    overrides,
+                    simulation.model.state_update_blocks,
+                    simulation.timesteps - warmup_timesteps,
+                    self.run_hooks()))
+
+        self.aggregator = MonteCarloAggregator(self.aggregation) if self.aggregation else None
+        self.convergence_monitor = None
+        self.scheduler = None
+        result = self.execute_runs(tasks)
+        simulation.results, simulation.exceptions = extract_exceptions(result)
+        return simulation.results
+
+    def _run_adaptive(self, configs) -> List[Any]:
+        """
+        Executes the runs of every simulation, then batches of further runs
+        for the subsets whose precision targets aren't met in one pool. The
+        baseline subset of paired statistics keeps running as long as any
+        other subset does. The experiment hooks of runs and subsets aren't
+        called.
+        """
+        simulations = [Engine._get_simulation_from_config(config) for config in configs]
+        results = []
+        with batch_pool(self):
+            for simulation_index, simulation in enumerate(simulations):
+                results += self._run_adaptive_simulation(simulation_index, simulation)
+        results.sort(key=lambda result: (
+            result[1]['simulation'], result[1]['run'], result[1]['subset']))
+        return results
+
+    def _run_adaptive_simulation(self, simulation_index, simulation) -> List[Any]:
+        simulation.index = simulation_index
+        params = simulation.model.params
+        param_sweep = parameter_sweep(params) or [params]
+        self.check_random_numbers(params)
+        self.aggregator.expect_subsets(simulation_index, len(param_sweep))
+        baseline_subset = self.aggregation.baseline_subset
+        self.executable._before_simulation(simulation=simulation)
+
+        results = []
+        subsets = list(range(len(param_sweep)))
+        runs = range(simulation.runs)
+        while subsets:
+            results += self.execute_runs(
+                self.prepare_run(
+                    simulation_index,
+                    simulation.timesteps,
+                    run_index,
+                    subset_index,
+                    param_sweep[subset_index],
+                    simulation.model.initial_state,
+                    simulation.model.state_update_blocks)
+                for run_index in runs
+                for subset_index in subsets
+            )
+            if baseline_subset is not None:
+                # runs of subsets that stopped earlier can't be paired anymore
+                self.aggregator.release_pairs(simulation_index)
+            subsets = [
+                subset_index for subset_index in subsets
+                if not self.convergence_monitor.converged(simulation_index, subset_index)
+            ]
+            if baseline_subset is not None and subsets and baseline_subset not in subsets:
+                subsets = sorted(subsets + [baseline_subset])
+            start = runs.stop
+            runs = range(start, min(start + self.convergence.batch_size,
+                                    self.convergence.max_runs))
+            if not runs:
+                break
+
+        self.executable._after_simulation(simulation=simulation)
+        return results
+
+    def check_random_numbers(self, params: Dict[str, Any]):
+        """
+        Warns if subsets that are compared with the baseline subset
+        draw the independent streams of different seeds
+        """
+        if (
+            self.common_random_numbers
+            and self.aggregation
+            and self.aggregation.baseline_subset is not None
+            and 'rng_seed' in swept_parameters(params)
+        ):
+            logging.warning(
+                "Subsets with different rng_seeds draw independent streams, "
+                "their paired differences to the baseline subset aren't reduced "
+                "by common random numbers")
+
+    @staticmethod
+    def _count_runs(simulations: List[wrappers.Simulation]) -> int:
+        return sum(
+            simulation.runs * max(len(parameter_sweep(simulation.model.params)), 1)
+            for simulation in simulations
+        )
+
+    def _run_scheduled(self, configs):
+        """
+        Yields the runs of all simulations in decreasing order of their
+        estimated cost. The experiment hooks of runs and subsets aren't called.
+        """
+        simulations = [Engine._get_simulation_from_config(config) for config in configs]
+        param_sweeps = []
+        tasks = []
+        for simulation_index, simulation in enumerate(simulations):
+            simulation.index = simulation_index
+            params = simulation.model.params
+            param_sweep = parameter_sweep(params) or [params]
+            self.check_random_numbers(params)
+            if self.aggregation:
+                self.aggregator.expect_subsets(simulation_index, len(param_sweep))
+            param_sweeps.append(param_sweep)
+            for subset_index, param_set in enumerate(param_sweep):
+                cost = self.scheduler.estimate(param_set, simulation.timesteps)
+                tasks += [
+                    (-cost, simulation_index, run_index, subset_index)
+                    for run_index in range(simulation.runs)
+                ]
+        # Ties keep the order of the stream
+        tasks.sort()
+
+        for simulation in simulations:
+            self.executable._before_simulation(simulation=simulation)
+        for _cost, simulation_index, run_index, subset_index in tasks:
+            simulation = simulations[simulation_index]
+            yield self.prepare_run(
+                simulation_index,
+                simulation.timesteps,
+                run_index,
+                subset_index,
+                param_sweeps[simulation_index][subset_index],
+                simulation.model.initial_state,
+                simulation.model.state_update_blocks)
+        for simulation in simulations:
+            self.executable._after_simulation(simulation=simulation)
 
     def _run_stream(self, configs):
         simulations = [Engine._get_simulation_from_config(config) for config in configs]
@@ -37,7 +570,10 @@ class Engine(RadCadEngine):
             initial_state = simulation.model.initial_state
             state_update_blocks = simulation.model.state_update_blocks
             params = simulation.model.params
-            param_sweep = core.generate_parameter_sweep(params)
+            param_sweep = parameter_sweep(params)
+            self.check_random_numbers(params)
+            if self.aggregation:
+                self.aggregator.expect_subsets(simulation_index, max(len(param_sweep), 1))
 
             self.executable._before_simulation(
                 simulation=simulation
@@ -65,21 +601,14 @@ class Engine(RadCadEngine):
                             params
                         )
                         self.executable._before_subset(context=context)
-                        config = __prepare_simulation_config__(SimulationConfig(
-                                param_set,
-                                initial_state,
-                                state_update_blocks,
-                                run_index))
-                        yield wrappers.RunArgs(
+                        yield self.prepare_run(
                             simulation_index,
                             timesteps,
                             run_index,
                             subset_index,
-                            copy.deepcopy(config.state),
-                            config.state_update_blocks,
-                            config.params,
-                            self.deepcopy,
-                            self.drop_substeps)
+                            param_set,
+                            initial_state,
+                            state_update_blocks)
                         self.executable._after_subset(context=context)
                     self.executable._after_run(context=context)
                 else:
@@ -93,23 +622,14 @@ class Engine(RadCadEngine):
                     self.executable._before_run(context=context)
                     self.executable._before_subset(context=context)
 
-                    config = __prepare_simulation_config__(SimulationConfig(
-                            param_set,
-                            initial_state,
-                            state_update_blocks,
-                            run_index))
-
-                    yield wrappers.RunArgs(
+                    yield self.prepare_run(
                         simulation_index,
                         timesteps,
                         run_index,
                         0,
-                        copy.deepcopy(config.state),
-                        config.state_update_blocks,
-                        config.params,
-                        self.deepcopy,
-                        self.drop_substeps,
-                    )
+                        params,
+                        initial_state,
+                        state_update_blocks)
                     self.executable._after_subset(context=context)
                     self.executable._after_run(context=context)
 
@@ -117,9 +637,49 @@ class Engine(RadCadEngine):
                 simulation=simulation
             )
 
+def __fork_run__(
+    warmup: RunExecution,
+    subset_index: int,
+    overrides: Dict[str, Any],
+    state_update_blocks: List[Any],
+    timesteps: int,
+    hooks: List[RunHook],
+) -> RunExecution:
+    """
+    Creates a RunExecution which continues the warm-up with a copy of its
+    generators updated to the overridden params
+    """
+    fork_params = copy.deepcopy(warmup.run_args.parameters)
+    container = fork_params[GENERATOR_CONTAINER_PARAM_KEY]
+    for key, value in overrides.items():
+        fork_params[key] = value
+        container.params[key] = value
+    for generator in container.generators.values():
+        generator.update_parameters(fork_params)
+
+    config = __hydrate_state_update_blocks__(SimulationConfig(
+        fork_params,
+        warmup.initial_state,
+        state_update_blocks,
+        warmup.run_args.run))
+    history = [
+        [{**state, 'subset': subset_index} for state in substeps]
+        for substeps in warmup.result
+    ]
+    return RunExecution(wrappers.RunArgs(
+        warmup.run_args.simulation,
+        timesteps,
+        warmup.run_args.run,
+        subset_index,
+        history[0][0],
+        config.state_update_blocks,
+        config.params,
+        warmup.run_args.deepcopy,
+        warmup.run_args.drop_substeps), history=history, hooks=hooks)
+
 def __inject_rng_provider__(config: SimulationConfig):
     config.params.update({
-        'rngp': RNGProvider(config.params['rng_seed'], config.run_index)
+        'rngp': RNGProvider(config.params['rng_seed'], config.run_index, config.subset_index)
     })
     return config
 
@@ -147,7 +707,8 @@ def __hydrate_state_update_blocks__(config: SimulationConfig):
         config.params,
         config.state,
         flat_state_update_blocks,
-        config.run_index
+        config.run_index,
+        config.subset_index
     )
 
 SimulationConfigModifier = Callable[[SimulationConfig], SimulationConfig]
@@ -0,0 +1,283 @@
+"""
+Run execution for the custom Engine
+
+radcad.core._single_run always starts a run from timestep zero and
+keeps its loop private. RunExecution mirrors its behaviour but is
+able to resume a run from an existing state history and can be
+extended with RunHooks, and execute_tasks dispatches work to the
+same backends radcad uses or to a dask cluster.
+"""
+import logging
+import multiprocessing
+import pickle
+import traceback
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from radcad import core, wrappers
+from radcad.backends import Backend
+
+from .distributed import iterate_distributed
+from .generator_container import GENERATOR_CONTAINER_PARAM_KEY
+
+# Parameters holding the generators and random numbers of a run, which
+# make up almost all of the size of its record
+RUN_STATE_PARAM_KEYS = (GENERATOR_CONTAINER_PARAM_KEY, 'rngp')
+
+
+# pylint: disable=no-self-use
+class RunHook():
+    """
+    Base class for extensions of a RunExecution. Hooks are copied
+    for every run, so they can keep per-run state, and can report
+    back by writing to run_execution.record.
+    """
+
+    def before_run(self, _run_execution: "RunExecution"):
+        pass
+
+    def after_step(self, _run_execution: "RunExecution"):
+        pass
+
+    def after_run(self, _run_execution: "RunExecution"):
+        pass
+
+
+class RunExecution():
+    """
+    Executes the timesteps of a single (simulation, run, subset)
+    """
+    run_args: wrappers.RunArgs
+    result: List[List[dict]]
+    initial_state: dict
+    hooks: List[RunHook]
+    # Returned with the exception record of the run
+    record: Dict[str, Any]
+    # Whether the record leaves out the RUN_STATE_PARAM_KEYS parameters
+    compact_record: bool
+    stopped: bool
+
+    def __init__(
+        self,
+        run_args: wrappers.RunArgs,
+        history: Optional[List[List[dict]]] = None,
+        hooks: Optional[List[RunHook]] = None,
+    ):
+        self.run_args = run_args
+        self.hooks = hooks or []
+        self.record = {}
+        self.compact_record = False
+        self.stopped = False
+        if history is None:
+            self.initial_state = run_args.initial_state
+            self.result = []
+        else:
+            self.initial_state = history[0][0]
+            self.result = history
+
+    def execute(self) -> List[List[dict]]:
+        """
+        Executes the run and returns the (partial) result
+        """
+        run_args = self.run_args
+        logging.info(
+            "Starting simulation %s / run %s / subset %s",
+            run_args.simulation, run_args.run, run_args.subset
+        )
+        if not self.result:
+            self.initialise_state()
+        for hook in self.hooks:
+            hook.before_run(self)
+
+        for _ in range(0, run_args.timesteps):
+            self.step()
+            for hook in self.hooks:
+                hook.after_step(self)
+            if self.stopped:
+                break
+
+        for hook in self.hooks:
+            hook.after_run(self)
+        return self.result
+
+    @property
+    def state(self) -> dict:
+        """
+        The state at the end of the latest timestep
+        """
+        return self.result[-1][-1]
+
+    def stop(self, reason: str):
+        """
+        Ends the run after the current timestep
+        """
+        logging.info(
+            "Stopping simulation %s / run %s / subset %s at timestep %s: %s",
+            self.run_args.simulation, self.run_args.run, self.run_args.subset,
+            self.state["timestep"], reason
+        )
+        self.stopped = True
+        self.record["stop_timestep"] = self.state["timestep"]
+        self.record["stop_reason"] = reason
+
+    def initialise_state(self):
+        initial_state = self.initial_state
+        initial_state["simulation"] = self.run_args.simulation
+        initial_state["subset"] = self.run_args.subset
+        initial_state["run"] = self.run_args.run + 1
+        initial_state["substep"] = 0
+        if not initial_state.get("timestep", False):
+            initial_state["timestep"] = 0
+        self.result.append([initial_state])
+
+    def step(self):
+        """
+        Executes all state update blocks for the next timestep
+        """
+        run_args = self.run_args
+        previous_state = self.result[-1][-1].copy()
+        # Resumed runs continue in the subset they were resumed in
+        previous_state["subset"] = run_args.subset
+
+        substeps = []
+        substate = previous_state
+        for (substep, psu) in enumerate(run_args.state_update_blocks):
+            substate = (
+                previous_state.copy() if substep == 0 else substeps[substep - 1].copy()
+            )
+            substate_copy = (
+                pickle.loads(pickle.dumps(substate, -1))
+                if run_args.deepcopy else substate.copy()
+            )
+            substate["substep"] = substep + 1
+
+            signals = core.reduce_signals(
+                run_args.parameters, substep, self.result, substate_copy, psu, run_args.deepcopy
+            )
+            updated_state = map(
+                partial(
+                    core._update_state,  # pylint: disable=protected-access
+                    self.initial_state,
+                    run_args.parameters,
+                    substep,
+                    self.result,
+                    substate_copy,
+                    signals
+                ),
+                psu["variables"].items()
+            )
+            substate.update(updated_state)
+            substate["timestep"] = previous_state["timestep"] + 1
+            substeps.append(substate)
+
+        substeps = substeps or [substate]
+        self.result.append(substeps if not run_args.drop_substeps else [substeps.pop()])
+
+
+def compact_parameters(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in parameters.items() if key not in RUN_STATE_PARAM_KEYS}
+
+
+def execute_run(run_execution: RunExecution, raise_exceptions: bool):
+    """
+    Executes a run and returns the result together with the exception
+    record in the same shape as radcad.core._single_run_wrapper
+    """
+    run_args = run_execution.run_args
+    exception, trace = None, None
+    try:
+        run_execution.execute()
+    except Exception as error:  # pylint: disable=broad-except
+        if raise_exceptions:
+            raise error
+        exception, trace = error, traceback.format_exc()
+        logging.warning(
+            "Simulation %s / run %s / subset %s failed! Returning partial results.",
+            run_args.simulation, run_args.run, run_args.subset
+        )
+    return run_execution.result, {
+        **run_execution.record,
+        'exception': exception,
+        'traceback': trace,
+        'simulation': run_args.simulation,
+        'run': run_args.run,
+        'subset': run_args.subset,
+        'timesteps': run_args.timesteps,
+        'parameters': (
+            compact_parameters(run_args.parameters)
+            if run_execution.compact_record else run_args.parameters
+        ),
+        'initial_state': run_execution.initial_state,
+    }
+
+
+def execute_tasks(engine, function: Callable[[Any], Any], tasks: Iterable[Any]) -> List[Any]:
+    """
+    Maps function over tasks using the execution backend of the engine
+    """
+    return list(iterate_tasks(engine, function, tasks))
+
+
+@contextmanager
+def batch_pool(engine):
+    """
+    Keeps one local pool for several calls of iterate_tasks, unless the
+    engine has a persistent pool already or doesn't execute in a pool
+    """
+    local_backends = [Backend.PATHOS, Backend.DEFAULT, Backend.MULTIPROCESSING]
+    if (
+        getattr(engine, 'pool', None) is not None
+        or getattr(engine, 'distributed', None) is not None
+        or engine.backend not in local_backends
+    ):
+        yield
+        return
+    if engine.backend == Backend.MULTIPROCESSING:
+        pool = multiprocessing.get_context("spawn").Pool(processes=engine.processes)
+    else:
+        # pylint: disable=import-outside-toplevel
+        from pathos.multiprocessing import ProcessPool
+        pool = ProcessPool(engine.processes)
+    engine.pool = pool
+    try:
+        yield
+    finally:
+        engine.pool = None
+        pool.close()
+        pool.join()
+        if hasattr(pool, 'clear'):
+            pool.clear()
+
+
+def iterate_tasks(engine, function: Callable[[Any], Any], tasks: Iterable[Any]) -> Iterator[Any]:
+    """
+    Maps function over tasks using the execution backend of the engine
+    and yields the results in order as soon as they are available.
+    Engines with a distributed option run the tasks on a dask cluster,
+    engines with a persistent pool run them in the pool.
+    """
+    distributed = getattr(engine, 'distributed', None)
+    pool = getattr(engine, 'pool', None)
+    if distributed is not None:
+        yield from iterate_distributed(distributed, engine.processes, function, tasks)
+    elif engine.backend == Backend.SINGLE_PROCESS:
+        yield from map(function, tasks)
+    elif pool is not None:
+        yield from pool.imap(function, tasks)
+    elif engine.backend in [Backend.PATHOS, Backend.DEFAULT]:
+        # pylint: disable=import-outside-toplevel
+        from pathos.multiprocessing import ProcessPool
+        with ProcessPool(engine.processes) as pool:
+            yield from pool.imap(function, tasks)
+            pool.close()
+            pool.join()
+            pool.clear()
+    elif engine.backend == Backend.MULTIPROCESSING:
+        with multiprocessing.get_context("spawn").Pool(processes=engine.processes) as pool:
+            yield from pool.imap(function, tasks)
+            pool.close()
+            pool.join()
+    else:
+        raise NotImplementedError(
+            f"Backend {engine.backend} is not supported by model.utils.engine")
@@ -0,0 +1,117 @@
+"""
+Stable fingerprints of parameters, states, data and model code
+
+canonical() converts nested simulation objects (dicts keyed by enums,
+NamedTuples, Balances, classes, NumPy arrays) into plain JSON data
+that doesn't depend on memory addresses or dict ordering, so that
+fingerprint() of equal objects is equal across processes.
+"""
+import hashlib
+import json
+from enum import Enum
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+MODEL_FOLDER = Path(__file__, "../..").resolve()
+# Modules outside the model package that shape runs, e.g. the number of
+# blocks that market price paths are generated for
+CONFIGURATION_FILES = [Path(MODEL_FOLDER, "../experiments/simulation_configuration.py").resolve()]
+
+
+def canonical(obj: Any, floats: Callable[[float], Any] = repr) -> Any:
+    """
+    Converts obj into JSON serializable data that identifies its content,
+    floats are converted with `floats`
+    """
+    # pylint: disable=too-many-return-statements
+    recurse = partial(canonical, floats=floats)
+    if obj is None or isinstance(obj, (bool, int, str)):
+        return obj
+    if isinstance(obj, float):
+        return floats(obj)
+    if isinstance(obj, Enum):
+        return f"{type(obj).__qualname__}.{obj.name}"
+    if isinstance(obj, np.generic):
+        return recurse(obj.item())
+    if isinstance(obj, np.ndarray):
+        return {
+            'ndarray': str(obj.dtype),
+            'shape': list(obj.shape),
+            'sha256': hashlib.sha256(np.ascontiguousarray(obj).tobytes()).hexdigest(),
+        }
+    if isinstance(obj, partial):
+        return {
+            'partial': recurse(obj.func),
+            'args': recurse(obj.args),
+            'keywords': recurse(obj.keywords),
+        }
+    if isinstance(obj, type) or (callable(obj) and hasattr(obj, '__qualname__')):
+        return f"{getattr(obj, '__module__', '')}.{obj.__qualname__}"
+    if isinstance(obj, tuple) and hasattr(obj, '_fields'):
+        return {
+            'type': type(obj).__qualname__,
+            'fields': {field: recurse(value) for field, value in zip(obj._fields, obj)},
+        }
+    if isinstance(obj, dict):
+        items = [(recurse(key), recurse(value)) for key, value in obj.items()]
+        return sorted(items, key=lambda item: json.dumps(item[0], sort_keys=True))
+    if isinstance(obj, (list, tuple)):
+        return [recurse(value) for value in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted((recurse(value) for value in obj), key=json.dumps)
+    if hasattr(obj, '__dict__'):
+        return {'type': type(obj).__qualname__, 'state': recurse(vars(obj))}
+    return repr(obj)
+
+
+def fingerprint(obj: Any) -> str:
+    """
+    sha256 of the canonical form of obj
+    """
+    serialized = json.dumps(canonical(obj), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint() -> str:
+    """
+    sha256 of the source code of the model package and the simulation
+    configuration, and of the versions of the libraries that determine
+    its random streams
+    """
+    # pylint: disable=import-outside-toplevel
+    import radcad
+    sha = hashlib.sha256()
+    for path in sorted(MODEL_FOLDER.rglob("*.py")):
+        sha.update(str(path.relative_to(MODEL_FOLDER)).encode())
+        sha.update(path.read_bytes())
+    for path in CONFIGURATION_FILES:
+        sha.update(path.name.encode())
+        sha.update(path.read_bytes())
+    sha.update(f"radcad {radcad.__version__} numpy {np.__version__}".encode())
+    return sha.hexdigest()
+
+
+def data_fingerprint() -> str:
+    """
+    sha256 of the configured data source and the file it's read from
+    """
+    # pylint: disable=import-outside-toplevel
+    from experiments import simulation_configuration
+    from model.utils.data_feed import DATA_FOLDER
+    return _data_fingerprint(DATA_FOLDER, simulation_configuration.DATA_SOURCE)
+
+
+@lru_cache(maxsize=None)
+def _data_fingerprint(data_folder: Path, data_source: str) -> str:
+    # pylint: disable=import-outside-toplevel
+    from model.utils.data_feed import HISTORICAL_DATA_FILE_NAME, MOCK_DATA_FILE_NAME
+    file_name = MOCK_DATA_FILE_NAME if data_source == 'mock' else HISTORICAL_DATA_FILE_NAME
+    sha = hashlib.sha256(data_source.encode())
+    path = Path(data_folder, file_name)
+    if path.exists():
+        sha.update(path.read_bytes())
+    return sha.hexdigest()
@@ -35,6 +35,14 @@ class Generator(ABC):
     def from_parameters(cls, _params, _initial_state, _container) -> "Generator":
         pass
 
+    def update_parameters(self, _params):
+        """
+        Called when the parameters of a running simulation change,
+        e.g. when a simulation is forked from a shared warm-up.
+        Generators that keep a copy of their parameters should
+        refresh it here.
+        """
+
     def state_update_blocks(self, selectors: List[str]):
         """
         Either inject all state update blocks for a generator or
@@ -0,0 +1,114 @@
+"""
+Importance sampling of rare market events
+
+With the importance_sampling parameter set, the standard normal
+increments driving the market price processes are shifted towards the
+event of interest, e.g. a falling CELO price for reserve shortfalls.
+Every run is weighted by the likelihood ratio of its increments under
+the untilted and the tilted distribution up to the timestep it ended,
+which the engine adds to the exception record of the run.
+event_probability() turns the weights into unbiased estimates of the
+probability of an event under the untilted model:
+
+params['importance_sampling'] = [ImportanceSamplingConfig(
+    shift={Pair(CryptoAsset.CELO, Fiat.USD): -0.02}
+)]
+...
+event_probability(df, exceptions, lambda run: (run['reserve_ratio'] < 1).any())
+"""
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .execution import RunExecution, RunHook
+from .generator_container import GENERATOR_CONTAINER_PARAM_KEY
+
+WEIGHT_RECORD_KEY = 'log_weight'
+# Name the generator container keeps the MarketPriceGenerator of a run
+# under, so that this module doesn't import the generators
+MARKET_PRICE_GENERATOR = 'MarketPriceGenerator'
+
+
+def tilt(normals: np.ndarray, shift: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Shifts the standard normal increments with shape (steps, processes) by
+    shift and returns them with the cumulative log likelihood ratio of
+    the untilted to the tilted distribution, where entry t covers the
+    first t steps
+    """
+    shift = np.asarray(shift, dtype=float)
+    tilted = normals + shift
+    log_ratios = shift @ shift / 2 - tilted @ shift
+    return tilted, np.concatenate([[0.0], np.cumsum(log_ratios)])
+
+
+class ImportanceWeightHook(RunHook):
+    """
+    Adds the log likelihood ratio of the market increments used by the
+    run to its record when they're tilted
+    """
+
+    def after_run(self, run_execution: RunExecution):
+        container = run_execution.run_args.parameters.get(GENERATOR_CONTAINER_PARAM_KEY)
+        if container is None or MARKET_PRICE_GENERATOR not in container.generators:
+            return
+        log_weights = container.generators[MARKET_PRICE_GENERATOR].log_weights
+        if log_weights is not None:
+            # timestep t moves prices by the increments of step t - 1
+            timestep = min(run_execution.state['timestep'], len(log_weights) - 1)
+            run_execution.record[WEIGHT_RECORD_KEY] = float(log_weights[timestep])
+
+
+def event_probability(
+    df: pd.DataFrame,
+    exceptions: List[Dict[str, Any]],
+    event: Callable[[pd.DataFrame], bool],
+) -> pd.DataFrame:
+    """
+    Estimates the probability of an event per simulation and subset from the
+    results and exceptions of an executed simulation or experiment. event is
+    called with the states of every run. Runs without a weight count as
+    untilted. Returns the number of runs and events, the estimate with its
+    standard error and 95% confidence interval, and the effective sample
+    size of the weights.
+    """
+    log_weights = {
+        (record['simulation'], record['subset'], record['run'] + 1):
+            record.get(WEIGHT_RECORD_KEY, 0.0)
+        for record in exceptions
+    }
+    rows = []
+    for (simulation, subset), runs in df.groupby(['simulation', 'subset']):
+        hits, weights = [], []
+        for run, states in runs.groupby('run'):
+            hits.append(bool(event(states)))
+            weights.append(log_weights.get((simulation, subset, run), 0.0))
+        rows.append({
+            'simulation': simulation,
+            'subset': subset,
+            **weighted_estimate(hits, weights),
+        })
+    return pd.DataFrame(rows)
+
+
+def weighted_estimate(hits: Sequence[bool], log_weights: Sequence[float]) -> Dict[str, Any]:
+    """
+    Estimates the probability of an event from whether it happened in
+    each run and the log likelihood ratios of the runs
+    """
+    with np.errstate(under='ignore'):
+        hits, weights = np.array(hits), np.exp(log_weights)
+    estimates = weights * hits
+    count = len(estimates)
+    stderr = estimates.std(ddof=1) / np.sqrt(count) if count > 1 else np.nan
+    probability = estimates.mean()
+    return {
+        'runs': count,
+        'events': int(hits.sum()),
+        'probability': probability,
+        'stderr': stderr,
+        'ci_low': max(probability - 1.96 * stderr, 0.0),
+        'ci_high': probability + 1.96 * stderr,
+        'effective_sample_size': weights.sum() ** 2 / (weights ** 2).sum(),
+    }
@@ -0,0 +1,247 @@
+"""
+Memory profiling for simulation runs
+
+With Engine(memory_profile=MemoryProfile(interval=1000)) every run samples
+its RSS and tracemalloc counters every `interval` timesteps and attributes
+memory to the state history (per state variable) and to the generators.
+The per-run reports end up in the exception records of the runs and can
+be written to a JSON report with write_memory_report().
+"""
+import json
+import sys
+import tracemalloc
+from enum import Enum
+from pathlib import Path
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from .execution import RunExecution, RunHook
+from .generator_container import GENERATOR_CONTAINER_PARAM_KEY
+
+MEMORY_RECORD_KEY = 'memory'
+# Shared singletons and code aren't attributed to the objects referencing them
+UNTRACKED_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType, Enum)
+
+
+class MemoryProfile(NamedTuple):
+    # Number of timesteps between samples
+    interval: int = 1000
+    # Whether to trace allocations with tracemalloc, which slows down the run
+    tracemalloc: bool = True
+    # Number of allocation sites in the report
+    top: int = 10
+
+
+def deep_sizeof(obj: Any, seen: Set[int]) -> int:
+    """
+    Approximates the memory held by obj and everything it references,
+    objects whose id is in seen are skipped and seen is updated
+    """
+    size = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, UNTRACKED_TYPES):
+            continue
+        seen.add(id(current))
+        if isinstance(current, np.ndarray):
+            size += sys.getsizeof(current) + (current.nbytes if current.base is None else 0)
+            continue
+        size += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        if hasattr(current, '__dict__'):
+            stack.append(current.__dict__)
+        for slot in getattr(type(current), '__slots__', ()):
+            if hasattr(current, slot):
+                stack.append(getattr(current, slot))
+    return size
+
+
+def current_rss() -> Optional[int]:
+    """
+    Resident set size of the process in bytes where /proc is available
+    """
+    try:
+        with open('/proc/self/statm', encoding='utf-8') as statm:
+            return int(statm.read().split()[1]) * _page_size()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _page_size() -> int:
+    # pylint: disable=import-outside-toplevel
+    import resource
+    return resource.getpagesize()
+
+
+class MemoryProfileHook(RunHook):
+    """
+    Samples the memory footprint of a run
+    """
+    profile: MemoryProfile
+    samples: List[Dict[str, Any]]
+    # Bytes held by the state history per state variable
+    history_sizes: Dict[str, int]
+    history_seen: Set[int]
+    accounted_timesteps: int
+
+    def __init__(self, profile: MemoryProfile):
+        self.profile = profile
+        self.samples = []
+        self.history_sizes = {}
+        self.history_seen = set()
+        self.accounted_timesteps = 0
+        self.started_tracemalloc = False
+
+    def before_run(self, run_execution: RunExecution):
+        if self.profile.tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        self.sample(run_execution)
+
+    def after_step(self, run_execution: RunExecution):
+        if run_execution.state['timestep'] % self.profile.interval == 0:
+            self.sample(run_execution)
+
+    def after_run(self, run_execution: RunExecution):
+        if self.samples[-1]['timestep'] != run_execution.state['timestep']:
+            self.sample(run_execution)
+
+        top_allocations = []
+        if tracemalloc.is_tracing():
+            statistics = tracemalloc.take_snapshot().statistics('lineno')
+            top_allocations = [
+                {
+                    'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    'size': stat.size,
+                    'count': stat.count,
+                }
+                for stat in statistics[:self.profile.top]
+            ]
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+
+        run_execution.record[MEMORY_RECORD_KEY] = {
+            'samples': self.samples,
+            'peak_rss': max_or_none(sample['rss'] for sample in self.samples),
+            'peak_traced': max_or_none(sample['traced_peak'] for sample in self.samples),
+            'growth_per_timestep': self.growth_per_timestep(),
+            'top_allocations': top_allocations,
+        }
+
+    def sample(self, run_execution: RunExecution):
+        self.account_history(run_execution.result)
+        traced_current, traced_peak = (
+            tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (None, None)
+        )
+        container = run_execution.run_args.parameters.get(GENERATOR_CONTAINER_PARAM_KEY)
+        self.samples.append({
+            'timestep': run_execution.state['timestep'],
+            'rss': current_rss(),
+            'traced_current': traced_current,
+            'traced_peak': traced_peak,
+            'history_rows': len(run_execution.result),
+            'history': dict(self.history_sizes),
+            'generators': generator_sizes(container) if container else {},
+        })
+
+    def account_history(self, result: List[List[dict]]):
+        """
+        Adds the state rows appended since the last sample to the
+        per state variable sizes, values shared between rows count once
+        """
+        for substeps in result[self.accounted_timesteps:]:
+            for state in substeps:
+                self.history_sizes['rows'] = (
+                    self.history_sizes.get('rows', 0) + sys.getsizeof(state)
+                )
+                for key, value in state.items():
+                    self.history_sizes[key] = (
+                        self.history_sizes.get(key, 0) + deep_sizeof(value, self.history_seen)
+                    )
+        self.accounted_timesteps = len(result)
+
+    def growth_per_timestep(self) -> Optional[float]:
+        """
+        Slope of the sampled memory over timesteps in bytes
+        """
+        key = 'traced_current' if self.samples[0]['traced_current'] is not None else 'rss'
+        points = [
+            (sample['timestep'], sample[key])
+            for sample in self.samples if sample[key] is not None
+        ]
+        if len(points) < 2:
+            return None
+        timesteps, values = zip(*points)
+        return float(np.polyfit(timesteps, values, 1)[0])
+
+
+def generator_sizes(container) -> Dict[str, int]:
+    """
+    Size of each generator without the container or the other generators
+    it references
+    """
+    shared = {id(container), id(container.params)}
+    shared.update(id(generator) for generator in container.generators.values())
+    return {
+        name: deep_sizeof(generator.__dict__, set(shared))
+        for name, generator in container.generators.items()
+    }
+
+
+def max_or_none(values) -> Optional[float]:
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def memory_table(exceptions: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Returns the memory samples of every run in the exceptions of an executed
+    simulation or experiment, one column per state variable and generator
+    """
+    return pd.DataFrame([
+        {
+            'simulation': record['simulation'],
+            'subset': record['subset'],
+            'run': record['run'] + 1,
+            **{key: value for key, value in sample.items() if key not in ('history', 'generators')},
+            **{f"history.{key}": value for key, value in sample['history'].items()},
+            **{f"generator.{key}": value for key, value in sample['generators'].items()},
+        }
+        for record in exceptions
+        for sample in record.get(MEMORY_RECORD_KEY, {}).get('samples', [])
+    ])
+
+
+def write_memory_report(exceptions: List[Dict[str, Any]], path) -> Path:
+    """
+    Writes peak, growth rate, latest footprint and top allocation
+    sites of every run to a JSON file
+    """
+    report = [
+        {
+            'simulation': record['simulation'],
+            'subset': record['subset'],
+            'run': record['run'] + 1,
+            'peak_rss': memory['peak_rss'],
+            'peak_traced': memory['peak_traced'],
+            'growth_per_timestep': memory['growth_per_timestep'],
+            'history': memory['samples'][-1]['history'],
+            'generators': memory['samples'][-1]['generators'],
+            'top_allocations': memory['top_allocations'],
+        }
+        for record in exceptions
+        for memory in [record.get(MEMORY_RECORD_KEY)]
+        if memory
+    ]
+    path = Path(path)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, default=str)
+    return path
@@ -0,0 +1,100 @@
+"""
+Variance reduced Gaussian increments for market price paths
+
+The MarketPriceModel.ANTITHETIC and MarketPriceModel.SOBOL models drive
+the QuantLib processes with standard normal increments of shape
+(steps, processes) generated here instead of QuantLib's pseudo-random
+sequence:
+
+- antithetic: runs 2k and 2k + 1 share one draw with opposite signs
+- sobol: run r takes point r of a scrambled Sobol sequence for the first
+  QMC_DIMENSIONS Brownian bridge coordinates of every process and pads
+  the finer bridge levels with pseudo-random numbers
+
+Draws are generated in bulk and cached per process, each run takes its
+share by run index.
+"""
+from functools import lru_cache
+
+import numpy as np
+from scipy.special import ndtri
+from scipy.stats import qmc
+
+from model.utils.rng_provider import RNGProvider
+
+# Bridge coordinates per process taken from the Sobol point of a run
+QMC_DIMENSIONS = 64
+# Number of runs whose Sobol points are generated at once, a power of 2
+QMC_BLOCK_SIZE = 256
+
+
+def brownian_bridge(normals: np.ndarray) -> np.ndarray:
+    """
+    Converts standard normals in Brownian bridge order into the standard
+    normal increments of the path in time order. The first normal sets the
+    end of the path and every following level bisects the intervals, so
+    the leading normals determine the coarse shape of the path.
+    """
+    steps = len(normals)
+    path = np.zeros((steps + 1,) + normals.shape[1:])
+    path[steps] = np.sqrt(steps) * normals[0]
+    used = 1
+    intervals = np.array([[0, steps]])
+    while len(intervals):
+        intervals = intervals[intervals[:, 1] - intervals[:, 0] > 1]
+        left, right = intervals[:, 0], intervals[:, 1]
+        middle = (left + right) // 2
+        width = right - left
+        # broadcasts the per interval weights over the processes
+        shape = (-1,) + (1,) * (normals.ndim - 1)
+        path[middle] = (
+            ((right - middle) / width).reshape(shape) * path[left]
+            + ((middle - left) / width).reshape(shape) * path[right]
+            + np.sqrt((middle - left) * (right - middle) / width).reshape(shape)
+            * normals[used:used + len(middle)]
+        )
+        used += len(middle)
+        intervals = np.concatenate([
+            np.stack([left, middle], axis=1),
+            np.stack([middle, right], axis=1),
+        ])
+    return np.diff(path, axis=0)
+
+
+def antithetic_normals(rngp: RNGProvider, steps: int, processes: int) -> np.ndarray:
+    sign = 1 if rngp.monte_carlo_run % 2 == 0 else -1
+    return sign * _pair_normals(
+        rngp.seed, rngp.monte_carlo_run // 2, rngp.subset, steps, processes)
+
+
+@lru_cache(maxsize=2)
+def _pair_normals(seed, pair, subset, steps, processes) -> np.ndarray:
+    rng = RNGProvider(seed, pair, subset).get_rng("MarketPriceGenerator", "antithetic")
+    normals = rng.standard_normal((steps, processes))
+    normals.flags.writeable = False
+    return normals
+
+
+def sobol_normals(rngp: RNGProvider, steps: int, processes: int) -> np.ndarray:
+    run = rngp.monte_carlo_run
+    coarse = min(QMC_DIMENSIONS, steps)
+    block = _sobol_block(rngp.seed, rngp.subset, coarse * processes, run // QMC_BLOCK_SIZE)
+    rng = rngp.get_rng("MarketPriceGenerator", "sobol_padding")
+    bridge = np.concatenate([
+        block[run % QMC_BLOCK_SIZE].reshape(coarse, processes),
+        rng.standard_normal((steps - coarse, processes)),
+    ])
+    return brownian_bridge(bridge)
+
+
+@lru_cache(maxsize=2)
+def _sobol_block(seed, subset, dimensions, block) -> np.ndarray:
+    # the scrambling is shared by all runs so that their points stay a Sobol sequence
+    sampler = qmc.Sobol(dimensions, seed=np.random.default_rng(np.random.SeedSequence(
+        seed, spawn_key=() if subset is None else (subset,))))
+    if block:
+        sampler.fast_forward(block * QMC_BLOCK_SIZE)
+    uniforms = sampler.random(QMC_BLOCK_SIZE)
+    normals = ndtri(np.clip(uniforms, 1e-12, 1 - 1e-12))
+    normals.flags.writeable = False
+    return normals
@@ -0,0 +1,203 @@
+"""
+Timing instrumentation for simulation runs
+
+With Engine(timing=True) every hydrated policy and state update
+function, including the ones provided by generators, is wrapped
+with a timer and a call counter. The per-run tables end up in the
+exception records of the runs and can be exported with
+write_timing_report() as CSV and as a speedscope profile
+(https://www.speedscope.app).
+"""
+import functools
+import json
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from .execution import RunExecution, RunHook
+
+TIMING_RECORD_KEY = 'timing'
+TIMESTEP_OVERHEAD = 'timestep overhead'
+
+
+def timed(function: Callable, stats: List[float]) -> Callable:
+    """
+    Wraps a function to count its calls and accumulate its duration in stats
+    """
+    @functools.wraps(function)
+    def wrapper(*args):
+        start = perf_counter()
+        try:
+            return function(*args)
+        finally:
+            stats[0] += 1
+            stats[1] += perf_counter() - start
+    return wrapper
+
+
+def block_label(index: int, block: Dict[str, Any]) -> str:
+    description = " ".join(block.get('description', '').split())
+    return f"{index}: {description}" if description else str(index)
+
+
+def function_name(function: Callable) -> str:
+    name = getattr(function, '__qualname__', None) or getattr(function, '__name__', None)
+    if name is None and isinstance(function, functools.partial):
+        name = f"{function_name(function.func)}({', '.join(map(str, function.args))})"
+    return name or repr(function)
+
+
+class TimingHook(RunHook):
+    """
+    Instruments the state update blocks of a run and
+    reports total and mean time per block and function
+    """
+    # (block, kind, key, name) -> [calls, total time]
+    stats: Dict[Tuple[str, str, str, str], List[float]]
+    timestep_time: float
+    timesteps: int
+
+    def __init__(self):
+        self.stats = {}
+        self.timestep_time = 0
+        self.timesteps = 0
+        self.last_step_end = None
+
+    def before_run(self, run_execution: RunExecution):
+        blocks = [
+            self.instrument(block_label(index, block), block)
+            for index, block in enumerate(run_execution.run_args.state_update_blocks)
+        ]
+        run_execution.run_args = run_execution.run_args._replace(state_update_blocks=blocks)
+        self.last_step_end = perf_counter()
+
+    def instrument(self, label: str, block: Dict[str, Any]) -> Dict[str, Any]:
+        instrumented_block = dict(block)
+        for kind in ['policies', 'variables']:
+            instrumented_block[kind] = {}
+            for key, function in block.get(kind, {}).items():
+                stats = self.stats.setdefault((label, kind, key, function_name(function)), [0, 0.0])
+                instrumented_block[kind][key] = timed(function, stats)
+        return instrumented_block
+
+    def after_step(self, _run_execution: RunExecution):
+        now = perf_counter()
+        self.timestep_time += now - self.last_step_end
+        self.timesteps += 1
+        self.last_step_end = now
+
+    def after_run(self, run_execution: RunExecution):
+        functions_time = sum(total for (_, total) in self.stats.values())
+        rows = [
+            {
+                'block': block,
+                'kind': kind,
+                'key': key,
+                'function': name,
+                'calls': calls,
+                'total_time': total,
+                'mean_time': total / calls if calls else 0.0,
+            }
+            for (block, kind, key, name), (calls, total) in self.stats.items()
+        ]
+        rows.append({
+            'block': TIMESTEP_OVERHEAD,
+            'kind': 'engine',
+            'key': None,
+            'function': TIMESTEP_OVERHEAD,
+            'calls': self.timesteps,
+            'total_time': self.timestep_time - functions_time,
+            'mean_time': (
+                (self.timestep_time - functions_time) / self.timesteps
+                if self.timesteps else 0.0
+            ),
+        })
+        run_execution.record[TIMING_RECORD_KEY] = rows
+
+
+def timing_table(exceptions: List[Dict[str, Any]], level: str = 'function') -> pd.DataFrame:
+    """
+    Returns the timing table of every run in the exceptions of an executed
+    simulation or experiment, either per function or aggregated per block
+    """
+    assert level in ('function', 'block'), "level has to be 'function' or 'block'"
+    df = pd.DataFrame([
+        {
+            'simulation': record['simulation'],
+            'subset': record['subset'],
+            'run': record['run'] + 1,
+            **row,
+        }
+        for record in exceptions
+        for row in record.get(TIMING_RECORD_KEY, [])
+    ])
+    if level == 'block' and not df.empty:
+        df = df.groupby(
+            ['simulation', 'subset', 'run', 'block'], sort=False, as_index=False
+        ).agg(calls=('calls', 'max'), total_time=('total_time', 'sum'))
+        df['mean_time'] = df['total_time'] / df['calls']
+    return df
+
+
+def speedscope_profile(exceptions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Converts the timing tables into a speedscope file with one
+    sampled profile per run, stacked as block -> function
+    """
+    frames: List[Dict[str, str]] = []
+    frame_indices: Dict[str, int] = {}
+
+    def frame(name):
+        if name not in frame_indices:
+            frame_indices[name] = len(frames)
+            frames.append({'name': name})
+        return frame_indices[name]
+
+    profiles = []
+    for record in exceptions:
+        rows = record.get(TIMING_RECORD_KEY, [])
+        if not rows:
+            continue
+        samples, weights = [], []
+        for row in rows:
+            stack = [frame(row['block'])]
+            if row['function'] != row['block']:
+                stack.append(frame(f"{row['function']} [{row['key']}]"))
+            samples.append(stack)
+            weights.append(max(row['total_time'], 0.0))
+        profiles.append({
+            'type': 'sampled',
+            'name': (
+                f"simulation {record['simulation']} / "
+                f"subset {record['subset']} / run {record['run'] + 1}"
+            ),
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        })
+
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'shared': {'frames': frames},
+        'profiles': profiles,
+        'activeProfileIndex': 0,
+        'exporter': 'mento2-model',
+    }
+
+
+def write_timing_report(exceptions: List[Dict[str, Any]], directory) -> Tuple[Path, Path]:
+    """
+    Writes timing.csv and timing.speedscope.json to directory
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    csv_path = directory / 'timing.csv'
+    speedscope_path = directory / 'timing.speedscope.json'
+    timing_table(exceptions).to_csv(csv_path, index=False)
+    with open(speedscope_path, 'w', encoding='utf-8') as file:
+        json.dump(speedscope_profile(exceptions), file)
+    return csv_path, speedscope_path
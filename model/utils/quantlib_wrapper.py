@@ -51,13 +51,50 @@ class QuantLibWrapper():
         process_array = StochasticProcessArray(processes, self.correlation)
         return process_array
 
-    def correlated_returns(self):
-        log_returns = self.generate_correlated_paths()
+    def correlated_returns(self, normals: np.ndarray = None):
+        """
+        Log returns per pair, driven by QuantLib's pseudo-random sequence
+        unless standard normal increments with shape (sample_size, processes)
+        are given
+        """
+        if normals is None:
+            log_returns = self.generate_correlated_paths()
+        else:
+            log_returns = self.evolve_paths(normals)
         increments = {}
         for config, path in zip(self.processes, log_returns):
             increments[config.pair] = path
         return increments
 
+    def evolve_paths(self, normals: np.ndarray):
+        """
+        Evolves the processes with the given increments, which reproduces
+        generate_correlated_paths for the increments of its sequence.
+        QuantLib's Euler step x + drift(x) + diffusion(x) dw scales the
+        value of processes with multiplicative increments by
+        1 + drift(1) + diffusion(1) dw, where the diffusion includes the
+        square root of the correlation, so all steps are computed at once.
+        """
+        process = self.process_container()
+        unit = process.initialValues()
+        drift = np.array(list(process.drift(0.0, unit)))
+        diffusion = process.diffusion(0.0, unit)
+        diffusion = np.array([
+            [diffusion[row][column] for column in range(diffusion.columns())]
+            for row in range(diffusion.rows())
+        ])
+        return np.log1p(drift + normals @ diffusion.T).T
+
+    def normals(self):
+        """
+        The standard normal increments generate_correlated_paths draws,
+        with shape (sample_size, processes)
+        """
+        sequence_generator = GaussianRandomSequenceGenerator(UniformRandomSequenceGenerator(
+            self.sample_size * len(self.processes), UniformRandomGenerator(seed=self.seed)))
+        sequence = sequence_generator.nextSequence()
+        return np.array(list(sequence.value())).reshape(self.sample_size, len(self.processes))
+
     # pylint: disable = too-many-locals
     def generate_correlated_paths(self):
         """
@@ -0,0 +1,193 @@
+"""
+In-worker reduction of runs to a few values
+
+With Engine(reduction=Reduction(reducers={
+    'min_reserve_ratio': minimum(state_variable('reserve_ratio')),
+    'time_below_peg': time_below(market_price(Pair(Stable.CUSD, Fiat.USD)), 0.99),
+    'arbitrage_volume': trade_volume(TraderType.ARBITRAGE_TRADER),
+    'final_reserve_balance': final(state_variable('reserve_balance')),
+})) every reducer folds the states of a run as its timesteps are executed
+in the worker. Unless keep_results is set the state history of the run is
+dropped, so only the reduced values are sent back to the parent process.
+reduction_table() collects them from the exceptions of the runs.
+"""
+from functools import partial
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from model.types.base import TraderType
+from .aggregation import Metric
+from .execution import RunExecution, RunHook
+from .generator_container import GENERATOR_CONTAINER_PARAM_KEY
+from .trade_ledger import TradeLedger
+
+REDUCED_RECORD_KEY = 'reduced'
+
+
+def _unchanged(accumulator, _run_execution):
+    return accumulator
+
+
+def _unchanged_step(accumulator, _state):
+    return accumulator
+
+
+class Reducer(NamedTuple):
+    # Folds the state at the end of every timestep into the accumulator
+    step: Callable[[Any, Dict[str, Any]], Any]
+    initial: Any = None
+    # Returns the reduced value of the accumulator once the run completes
+    finish: Callable[[Any, RunExecution], Any] = _unchanged
+    # Whether finish reads the swaps of the run from the trade ledger
+    trades: bool = False
+
+
+class Reduction(NamedTuple):
+    reducers: Dict[str, Reducer]
+    # Whether to return the state histories of the runs as well
+    keep_results: bool = False
+
+
+def _minimum(metric, accumulator, state):
+    return np.fmin(accumulator, metric(state))
+
+
+def minimum(metric: Metric) -> Reducer:
+    return Reducer(partial(_minimum, metric), np.nan)
+
+
+def _maximum(metric, accumulator, state):
+    return np.fmax(accumulator, metric(state))
+
+
+def maximum(metric: Metric) -> Reducer:
+    return Reducer(partial(_maximum, metric), np.nan)
+
+
+def _final(metric, _accumulator, state):
+    return metric(state)
+
+
+def final(metric: Metric) -> Reducer:
+    return Reducer(partial(_final, metric))
+
+
+def _total(metric, accumulator, state):
+    return accumulator + metric(state)
+
+
+def total(metric: Metric) -> Reducer:
+    return Reducer(partial(_total, metric), 0.0)
+
+
+def _mean(metric, accumulator, state):
+    value_sum, count = accumulator
+    return value_sum + metric(state), count + 1
+
+
+def _mean_finish(accumulator, _run_execution):
+    value_sum, count = accumulator
+    return value_sum / count if count else np.nan
+
+
+def mean(metric: Metric) -> Reducer:
+    return Reducer(partial(_mean, metric), (0.0, 0), _mean_finish)
+
+
+def _time_below(metric, threshold, accumulator, state):
+    return accumulator + int(metric(state) < threshold)
+
+
+def time_below(metric: Metric, threshold: float) -> Reducer:
+    """
+    Number of timesteps at which the metric is below the threshold
+    """
+    return Reducer(partial(_time_below, metric, threshold), 0)
+
+
+def _trade_volume(trader_type, _accumulator, run_execution):
+    ledger = _mento(run_execution).ledger
+    columns = {name: column[:ledger.size] for name, column in ledger.columns.items()}
+    sold = columns['sell_amount']
+    # volume in stable, sold reserve assets are converted at the swap price
+    volume = np.where(columns['sell_reserve_asset'], sold * columns['price'], sold)
+    if trader_type is not None:
+        # traders are named after their type and index
+        prefix = f"{trader_type}_"
+        traders = [index for index, name in enumerate(ledger.traders) if name.startswith(prefix)]
+        volume = volume[np.isin(columns['trader'], traders)]
+    return float(volume.sum())
+
+
+def trade_volume(trader_type: Optional[TraderType] = None) -> Reducer:
+    """
+    Volume of the Mento swaps of a run in stable, of all traders
+    or of the traders of trader_type
+    """
+    return Reducer(_unchanged_step, finish=partial(_trade_volume, trader_type), trades=True)
+
+
+def _mento(run_execution: RunExecution):
+    # pylint: disable=import-outside-toplevel
+    from model.generators.mento import MentoExchangeGenerator
+    container = run_execution.run_args.parameters[GENERATOR_CONTAINER_PARAM_KEY]
+    return container.get(MentoExchangeGenerator)
+
+
+class ReductionHook(RunHook):
+    """
+    Folds every state of a run into the accumulators of the reducers
+    and replaces the run by the reduced values
+    """
+    reduction: Reduction
+    accumulators: Dict[str, Any]
+
+    def __init__(self, reduction: Reduction):
+        self.reduction = reduction
+        self.accumulators = {
+            name: reducer.initial for name, reducer in reduction.reducers.items()
+        }
+
+    def before_run(self, run_execution: RunExecution):
+        if any(reducer.trades for reducer in self.reduction.reducers.values()):
+            mento = _mento(run_execution)
+            # shared with the TradeLedgerHook when the engine keeps a trade ledger
+            if mento.ledger is None:
+                mento.ledger = TradeLedger()
+        # the initial state counts as the first timestep
+        self.after_step(run_execution)
+
+    def after_step(self, run_execution: RunExecution):
+        state = run_execution.state
+        for name, reducer in self.reduction.reducers.items():
+            self.accumulators[name] = reducer.step(self.accumulators[name], state)
+
+    def after_run(self, run_execution: RunExecution):
+        run_execution.record[REDUCED_RECORD_KEY] = {
+            name: reducer.finish(self.accumulators[name], run_execution)
+            for name, reducer in self.reduction.reducers.items()
+        }
+        # the parent only needs the reduced values, not the generators of the run
+        run_execution.compact_record = True
+        if not self.reduction.keep_results:
+            run_execution.result.clear()
+
+
+def reduction_table(exceptions: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Returns the reduced values of every run in the exceptions of an
+    executed simulation or experiment
+    """
+    rows = [
+        {
+            'simulation': record['simulation'],
+            'subset': record['subset'],
+            'run': record['run'] + 1,
+            **record[REDUCED_RECORD_KEY],
+        }
+        for record in exceptions
+        if REDUCED_RECORD_KEY in record
+    ]
+    return pd.DataFrame(rows)
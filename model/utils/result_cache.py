@@ -0,0 +1,104 @@
+"""
+Content-addressed on-disk cache of run results
+
+With Engine(result_cache=ResultCache('.result_cache')) every run is
+keyed by a hash of its parameter subset, initial state, state update
+blocks, run index, timesteps, data source, model code, simulation
+configuration and the engine options that shape its result. Runs
+whose key is in the cache are loaded instead of simulated, so changing
+one parameter of a sweep only recomputes the subsets it affects.
+"""
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+from .fingerprint import code_fingerprint, data_fingerprint, fingerprint
+
+CACHE_KEY_RECORD_KEY = 'cache_key'
+# Run records that refer to the objects of a specific execution
+UNCACHED_RECORD_KEYS = ('parameters', CACHE_KEY_RECORD_KEY)
+
+
+class CachedRun(NamedTuple):
+    key: str
+    simulation: int
+    run: int
+    subset: int
+    parameters: Dict[str, Any]
+
+
+class ResultCache:
+    """
+    Directory of pickled (result, record) pairs named by their key
+    """
+    directory: Path
+
+    def __init__(self, directory='.result_cache'):
+        self.directory = Path(directory)
+
+    # pylint: disable=too-many-arguments
+    def key(self, params, initial_state, state_update_blocks, run_index, timesteps,
+            engine_options) -> str:
+        return fingerprint({
+            'params': params,
+            'initial_state': initial_state,
+            'state_update_blocks': state_update_blocks,
+            'run': run_index,
+            'timesteps': timesteps,
+            'engine': engine_options,
+            'data': data_fingerprint(),
+            'code': code_fingerprint(),
+        })
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def __contains__(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def load(self, cached: CachedRun) -> Tuple[List[List[dict]], Dict[str, Any]]:
+        """
+        Loads a run and labels it with the simulation, subset
+        and run it's loaded for
+        """
+        with open(self.path(cached.key), 'rb') as file:
+            result, record = pickle.load(file)
+        labels = {'simulation': cached.simulation, 'subset': cached.subset}
+        result = [[{**state, **labels} for state in substeps] for substeps in result]
+        record = {
+            **record,
+            **labels,
+            'run': cached.run,
+            'parameters': cached.parameters,
+            'cached': True,
+        }
+        return result, record
+
+    def store(self, key: str, result: List[List[dict]], record: Dict[str, Any]):
+        """
+        Stores a run unless it failed, writes are atomic so
+        concurrent sessions can share a cache
+        """
+        if record.get('exception') is not None:
+            return
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        record = {
+            key: value for key, value in record.items()
+            if key not in UNCACHED_RECORD_KEYS
+        }
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary, 'wb') as file:
+            pickle.dump((result, record), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    def store_result(self, run_result) -> Tuple[List[List[dict]], Dict[str, Any]]:
+        """
+        Stores a run result returned by execute_run that carries a cache key
+        """
+        result, record = run_result
+        key = record.pop(CACHE_KEY_RECORD_KEY, None)
+        if key is not None:
+            self.store(key, result, record)
+        return run_result
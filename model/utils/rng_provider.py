@@ -7,7 +7,7 @@ of the simulation changes.
 
 import hashlib
 import logging
-from typing import List, Union
+from typing import List, Optional, Union
 import numpy as np
 # from model.constants import global_rng_entropy
 
@@ -18,18 +18,23 @@ class RNGProvider():
     """
     seed: int
     monte_carlo_run: int
+    # Set to draw streams that are independent across parameter subsets,
+    # otherwise every subset draws common random numbers
+    subset: Optional[int]
 
-    def __init__(self, seed: int, monte_carlo_run: int):
+    def __init__(self, seed: int, monte_carlo_run: int, subset: Optional[int] = None):
         self.seed = seed
         self.monte_carlo_run = monte_carlo_run
+        self.subset = subset
 
     def get_rng(self, *context: List[Union[str, int]]) -> np.random.Generator:
         return np.random.default_rng(self.__seed__(list(context)))
 
     def __seed__(self, context: List[Union[str, int]]) -> np.random.SeedSequence:
+        subset = [] if self.subset is None else [f"subset_{self.subset}"]
         seed_sequence = np.random.SeedSequence(
             self.seed,
-            spawn_key=map(__hash__, [self.monte_carlo_run] + context)
+            spawn_key=map(__hash__, [self.monte_carlo_run] + subset + context)
         )
         logging.debug("Generated seed_sequence %s for context %s", seed_sequence, context)
         return seed_sequence
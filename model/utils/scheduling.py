@@ -0,0 +1,203 @@
+"""
+Cost-aware scheduling of the runs of a sweep
+
+Subsets of a sweep differ in cost, e.g. by their number of traders or
+their market price model. With Engine(scheduling=Scheduling()) the cost
+of every (subset, run) is estimated from its parameters and the timings
+of previous runs with the same features, which are kept in a local
+history file, and runs are dispatched to the worker pool longest first
+so that no worker is left with a long run at the tail of the sweep.
+engine.scheduler.utilization() reports how busy every worker was.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .execution import RunExecution, RunHook
+from .fingerprint import fingerprint
+
+SCHEDULE_RECORD_KEY = 'schedule'
+
+# Relative cost per timestep of a run without traders and oracles,
+# of every trader and of every oracle, used for features without timings
+BASE_COST = 1.0
+TRADER_COST = 1.0
+ORACLE_COST = 0.1
+
+
+class Scheduling(NamedTuple):
+    # JSON file with the cost per timestep of the features of previous runs
+    history: str = '.run_costs.json'
+    # Weight of a new timing in the moving average of the cost of its features
+    smoothing: float = 0.3
+
+
+class RunTimeHook(RunHook):
+    """
+    Records the worker, start and end of a run and the number of timesteps
+    it executed
+    """
+    started: float
+    start_timestep: int
+
+    def before_run(self, run_execution: RunExecution):
+        self.started = time.time()
+        self.start_timestep = run_execution.state['timestep']
+
+    def after_run(self, run_execution: RunExecution):
+        run_execution.record[SCHEDULE_RECORD_KEY] = {
+            'worker': os.getpid(),
+            'started': self.started,
+            'finished': time.time(),
+            'timesteps': run_execution.state['timestep'] - self.start_timestep,
+        }
+
+
+def run_features(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The parameters of a subset that the cost of its runs depends on
+    """
+    model = params.get('market_price_model')
+    traders: Dict[str, int] = {}
+    for trader in params.get('traders', []):
+        name = trader.trader_type.name
+        traders[name] = traders.get(name, 0) + trader.count
+    return {
+        'market_price_model': getattr(model, 'name', model),
+        'traders': traders,
+        'oracles': sum(oracle.count for oracle in params.get('oracles', [])),
+    }
+
+
+def relative_cost(features: Dict[str, Any]) -> float:
+    """
+    Cost of a timestep with the features relative to other features,
+    for subsets without timed runs
+    """
+    return (
+        BASE_COST
+        + TRADER_COST * sum(features['traders'].values())
+        + ORACLE_COST * features['oracles']
+    )
+
+
+class CostScheduler:
+    """
+    Estimates the cost of runs, learns from the timings of executed
+    runs and keeps them for the utilization report
+    """
+    scheduling: Scheduling
+    # Feature fingerprint -> features, seconds per timestep and number of runs
+    history: Dict[str, Dict[str, Any]]
+    # Schedule records of the runs executed since the scheduler was created
+    schedules: List[Dict[str, Any]]
+
+    def __init__(self, scheduling: Scheduling):
+        self.scheduling = scheduling
+        self.history = {}
+        self.schedules = []
+        path = Path(scheduling.history)
+        if path.exists():
+            with open(path, encoding='utf-8') as file:
+                self.history = json.load(file)
+
+    def estimate(self, params: Dict[str, Any], timesteps: int) -> float:
+        """
+        Estimated duration of a run of the subset, in seconds once
+        any run has been timed and in relative units before
+        """
+        features = run_features(params)
+        entry = self.history.get(fingerprint(features))
+        if entry is not None:
+            return entry['seconds_per_timestep'] * timesteps
+        return self.seconds_per_unit() * relative_cost(features) * timesteps
+
+    def seconds_per_unit(self) -> float:
+        """
+        Median duration of a unit of relative cost in the history
+        """
+        if not self.history:
+            return 1.0
+        return float(np.median([
+            entry['seconds_per_timestep'] / relative_cost(entry['features'])
+            for entry in self.history.values()
+        ]))
+
+    def observe(self, params: Dict[str, Any], seconds: float, timesteps: int):
+        """
+        Smooths the duration of a run into the seconds per timestep
+        of its features
+        """
+        if timesteps <= 0:
+            return
+        features = run_features(params)
+        key = fingerprint(features)
+        cost = seconds / timesteps
+        entry = self.history.get(key)
+        if entry is None:
+            self.history[key] = {'features': features, 'seconds_per_timestep': cost, 'runs': 1}
+        else:
+            smoothing = self.scheduling.smoothing
+            entry['seconds_per_timestep'] += smoothing * (cost - entry['seconds_per_timestep'])
+            entry['runs'] += 1
+
+    def consume(self, run_result):
+        """
+        Learns the cost of a run result returned by execute_run,
+        runs loaded from the result cache weren't timed
+        """
+        _result, record = run_result
+        schedule = record.get(SCHEDULE_RECORD_KEY)
+        if schedule is not None and not record.get('cached'):
+            self.schedules.append(schedule)
+            self.observe(
+                record['parameters'],
+                schedule['finished'] - schedule['started'],
+                schedule['timesteps'])
+        return run_result
+
+    def save(self):
+        """
+        Writes the history atomically
+        """
+        path = Path(self.scheduling.history)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(self.history, file, indent=1, sort_keys=True)
+        os.replace(temporary, path)
+
+    def makespan(self) -> Optional[float]:
+        """
+        Seconds from the start of the first to the end of the last
+        executed run, None before any run completed
+        """
+        if not self.schedules:
+            return None
+        return (
+            max(schedule['finished'] for schedule in self.schedules)
+            - min(schedule['started'] for schedule in self.schedules)
+        )
+
+    def utilization(self) -> pd.DataFrame:
+        """
+        Returns one row per worker with its number of runs, the time it
+        spent executing them and the fraction of the makespan of the
+        runs that this is. The mean utilization approaches 1 when the
+        wall time approaches the total run time divided by the workers.
+        """
+        makespan = self.makespan()
+        rows: Dict[int, Dict[str, Any]] = {}
+        for schedule in self.schedules:
+            row = rows.setdefault(schedule['worker'], {
+                'worker': schedule['worker'], 'runs': 0, 'busy': 0.0})
+            row['runs'] += 1
+            row['busy'] += schedule['finished'] - schedule['started']
+        frame = pd.DataFrame(list(rows.values()), columns=['worker', 'runs', 'busy'])
+        frame['utilization'] = frame['busy'] / makespan if makespan else np.nan
+        return frame
@@ -0,0 +1,139 @@
+"""
+Market price increments in shared memory
+
+With Engine(shared_paths=True) the parent process generates the
+increments of the QuantLib based market price models once per path set
+into a multiprocessing.shared_memory block. Path sets are identified by
+the seed, run and subset of the random numbers and the parameters of the
+processes, so under common random numbers every subset of a run shares
+one block. A MarketPriceGenerator sent to a worker only carries the
+SharedIncrements handle of its block and attaches read-only NumPy views
+to it by name when the run first reads its prices, so workers neither
+copy nor regenerate paths.
+"""
+import os
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .fingerprint import fingerprint
+
+SHARED_PATHS_PARAM_KEY = 'shared_paths'
+
+
+class SharedIncrements(NamedTuple):
+    """
+    Handle of a block with one row of increments per pair, followed
+    by the cumulative log likelihood ratio of tilted increments
+    """
+    name: str
+    pairs: List[Any]
+    steps: int
+    weighted: bool
+
+    def attach(self) -> Tuple[Dict[Any, np.ndarray], Optional[np.ndarray], Any]:
+        """
+        Returns read-only views of the increments per pair and of the log
+        weights, together with the shared memory that has to outlive them
+        """
+        memory = shared_memory.SharedMemory(name=self.name)
+        if SharedPathStore.owner_pid != os.getpid():
+            # only the creating process may unlink the block
+            # pylint: disable=protected-access
+            resource_tracker.unregister(memory._name, 'shared_memory')
+        values = np.ndarray((memory.size // 8,), dtype=np.float64, buffer=memory.buf)
+        values.flags.writeable = False
+        increments = {
+            pair: values[index * self.steps:(index + 1) * self.steps]
+            for index, pair in enumerate(self.pairs)
+        }
+        log_weights = None
+        if self.weighted:
+            start = len(self.pairs) * self.steps
+            log_weights = values[start:start + self.steps + 1]
+        return increments, log_weights, memory
+
+
+def path_key(params: Dict[str, Any]) -> str:
+    """
+    Identifies the increments that the market price generator
+    creates from the parameters of a run
+    """
+    rngp = params['rngp']
+    return fingerprint({
+        'seed': (rngp.seed, rngp.monte_carlo_run, rngp.subset),
+        'model': params['market_price_model'],
+        'processes': params['market_price_processes'],
+        'correlation': np.asarray(params['market_price_correlation_matrix'], dtype=float),
+        'importance_sampling': params.get('importance_sampling'),
+    })
+
+
+def _no_store():
+    return None
+
+
+class SharedPathStore:
+    """
+    Shared memory blocks of the path sets created by the parent process
+    of a simulation, keyed by path_key. Copies of the store made for
+    the parameters of a run refer to the same store and pickled copies
+    are None.
+    """
+    # Process that created the blocks of the current store
+    owner_pid: Optional[int] = None
+    handles: Dict[str, SharedIncrements]
+    blocks: List[shared_memory.SharedMemory]
+
+    def __init__(self):
+        self.handles = {}
+        self.blocks = []
+        SharedPathStore.owner_pid = os.getpid()
+
+    def __deepcopy__(self, _memo):
+        return self
+
+    def __reduce__(self):
+        # generators are created before runs are sent to workers,
+        # which thus don't need the store
+        return _no_store, ()
+
+    def get(self, key: str) -> Optional[SharedIncrements]:
+        return self.handles.get(key)
+
+    def publish(
+        self,
+        key: str,
+        increments: Dict[Any, np.ndarray],
+        log_weights: Optional[np.ndarray],
+    ) -> SharedIncrements:
+        """
+        Copies the increments and log weights of a path set into a new block
+        """
+        pairs = list(increments)
+        steps = len(next(iter(increments.values()))) if pairs else 0
+        rows = [np.asarray(increments[pair], dtype=np.float64) for pair in pairs]
+        if log_weights is not None:
+            rows.append(np.asarray(log_weights, dtype=np.float64))
+        values = np.concatenate(rows) if rows else np.zeros(1)
+        memory = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 8))
+        np.ndarray(values.shape, dtype=np.float64, buffer=memory.buf)[:] = values
+        self.blocks.append(memory)
+        handle = SharedIncrements(memory.name, pairs, steps, log_weights is not None)
+        self.handles[key] = handle
+        return handle
+
+    def close(self):
+        """
+        Releases the blocks, views attached in this process keep their
+        memory mapped until they're garbage collected
+        """
+        for memory in self.blocks:
+            memory.unlink()
+            try:
+                memory.close()
+            except BufferError:
+                pass
+        self.blocks = []
+        self.handles = {}
@@ -0,0 +1,97 @@
+"""
+Stop conditions end a run early once it reached a state
+that is of no further interest, e.g. a failed reserve,
+which frees the worker for the next run.
+
+engine = Engine(stop_conditions=[
+    state_below('reserve_ratio', 1),
+    depeg(Pair(Stable.CUSD, Fiat.USD), 0.05),
+])
+"""
+from functools import partial
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import pandas as pd
+
+from model.types.pair import Pair
+from .execution import RunExecution, RunHook
+
+
+class StopCondition(NamedTuple):
+    reason: str
+    predicate: Callable[[Dict[str, Any]], bool]
+
+
+def _state_below(state_variable, threshold, state):
+    return state[state_variable] < threshold
+
+
+def state_below(state_variable: str, threshold: float) -> StopCondition:
+    """A StopCondition which is met when a State Variable drops below a threshold
+
+    Args:
+        state_variable (str): State Variable key, e.g. `reserve_ratio`
+        threshold (float): Lowest acceptable value
+
+    Returns:
+        StopCondition
+    """
+    return StopCondition(
+        f"{state_variable} < {threshold}",
+        partial(_state_below, state_variable, threshold)
+    )
+
+
+def _depeg(pair, band, peg, state):
+    return abs(state["market_price"][pair] - peg) > band
+
+
+def depeg(pair: Pair, band: float, peg: float = 1) -> StopCondition:
+    """A StopCondition which is met when the market price of a pair leaves the peg ± band
+
+    Args:
+        pair (Pair): Pair in market_price, e.g. Pair(Stable.CUSD, Fiat.USD)
+        band (float): Accepted absolute deviation from the peg
+        peg (float, optional): Defaults to 1.
+
+    Returns:
+        StopCondition
+    """
+    return StopCondition(
+        f"{pair} outside {peg} ± {band}",
+        partial(_depeg, pair, band, peg)
+    )
+
+
+class StopConditionHook(RunHook):
+    """
+    Evaluates stop conditions after every timestep
+    """
+    stop_conditions: List[StopCondition]
+
+    def __init__(self, stop_conditions: List[StopCondition]):
+        self.stop_conditions = stop_conditions
+
+    def after_step(self, run_execution: RunExecution):
+        for stop_condition in self.stop_conditions:
+            if stop_condition.predicate(run_execution.state):
+                run_execution.stop(stop_condition.reason)
+                return
+
+
+def stopping_times(exceptions: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Returns the stopping timestep and reason of each run
+    from the exceptions of an executed simulation or experiment,
+    runs that weren't stopped have no stop_timestep
+    """
+    return pd.DataFrame([
+        {
+            'simulation': record['simulation'],
+            'subset': record['subset'],
+            'run': record['run'] + 1,
+            'stop_timestep': record.get('stop_timestep'),
+            'stop_reason': record.get('stop_reason'),
+        }
+        for record in exceptions
+    ])
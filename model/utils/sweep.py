@@ -0,0 +1,264 @@
+"""
+Lazily enumerated and sampled parameter sweeps
+
+radcad's generate_parameter_sweep materializes every parameter subset up
+front. A SweepPlan instead declares the swept dimensions as paths into a
+base parameter subset and produces subsets on demand, either as the full
+grid of the dimensions or as Latin hypercube or Sobol samples of them.
+Plans are used in place of the params of a Model:
+
+model.params = SweepPlan(parameters, {
+    ('mento_exchanges_config', MentoExchange.CUSD_CELO, 'spread'): Range(0.001, 0.01, num=10),
+    'reserve_target_weight': Choice([0.5, 0.75]),
+}, method=SweepMethod.SOBOL, samples=2 ** 14)
+
+The engine streams the subsets to the backend and post_process attaches
+the swept values of the subsets that were run as columns.
+"""
+from functools import reduce
+from itertools import product
+from operator import mul
+from typing import (
+    Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+)
+
+import numpy as np
+import pandas as pd
+from radcad import core
+from scipy.stats import qmc
+
+from model.types.base import SweepMethod
+
+# Number of samples drawn at once, a power of 2 keeps Sobol points balanced
+SAMPLE_CHUNK_SIZE = 1024
+
+ParamPath = Tuple[Any, ...]
+
+
+class Choice(NamedTuple):
+    """
+    Dimension of discrete values
+    """
+    values: Sequence[Any]
+
+    def grid(self) -> Sequence[Any]:
+        return self.values
+
+    def sample(self, unit: float) -> Any:
+        return self.values[min(int(unit * len(self.values)), len(self.values) - 1)]
+
+
+class Range(NamedTuple):
+    """
+    Dimension of numbers between low and high, both included
+    """
+    low: float
+    high: float
+    # Number of values in a grid
+    num: int = 2
+    # Whether to space values evenly on a log scale
+    log: bool = False
+    integer: bool = False
+
+    def grid(self) -> Sequence[Any]:
+        if self.integer:
+            values = np.unique(np.linspace(self.low, self.high, self.num).round())
+            return [int(value) for value in values]
+        space = np.geomspace if self.log else np.linspace
+        return [float(value) for value in space(self.low, self.high, self.num)]
+
+    def sample(self, unit: float) -> Any:
+        if self.integer:
+            return int(min(self.low + unit * (self.high - self.low + 1), self.high))
+        if self.log:
+            return float(self.low * (self.high / self.low) ** unit)
+        return float(self.low + unit * (self.high - self.low))
+
+
+Dimension = Union[Choice, Range]
+
+
+def path_label(path: ParamPath) -> str:
+    return ".".join(str(key) for key in path)
+
+
+def get_path(params: Any, path: ParamPath) -> Any:
+    for key in path:
+        params = getattr(params, key) if _is_named_tuple(params) else params[key]
+    return params
+
+
+def set_path(params: Any, path: ParamPath, value: Any) -> Any:
+    """
+    Returns a copy of params with the value at path replaced, containers
+    that aren't on the path are shared with params
+    """
+    if not path:
+        return value
+    key, rest = path[0], path[1:]
+    child = set_path(get_path(params, (key,)), rest, value)
+    if _is_named_tuple(params):
+        return params._replace(**{key: child})
+    if isinstance(params, dict):
+        return {**params, key: child}
+    if isinstance(params, list):
+        copied = list(params)
+        copied[key] = child
+        return copied
+    raise TypeError(f"Can't set {key} in {type(params).__name__}")
+
+
+def _is_named_tuple(obj: Any) -> bool:
+    return isinstance(obj, tuple) and hasattr(obj, '_fields')
+
+
+class SweepPlan:
+    """
+    Parameter subsets of a sweep, produced on demand from a base subset
+    and the dimensions swept over
+    """
+    base: Dict[str, Any]
+    paths: List[ParamPath]
+    dimensions: List[Dimension]
+    method: SweepMethod
+    samples: int
+    seed: int
+    # Values of every dimension of a grid
+    grids: Optional[List[Sequence[Any]]]
+    # Per-dimension stratum of every sample of a Latin hypercube
+    strata: Optional[np.ndarray]
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        parameters: Dict[str, Any],
+        dimensions: Dict[Union[str, ParamPath], Dimension],
+        method: SweepMethod = SweepMethod.GRID,
+        samples: Optional[int] = None,
+        seed: int = 0,
+    ):
+        """
+        The first value of every parameter in the radcad parameters
+        is the base subset
+        """
+        self.base = {key: value[0] for key, value in parameters.items()}
+        self.paths = [(path,) if isinstance(path, str) else tuple(path) for path in dimensions]
+        self.dimensions = list(dimensions.values())
+        self.method = method
+        self.seed = seed
+        for path in self.paths:
+            get_path(self.base, path)
+
+        if method == SweepMethod.GRID:
+            assert samples is None, "A grid sweep has a subset per grid point"
+            self.grids = [dimension.grid() for dimension in self.dimensions]
+            self.samples = reduce(mul, map(len, self.grids), 1)
+        else:
+            assert samples, f"A {method.value} sweep needs a number of samples"
+            self.grids = None
+            self.samples = samples
+        self.strata = None
+        if method == SweepMethod.LATIN_HYPERCUBE:
+            rng = np.random.default_rng([seed, 0])
+            self.strata = np.stack([
+                rng.permutation(samples).astype(np.int32)
+                for _ in self.dimensions
+            ], axis=1)
+        self._chunk = (None, None)
+
+    def __len__(self) -> int:
+        return self.samples
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for values in self.points():
+            yield self.subset(values)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return self.subset(self.point(index))
+
+    def subset(self, values: Sequence[Any]) -> Dict[str, Any]:
+        """
+        The base subset with the dimensions set to values
+        """
+        params = self.base
+        for path, value in zip(self.paths, values):
+            params = set_path(params, path, value)
+        return params
+
+    def points(self) -> Iterator[Tuple[Any, ...]]:
+        """
+        Values of the dimensions for every subset in order
+        """
+        if self.method == SweepMethod.GRID:
+            yield from product(*self.grids)
+            return
+        for start in range(0, self.samples, SAMPLE_CHUNK_SIZE):
+            for units in self.unit_samples(start)[:self.samples - start]:
+                yield self.scale(units)
+
+    def point(self, index: int) -> Tuple[Any, ...]:
+        if not 0 <= index < self.samples:
+            raise IndexError(f"Subset {index} is out of a sweep of {self.samples}")
+        if self.method == SweepMethod.GRID:
+            grid_index = np.unravel_index(index, tuple(map(len, self.grids)))
+            return tuple(grid[i] for grid, i in zip(self.grids, grid_index))
+        start = index - index % SAMPLE_CHUNK_SIZE
+        return self.scale(self.unit_samples(start)[index - start])
+
+    def scale(self, units: np.ndarray) -> Tuple[Any, ...]:
+        return tuple(dimension.sample(unit) for dimension, unit in zip(self.dimensions, units))
+
+    def unit_samples(self, start: int) -> np.ndarray:
+        """
+        Samples in the unit hypercube of the chunk starting at start
+        """
+        chunk_start, chunk = self._chunk
+        if chunk_start == start:
+            return chunk
+        if self.method == SweepMethod.SOBOL:
+            sampler = qmc.Sobol(len(self.dimensions), seed=self.seed)
+            if start:
+                sampler.fast_forward(start)
+            chunk = sampler.random(SAMPLE_CHUNK_SIZE)
+        else:
+            strata = self.strata[start:start + SAMPLE_CHUNK_SIZE]
+            rng = np.random.default_rng([self.seed, 1, start])
+            chunk = (strata + rng.random(strata.shape)) / self.samples
+        self._chunk = (start, chunk)
+        return chunk
+
+    def labels(self) -> List[str]:
+        return [path_label(path) for path in self.paths]
+
+    def frame(self, subsets: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """
+        Values of the dimensions indexed by subset, for all subsets
+        unless given
+        """
+        if subsets is None:
+            subsets = range(self.samples)
+            points = self.points()
+        else:
+            subsets = sorted(int(subset) for subset in subsets)
+            points = (self.point(subset) for subset in subsets)
+        return pd.DataFrame(
+            list(points), index=pd.Index(subsets, name='subset'), columns=self.labels()
+        )
+
+
+def swept_parameters(params: Union[SweepPlan, Dict[str, List[Any]]]) -> List[str]:
+    """
+    Names of the parameters that take more than one value in a sweep
+    """
+    if isinstance(params, SweepPlan):
+        return list(dict.fromkeys(path[0] for path in params.paths))
+    return [key for key, value in params.items() if len(value) > 1]
+
+
+def parameter_sweep(params: Union[SweepPlan, Dict[str, List[Any]]]) -> Sequence[Dict[str, Any]]:
+    """
+    The parameter subsets of a sweep plan or of radcad params
+    """
+    if isinstance(params, SweepPlan):
+        return params
+    return core.generate_parameter_sweep(params)
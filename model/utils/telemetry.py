@@ -0,0 +1,341 @@
+"""
+Live throughput telemetry of simulations
+
+With Engine(telemetry=Telemetry(interval=30, sinks=[LogSink(),
+PrometheusSink('metrics/mento.prom')])) every run writes a heartbeat with
+its current timestep, the RSS of its process and the time spent in each
+state update block to a file per process at most every `interval`
+seconds. A thread in the parent process combines the heartbeats with the
+completed runs and emits a TelemetryReport to the sinks every `interval`
+seconds: blocks per second, runs completed, the timestep of every
+running run, RSS and the slowest blocks. Without telemetry no hook, file
+or thread is created.
+
+Heartbeats are files in a temporary directory of the parent process, so
+only runs on the same host report progress while they run. Runs on the
+remote workers of Engine(distributed=Distributed(address)) are only
+counted once they complete, without their RSS and block timings.
+"""
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from experiments.simulation_configuration import BLOCKS_PER_TIMESTEP
+from .execution import RunExecution, RunHook
+from .memory_profiling import current_rss
+from .profiling import block_label, timed
+
+
+class TelemetryReport(NamedTuple):
+    """
+    Progress of the runs of an engine at the time of the report
+    """
+    elapsed: float
+    runs_completed: int
+    # None unless the number of runs is known up front
+    runs_total: Optional[int]
+    blocks: int
+    blocks_per_second: float
+    # (simulation, subset, run) -> (timestep, timesteps) of the running runs
+    running: Dict[Tuple[int, int, int], Tuple[int, int]]
+    # RSS of the parent and the processes executing runs
+    rss: int
+    # (block, mean seconds per call) of the slowest blocks
+    slowest_blocks: List[Tuple[str, float]]
+
+
+class TelemetrySink(ABC):
+    """
+    Abstract output of telemetry reports
+    """
+
+    @abstractmethod
+    def emit(self, report: TelemetryReport):
+        """
+        Outputs a report, called from the thread of the monitor
+        """
+
+    def close(self):
+        """
+        Called after the final report
+        """
+
+
+class LogSink(TelemetrySink):
+    """
+    Logs every report on a single line
+    """
+
+    def emit(self, report: TelemetryReport):
+        total = f"/{report.runs_total}" if report.runs_total is not None else ""
+        slowest = ", ".join(f"{block} {seconds * 1e3:.2f}ms"
+                            for block, seconds in report.slowest_blocks)
+        logging.info(
+            "%.0fs: %s%s runs, %.1f blocks/s, %s running, RSS %.0f MB, slowest blocks: %s",
+            report.elapsed, report.runs_completed, total, report.blocks_per_second,
+            len(report.running), report.rss / 2 ** 20, slowest or "-")
+
+
+class ProgressBarSink(TelemetrySink):
+    """
+    Redraws a progress bar of the completed runs in place
+    """
+
+    def __init__(self, width: int = 40, stream=None):
+        self.width = width
+        self.stream = stream or sys.stderr
+
+    def emit(self, report: TelemetryReport):
+        if report.runs_total:
+            done = report.runs_completed / report.runs_total
+            filled = "#" * int(done * self.width)
+            progress = f"[{filled:<{self.width}}] {report.runs_completed}/{report.runs_total} runs"
+        else:
+            progress = f"{report.runs_completed} runs"
+        self.stream.write(f"\r{progress} {report.blocks_per_second:.1f} blocks/s")
+        self.stream.flush()
+
+    def close(self):
+        self.stream.write("\n")
+        self.stream.flush()
+
+
+class PrometheusSink(TelemetrySink):
+    """
+    Rewrites a file in the Prometheus text format, e.g. for the
+    textfile collector of the node exporter
+    """
+
+    def __init__(self, path, prefix: str = 'mento'):
+        self.path = Path(path)
+        self.prefix = prefix
+
+    def emit(self, report: TelemetryReport):
+        lines = []
+
+        def gauge(name, value, labels=None):
+            metric = f"{self.prefix}_{name}"
+            if not any(line.endswith(f" {metric} gauge") for line in lines):
+                lines.append(f"# TYPE {metric} gauge")
+            label_text = ",".join(
+                f'{key}="{str(label).replace(chr(34), chr(39))}"'
+                for key, label in (labels or {}).items())
+            lines.append(f"{metric}{{{label_text}}} {value}" if labels else f"{metric} {value}")
+
+        gauge('elapsed_seconds', report.elapsed)
+        gauge('runs_completed', report.runs_completed)
+        if report.runs_total is not None:
+            gauge('runs_total', report.runs_total)
+        gauge('blocks', report.blocks)
+        gauge('blocks_per_second', report.blocks_per_second)
+        gauge('rss_bytes', report.rss)
+        for (simulation, subset, run), (timestep, _timesteps) in report.running.items():
+            gauge('run_timestep', timestep,
+                  {'simulation': simulation, 'subset': subset, 'run': run + 1})
+        for block, seconds in report.slowest_blocks:
+            gauge('block_seconds', seconds, {'block': block})
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(f".{os.getpid()}.tmp")
+        temporary.write_text("\n".join(lines) + "\n", encoding='utf-8')
+        os.replace(temporary, self.path)
+
+
+class Telemetry(NamedTuple):
+    # Seconds between heartbeats of a run and between reports
+    interval: float = 10.0
+    sinks: Sequence[TelemetrySink] = (LogSink(),)
+    # Whether runs time their state update blocks to report the slowest ones
+    block_timing: bool = True
+    # Number of slowest blocks in a report
+    top: int = 5
+
+
+class TelemetryHook(RunHook):
+    """
+    Writes the progress of a run to the heartbeat file of its process
+    """
+    directory: str
+    interval: float
+    block_timing: bool
+    # block -> [calls, total time]
+    stats: Dict[str, List[float]]
+    next_heartbeat: float
+
+    def __init__(self, directory: str, interval: float, block_timing: bool):
+        self.directory = directory
+        self.interval = interval
+        self.block_timing = block_timing
+        self.stats = {}
+        self.next_heartbeat = 0.0
+
+    def before_run(self, run_execution: RunExecution):
+        if self.block_timing:
+            blocks = [
+                self.instrument(block_label(index, block), block)
+                for index, block in enumerate(run_execution.run_args.state_update_blocks)
+            ]
+            run_execution.run_args = run_execution.run_args._replace(state_update_blocks=blocks)
+        self.heartbeat(run_execution)
+
+    def instrument(self, label: str, block: Dict[str, Any]) -> Dict[str, Any]:
+        stats = self.stats.setdefault(label, [0, 0.0])
+        instrumented_block = dict(block)
+        for kind in ['policies', 'variables']:
+            instrumented_block[kind] = {
+                key: timed(function, stats) for key, function in block.get(kind, {}).items()
+            }
+        return instrumented_block
+
+    def after_step(self, run_execution: RunExecution):
+        if perf_counter() >= self.next_heartbeat:
+            self.heartbeat(run_execution)
+
+    def after_run(self, run_execution: RunExecution):
+        self.heartbeat(run_execution, running=False)
+
+    def heartbeat(self, run_execution: RunExecution, running: bool = True):
+        """
+        Replaces the heartbeat file of the process with the progress of the run
+        """
+        run_args = run_execution.run_args
+        path = Path(self.directory, f"{os.getpid()}.json")
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps({
+            'simulation': run_args.simulation,
+            'subset': run_args.subset,
+            'run': run_args.run,
+            'timestep': run_execution.state['timestep'],
+            'timesteps': run_args.timesteps,
+            'running': running,
+            'rss': current_rss() or 0,
+            'blocks': self.stats,
+        }), encoding='utf-8')
+        os.replace(temporary, path)
+        self.next_heartbeat = perf_counter() + self.interval
+
+
+class TelemetryMonitor:
+    """
+    Reports the progress of the runs of an engine from a background thread
+    """
+    telemetry: Telemetry
+    directory: str
+    runs_total: Optional[int]
+    runs_completed: int
+    completed_timesteps: int
+
+    def __init__(self, telemetry: Telemetry, runs_total: Optional[int] = None):
+        self.telemetry = telemetry
+        self.directory = tempfile.mkdtemp(prefix='mento-telemetry-')
+        self.runs_total = runs_total
+        self.runs_completed = 0
+        self.completed_timesteps = 0
+        self.started = time.time()
+        self.last_report = (self.started, 0)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.report_periodically, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def consume(self, run_result):
+        """
+        Counts a run result returned by execute_run as it completes
+        """
+        _result, record = run_result
+        self.runs_completed += 1
+        self.completed_timesteps += (
+            record.get('stop_timestep') or record.get('timesteps') or 0)
+        return run_result
+
+    def report_periodically(self):
+        while not self.stopped.wait(self.telemetry.interval):
+            self.emit(self.report())
+
+    def heartbeats(self) -> List[Dict[str, Any]]:
+        heartbeats = []
+        for path in Path(self.directory).glob('*.json'):
+            try:
+                heartbeats.append(json.loads(path.read_text(encoding='utf-8')))
+            except (OSError, ValueError):
+                # replaced while it was read
+                continue
+        return heartbeats
+
+    def report(self) -> TelemetryReport:
+        """
+        Combines the heartbeats of the running runs with the completed runs,
+        blocks per second are measured since the previous report
+        """
+        heartbeats = self.heartbeats()
+        running = {
+            (beat['simulation'], beat['subset'], beat['run']): (beat['timestep'], beat['timesteps'])
+            for beat in heartbeats if beat['running']
+        }
+        timesteps = self.completed_timesteps + sum(timestep for timestep, _ in running.values())
+        blocks = timesteps * BLOCKS_PER_TIMESTEP
+        now = time.time()
+        last_time, last_blocks = self.last_report
+        self.last_report = (now, blocks)
+
+        # heartbeats of processes that are no longer running runs only count in the parent
+        rss = (current_rss() or 0) + sum(
+            beat['rss'] for beat in heartbeats if beat['running'] and beat['rss'])
+        return TelemetryReport(
+            elapsed=now - self.started,
+            runs_completed=self.runs_completed,
+            runs_total=self.runs_total,
+            blocks=blocks,
+            blocks_per_second=(
+                (blocks - last_blocks) / (now - last_time) if now > last_time else 0.0),
+            running=running,
+            rss=rss,
+            slowest_blocks=self.slowest_blocks(heartbeats),
+        )
+
+    def slowest_blocks(self, heartbeats: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+        """
+        Returns the blocks with the highest mean time per call over all processes
+        """
+        block_stats: Dict[str, List[float]] = {}
+        for beat in heartbeats:
+            for block, (calls, total) in beat['blocks'].items():
+                stats = block_stats.setdefault(block, [0, 0.0])
+                stats[0] += calls
+                stats[1] += total
+        return sorted(
+            ((block, total / calls) for block, (calls, total) in block_stats.items() if calls),
+            key=lambda item: item[1], reverse=True,
+        )[:self.telemetry.top]
+
+    def emit(self, report: TelemetryReport):
+        for sink in self.telemetry.sinks:
+            try:
+                sink.emit(report)
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Telemetry sink %s failed", type(sink).__name__)
+
+    def stop(self) -> TelemetryReport:
+        """
+        Stops reporting, emits a final report and removes the heartbeats
+        """
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.last_report = (self.started, 0)
+        report = self.report()
+        self.emit(report)
+        for sink in self.telemetry.sinks:
+            sink.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        return report
@@ -0,0 +1,153 @@
+"""
+Trade ledger recording every executed Mento swap of a run
+
+With Engine(trade_ledger=True) the MentoExchangeGenerator of every run
+gets a TradeLedger that traders append their settled swaps to. The
+ledger is kept in growable NumPy columns, moved into the exception
+record of the run once it completes and can be queried with
+trade_table() without touching the state dataframe.
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .execution import RunExecution, RunHook
+from .generator_container import GENERATOR_CONTAINER_PARAM_KEY
+
+TRADES_RECORD_KEY = 'trades'
+
+LEDGER_COLUMNS = {
+    'timestep': np.int64,
+    # index into TradeLedger.traders
+    'trader': np.int32,
+    # index into TradeLedger.exchanges
+    'exchange': np.int32,
+    'sell_reserve_asset': np.bool_,
+    'sell_amount': np.float64,
+    'buy_amount': np.float64,
+    # stable per reserve asset
+    'price': np.float64,
+    # spread paid in the sold asset
+    'spread_fee': np.float64,
+}
+
+
+class TradeLedger:
+    """
+    Append-only columnar ledger of swaps
+    """
+    columns: Dict[str, np.ndarray]
+    size: int
+    traders: List[str]
+    exchanges: List[str]
+
+    def __init__(self, capacity: int = 1024):
+        self.columns = {
+            name: np.empty(capacity, dtype=dtype)
+            for name, dtype in LEDGER_COLUMNS.items()
+        }
+        self.size = 0
+        self.traders = []
+        self.exchanges = []
+        self.trader_index = {}
+        self.exchange_index = {}
+
+    # pylint: disable=too-many-arguments
+    def record(self, timestep, trader, exchange, sell_reserve_asset,
+               sell_amount, buy_amount, spread):
+        """
+        Appends a swap, its price is in stable per reserve asset
+        """
+        if self.size == len(self.columns['timestep']):
+            self.grow()
+        if sell_reserve_asset:
+            price = buy_amount / sell_amount
+        else:
+            price = sell_amount / buy_amount
+
+        row = self.size
+        columns = self.columns
+        columns['timestep'][row] = timestep
+        columns['trader'][row] = self.label_index(trader, self.traders, self.trader_index)
+        columns['exchange'][row] = self.label_index(
+            str(exchange), self.exchanges, self.exchange_index)
+        columns['sell_reserve_asset'][row] = sell_reserve_asset
+        columns['sell_amount'][row] = sell_amount
+        columns['buy_amount'][row] = buy_amount
+        columns['price'][row] = price
+        columns['spread_fee'][row] = sell_amount * spread
+        self.size += 1
+
+    def grow(self):
+        capacity = 2 * len(self.columns['timestep'])
+        for name, column in self.columns.items():
+            self.columns[name] = np.resize(column, capacity)
+
+    @staticmethod
+    def label_index(label: str, labels: List[str], index: Dict[str, int]) -> int:
+        if label not in index:
+            index[label] = len(labels)
+            labels.append(label)
+        return index[label]
+
+    def __len__(self):
+        return self.size
+
+    def flush(self) -> Dict[str, Any]:
+        """
+        Returns the recorded columns trimmed to the number of trades
+        together with the trader and exchange labels
+        """
+        return {
+            'columns': {name: column[:self.size].copy() for name, column in self.columns.items()},
+            'traders': list(self.traders),
+            'exchanges': list(self.exchanges),
+        }
+
+
+def ledger_frame(flushed: Dict[str, Any]) -> pd.DataFrame:
+    df = pd.DataFrame(flushed['columns'])
+    df['trader'] = pd.Categorical.from_codes(df['trader'], flushed['traders'])
+    df['exchange'] = pd.Categorical.from_codes(df['exchange'], flushed['exchanges'])
+    return df
+
+
+class TradeLedgerHook(RunHook):
+    """
+    Attaches a fresh ledger to the mento generator of the run
+    and moves it into the run record once the run completes
+    """
+    ledger: TradeLedger
+
+    def __init__(self):
+        self.ledger = TradeLedger()
+
+    def before_run(self, run_execution: RunExecution):
+        # pylint: disable=import-outside-toplevel
+        from model.generators.mento import MentoExchangeGenerator
+        container = run_execution.run_args.parameters[GENERATOR_CONTAINER_PARAM_KEY]
+        container.get(MentoExchangeGenerator).ledger = self.ledger
+
+    def after_run(self, run_execution: RunExecution):
+        run_execution.record[TRADES_RECORD_KEY] = self.ledger.flush()
+
+
+def trade_table(exceptions: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Returns the trades of every run in the exceptions of an executed
+    simulation or experiment
+    """
+    frames = [
+        ledger_frame(record[TRADES_RECORD_KEY]).assign(
+            simulation=record['simulation'],
+            subset=record['subset'],
+            run=record['run'] + 1,
+        )
+        for record in exceptions
+        if TRADES_RECORD_KEY in record
+    ]
+    if not frames:
+        return pd.DataFrame(columns=['simulation', 'subset', 'run', *LEDGER_COLUMNS])
+    df = pd.concat(frames, ignore_index=True)
+    return df[['simulation', 'subset', 'run', *LEDGER_COLUMNS]]
@@ -0,0 +1,63 @@
+"""
+A run of the default model that has been warmed up for a few
+timesteps, so generators and state are in the shape they have in the
+middle of a simulation. Used by tests and benchmarks of the parts of
+a run.
+"""
+import copy
+from typing import Any, Dict
+
+from radcad import wrappers
+from radcad.core import generate_parameter_sweep
+
+from model.state_update_blocks import state_update_blocks
+from model.state_variables import initial_state
+from model.system_parameters import parameters
+from .engine import SimulationConfig, __prepare_simulation_config__
+from .execution import RunExecution
+from .generator_container import GENERATOR_CONTAINER_PARAM_KEY, GeneratorContainer
+
+
+class WarmRun():
+    """
+    A RunExecution of the default model advanced by some timesteps
+    """
+    run_execution: RunExecution
+
+    def __init__(self, timesteps: int = 20, **param_overrides):
+        params = copy.deepcopy(generate_parameter_sweep(parameters)[0])
+        params.update(param_overrides)
+        config = __prepare_simulation_config__(SimulationConfig(
+            params,
+            initial_state,
+            state_update_blocks,
+            0
+        ))
+        self.run_execution = RunExecution(wrappers.RunArgs(
+            0, timesteps, 0, 0,
+            copy.deepcopy(config.state),
+            config.state_update_blocks,
+            config.params,
+            False,
+            True
+        ))
+        self.run_execution.execute()
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return self.run_execution.run_args.parameters
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        return self.run_execution.state
+
+    @property
+    def state_history(self):
+        return self.run_execution.result
+
+    @property
+    def container(self) -> GeneratorContainer:
+        return self.params[GENERATOR_CONTAINER_PARAM_KEY]
+
+    def get(self, generator_class):
+        return self.container.get(generator_class)
@@ -0,0 +1,76 @@
+"""
+Test the streaming aggregation of Monte Carlo runs
+"""
+import copy
+import pickle
+
+import numpy as np
+import pandas as pd
+from radcad import Backend, Simulation
+
+from model import model
+from model.utils.aggregation import Aggregation, P2Quantiles, RunningMoments, state_variable
+from model.utils.engine import Engine
+from model.utils.generator_container import GENERATOR_CONTAINER_PARAM_KEY
+
+
+def test_p2_quantiles_approximate_sample_quantiles():
+    """
+    Check the estimates against the quantiles of the whole sample
+    """
+    rng = np.random.default_rng(1)
+    samples = rng.lognormal(size=(5000, 3))
+    samples[:100, 2] = np.nan
+    quantiles = [0.05, 0.5, 0.95]
+    estimator = P2Quantiles(quantiles, 3)
+    moments = RunningMoments(3)
+    for row in samples:
+        estimator.add(row)
+        moments.add(row)
+
+    expected = np.nanquantile(samples, quantiles, axis=0)
+    assert np.allclose(estimator.values(), expected, rtol=0.05)
+    assert np.allclose(moments.mean, np.nanmean(samples, axis=0))
+    assert np.allclose(moments.variance(), np.nanvar(samples, axis=0, ddof=1))
+    assert list(moments.count) == [5000, 5000, 4900]
+
+
+def test_p2_quantiles_are_exact_for_few_observations():
+    estimator = P2Quantiles([0.5], 1)
+    for value in [3, 1, 2]:
+        estimator.add(np.array([value], dtype=float))
+    assert estimator.values()[0, 0] == 2
+
+
+def test_engine_summarizes_runs_without_keeping_them():
+    """
+    Check that the engine returns summaries instead of the state histories
+    """
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=10, runs=3)
+    simulation.engine = Engine(
+        backend=Backend.SINGLE_PROCESS,
+        deepcopy=False,
+        drop_substeps=True,
+        aggregation=Aggregation(
+            metrics={'floating_supply_stables_in_usd':
+                     state_variable('floating_supply_stables_in_usd')},
+            quantiles=(0.5,),
+            keep_results=True,
+        )
+    )
+    df = pd.DataFrame(simulation.run())
+    summary = simulation.engine.aggregator.summary()
+
+    assert len(summary) == 11
+    assert (summary['count'] == 3).all()
+    expected = df.groupby('timestep')['floating_supply_stables_in_usd']
+    assert np.allclose(summary['mean'], expected.mean())
+    assert np.allclose(summary['p50'], expected.median())
+
+    simulation.engine.aggregation = simulation.engine.aggregation._replace(keep_results=False)
+    assert simulation.run() == []
+    assert len(simulation.engine.aggregator.summary()) == 11
+    # records leave out the generators, with the market paths they're megabytes
+    for record in simulation.exceptions:
+        assert GENERATOR_CONTAINER_PARAM_KEY not in record['parameters']
+        assert len(pickle.dumps(record)) < 100_000
@@ -0,0 +1,48 @@
+"""
+Test the benchmark suite's result comparison and scenarios
+"""
+from benchmarks.end_to_end import blocks_per_second
+from benchmarks.suite import compare, time_callable
+
+
+def results(**values):
+    return {
+        'meta': {},
+        'benchmarks': {
+            name: {'value': value, 'unit': unit, 'higher_is_better': unit == 'blocks/s'}
+            for name, (value, unit) in values.items()
+        }
+    }
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    """
+    Check that slowdowns and throughput drops beyond the tolerance are flagged
+    """
+    base = results(fast=(1.0, 's/call'), slow=(1.0, 's/call'), throughput=(100, 'blocks/s'))
+    new = results(fast=(1.05, 's/call'), slow=(1.5, 's/call'), throughput=(50, 'blocks/s'))
+
+    rows = {row['name']: row for row in compare(base, new, tolerance=0.1)}
+
+    assert not rows['fast']['regression']
+    assert rows['slow']['regression']
+    assert rows['throughput']['regression']
+    assert rows['throughput']['slowdown'] == 2
+
+
+def test_compare_ignores_benchmarks_missing_in_base():
+    assert not compare(results(), results(new=(1.0, 's/call')), tolerance=0.1)
+
+
+def test_time_callable_reports_time_per_call():
+    timing = time_callable(lambda: None, repeat=2)
+    assert timing['repeat'] == 2
+    assert 0 < timing['value'] <= timing['median']
+
+
+def test_end_to_end_traders_trade():
+    """
+    The traders of the end-to-end scenario find arbitrage opportunities,
+    so their number changes the work done per block
+    """
+    assert blocks_per_second(10, 1, 5)['trades'] > blocks_per_second(1, 1, 5)['trades'] > 0
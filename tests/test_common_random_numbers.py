@@ -0,0 +1,109 @@
+"""
+Test common random numbers across parameter subsets
+"""
+import copy
+
+import pandas as pd
+from radcad import Backend, Simulation
+
+from experiments import simulation_configuration
+from model import model
+from model.generators.markets import MarketPriceGenerator
+from model.types.base import CryptoAsset, Fiat, MarketPriceModel
+from model.types.pair import Pair
+from model.utils.aggregation import Aggregation, market_price, state_variable
+from model.utils.data_feed import DATA_FOLDER, load_data_feed
+from model.utils.engine import Engine
+from model.utils.rng_provider import RNGProvider
+
+CELO_USD = Pair(CryptoAsset.CELO, Fiat.USD)
+
+
+def test_subsets_share_streams_unless_independent():
+    def draw(subset):
+        return RNGProvider(1, 2, subset).get_rng("context").random(3)
+
+    assert (draw(None) == RNGProvider(1, 2).get_rng("context").random(3)).all()
+    assert not (draw(None) == draw(0)).any()
+    assert not (draw(0) == draw(1)).any()
+
+
+def test_data_feed_follows_the_data_source(monkeypatch):
+    """
+    Switching the data source at runtime loads the feed of the new source
+    """
+    configured = simulation_configuration.DATA_SOURCE
+    other = 'mock' if configured == 'historical' else 'historical'
+    feed = load_data_feed(DATA_FOLDER)
+    monkeypatch.setattr(simulation_configuration, 'DATA_SOURCE', other)
+    other_feed = load_data_feed(DATA_FOLDER)
+    assert other_feed.data_source == other
+    assert other_feed.assets != feed.assets
+    monkeypatch.setattr(simulation_configuration, 'DATA_SOURCE', configured)
+    assert load_data_feed(DATA_FOLDER) is feed
+
+
+def test_historical_resampling_is_seeded_by_the_run():
+    def increments(run):
+        generator = MarketPriceGenerator(MarketPriceModel.HIST_SIM, [], RNGProvider(1, run))
+        generator.historical_returns()
+        return generator.increments
+
+    first, second = increments(0), increments(1)
+    for asset, values in increments(0).items():
+        assert (values == first[asset]).all()
+        assert (values != second[asset]).any()
+
+
+def sweep(runs, **engine_options):
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=5, runs=runs)
+    simulation.model.params.update({
+        'reserve_target_weight': [0.5, 0.75, 1.0],
+    })
+    simulation.engine = Engine(backend=Backend.SINGLE_PROCESS, drop_substeps=True,
+                               **engine_options)
+    return simulation
+
+
+def test_subsets_draw_common_market_paths():
+    df = pd.DataFrame(sweep(2).run())
+    prices = df.assign(price=df['market_price'].map(lambda prices: prices[CELO_USD]))
+    paths = prices.pivot_table(index=['run', 'timestep'], columns='subset', values='price')
+    assert paths.nunique(axis=1).eq(1).all()
+    assert paths.loc[1].ne(paths.loc[2]).any(axis=None)
+
+    df = pd.DataFrame(sweep(1, common_random_numbers=False).run())
+    final = df[df['timestep'] == 5]['market_price'].map(lambda prices: prices[CELO_USD])
+    assert final.nunique() == 3
+
+
+def test_paired_summary_compares_subsets_run_by_run():
+    """
+    Check that every run is paired with its baseline and that prices are
+    equal across subsets under common random numbers
+    """
+    simulation = sweep(4, aggregation=Aggregation(
+        metrics={
+            'market_price_celo_usd': market_price(CELO_USD),
+            'reserve_ratio': state_variable('reserve_ratio'),
+        },
+        quantiles=(0.5,),
+        baseline_subset=0,
+    ))
+    simulation.run()
+    aggregator = simulation.engine.aggregator
+    paired = aggregator.paired_summary()
+
+    assert sorted(paired['subset'].unique()) == [1, 2]
+    assert (paired['count'] == 4).all()
+    prices = paired[paired['metric'] == 'market_price_celo_usd']
+    assert (prices['mean_difference'] == 0).all()
+    assert not aggregator.unpaired
+
+
+def test_swept_seeds_draw_independent_streams():
+    simulation = sweep(1)
+    simulation.model.params['rng_seed'] = [1, 2]
+    df = pd.DataFrame(simulation.run())
+    final = df[df['timestep'] == 5]['market_price'].map(lambda prices: prices[CELO_USD])
+    assert final.nunique() == 2
@@ -0,0 +1,115 @@
+"""
+Test adaptive Monte Carlo run counts
+"""
+import copy
+
+import numpy as np
+import pathos.multiprocessing
+from pathos.multiprocessing import ProcessPool
+from radcad import Backend, Simulation
+
+from model import model
+from model.types.base import CryptoAsset, Fiat
+from model.types.pair import Pair
+from model.utils.aggregation import Aggregation, market_price
+from model.utils.convergence import (
+    Convergence, ConvergenceMonitor, PrecisionTarget, target_value
+)
+from model.utils.engine import Engine
+
+CELO_USD = Pair(CryptoAsset.CELO, Fiat.USD)
+
+
+def test_confidence_intervals_of_means_and_quantiles():
+    """
+    Check the intervals of a mean and a quantile target
+    """
+    monitor = ConvergenceMonitor(
+        Convergence(targets=[]), Aggregation(metrics={'value': None})
+    )
+    values = np.random.default_rng(2).normal(size=10000)
+    mean = monitor.target_precision(PrecisionTarget('value', 0.05), values)
+    assert abs(mean.estimate) < mean.half_width < 0.05
+    assert mean.converged
+    assert np.isclose(mean.half_width, 1.96 / 100, rtol=0.05)
+
+    quantile = monitor.target_precision(
+        PrecisionTarget('value', 0.01, statistic=0.05), values[:100])
+    assert not quantile.converged
+    assert quantile.half_width > 0.1
+
+
+def test_target_value_defaults_to_the_last_recorded_timestep():
+    values = np.array([np.nan, 1, 2, np.nan])
+    assert target_value(values, None) == 2
+    assert target_value(values, 1) == 1
+
+
+def volatility_sweep(backend=Backend.SINGLE_PROCESS, baseline_subset=None):
+    """
+    Simulation of a calm and a volatile CELO price with an unreachable target
+    """
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=3, runs=2)
+    processes = simulation.model.params['market_price_processes'][0]
+    simulation.model.params['market_price_processes'] = [
+        [
+            process._replace(param_2=volatility) if process.pair == CELO_USD else process
+            for process in processes
+        ]
+        for volatility in [0, 1]
+    ]
+    simulation.engine = Engine(
+        backend=backend,
+        processes=2,
+        drop_substeps=True,
+        aggregation=Aggregation(
+            metrics={'price': market_price(CELO_USD)}, baseline_subset=baseline_subset),
+        convergence=Convergence(
+            targets=[PrecisionTarget('price', half_width=1e-9)],
+            batch_size=2,
+            max_runs=6,
+        ),
+    )
+    return simulation
+
+
+def test_noisy_subsets_get_more_runs():
+    """
+    Check that only the volatile subset gets further runs
+    """
+    simulation = volatility_sweep()
+    simulation.run()
+
+    report = simulation.engine.convergence_monitor.report()
+    assert list(report['runs']) == [2, 6]
+    assert list(report['converged']) == [True, False]
+    summary = simulation.engine.aggregator.summary()
+    assert list(summary.groupby('subset')['count'].max()) == [2, 6]
+    runs = [(record['subset'], record['run']) for record in simulation.exceptions]
+    assert runs == sorted(runs, key=lambda run: (run[1], run[0]))
+
+
+def test_baseline_runs_while_paired_subsets_do(monkeypatch):
+    """
+    Check that the baseline keeps pace with the subsets compared with it in one pool
+    """
+    pools = []
+
+    class CountedPool(ProcessPool):  # pylint: disable=too-few-public-methods
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+    monkeypatch.setattr(pathos.multiprocessing, 'ProcessPool', CountedPool)
+    simulation = volatility_sweep(Backend.PATHOS, baseline_subset=0)
+    simulation.run()
+
+    # the baseline converged after the first batch but is needed for the pairs
+    report = simulation.engine.convergence_monitor.report()
+    assert list(report['runs']) == [6, 6]
+    aggregator = simulation.engine.aggregator
+    assert list(aggregator.paired_summary().groupby('subset')['count'].max()) == [6]
+    assert not aggregator.unpaired
+    # one pool for all three batches
+    assert len(pools) == 1
+    assert simulation.engine.pool is None
@@ -0,0 +1,47 @@
+"""
+Test executing simulations in the warm pool daemon
+"""
+import copy
+
+import pandas as pd
+from radcad import Backend, Simulation
+
+from model import model
+from model.utils.aggregation import Aggregation
+from model.utils.daemon import run_remote, shutdown, start_daemon, stream_runs
+from model.utils.engine import Engine
+from experiments.run import run
+
+
+def test_daemon_executes_simulations(tmp_path):
+    """
+    Check that simulations executed in the daemon match local ones
+    """
+    address = str(tmp_path / 'pool.sock')
+    daemon = start_daemon(address, processes=2)
+    try:
+        simulation = Simulation(model=copy.deepcopy(model), timesteps=3, runs=2)
+        simulation.model.params['reserve_target_weight'] = [0.5, 0.75]
+        simulation.engine = Engine(backend=Backend.SINGLE_PROCESS, drop_substeps=True)
+        expected = simulation.run()
+
+        simulation.engine = Engine(backend=Backend.PATHOS, drop_substeps=True)
+        assert run_remote(simulation, address) == expected
+        assert [(record['run'], record['subset']) for record in simulation.exceptions] == [
+            (0, 0), (0, 1), (1, 0), (1, 1)
+        ]
+
+        simulation.engine = Engine(
+            backend=Backend.PATHOS, drop_substeps=True, aggregation=Aggregation())
+        assert len(list(stream_runs(simulation, address))) == 4
+        assert not simulation.engine.aggregator.summary().empty
+
+        simulation.engine = Engine(backend=Backend.SINGLE_PROCESS, drop_substeps=True)
+        local_df, _exceptions = run(simulation)
+        simulation.engine = Engine(backend=Backend.PATHOS, drop_substeps=True)
+        df, exceptions = run(simulation, pool=address)
+        pd.testing.assert_frame_equal(df, local_df)
+        assert len(exceptions) == 4
+    finally:
+        shutdown(address)
+        daemon.wait(timeout=60)
@@ -0,0 +1,65 @@
+"""
+Test the rolling digests of run states
+"""
+import copy
+
+from radcad import Backend, Simulation
+
+from model import model
+from model.types.base import MarketPriceModel
+from model.utils.digest import (
+    DIGEST_RECORD_KEY, StateDigest, digest_table, divergences, first_divergence, state_bytes
+)
+from model.utils.engine import Engine
+
+
+def run_digests(backend=Backend.SINGLE_PROCESS, **params):
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=6, runs=2)
+    simulation.model.params.update({key: [value] for key, value in params.items()})
+    simulation.engine = Engine(
+        backend=backend,
+        drop_substeps=True,
+        digest=StateDigest(checkpoint_interval=2),
+    )
+    simulation.run()
+    return simulation.exceptions
+
+
+def test_digests_are_deterministic():
+    expected = run_digests()
+    records = [record[DIGEST_RECORD_KEY] for record in expected]
+    assert [checkpoint for checkpoint, _ in records[0]['checkpoints']] == [0, 2, 4, 6]
+    assert records[0]['digest'] == records[0]['checkpoints'][-1][1]
+    assert records[0]['digest'] != records[1]['digest']
+
+    actual = run_digests(Backend.PATHOS)
+    assert digest_table(actual).equals(digest_table(expected))
+    assert divergences(expected, actual).empty
+
+
+def test_divergences_are_localized():
+    """
+    Check that diverging runs are reported with the checkpoints around the divergence
+    """
+    expected = run_digests()
+    actual = run_digests(market_price_model=MarketPriceModel.HIST_SIM)
+    diverged = divergences(expected, actual)
+    assert len(diverged) == 2
+    # the initial states are equal, prices differ from the first timestep
+    assert list(diverged['last_equal_timestep']) == [0, 0]
+    assert list(diverged['first_different_timestep']) == [2, 2]
+
+    digest = {'timestep': 9, 'digest': 'c', 'checkpoints': [(0, 'a'), (4, 'b'), (8, 'c')]}
+    assert first_divergence(digest, digest) is None
+    assert first_divergence(digest, {**digest, 'digest': 'd', 'checkpoints': [
+        (0, 'a'), (4, 'b'), (8, 'e')]}) == (4, 8)
+    assert first_divergence(digest, {**digest, 'digest': 'd'}) == (8, 9)
+
+
+def test_floats_are_quantized():
+    digest = StateDigest(precision=6)
+    state = {'timestep': 1, 'run': 1, 'reserve_ratio': 0.1 + 0.2}
+    assert state_bytes(state, digest) == state_bytes(
+        {**state, 'run': 2, 'reserve_ratio': 0.3}, digest)
+    assert state_bytes(state, digest) != state_bytes({**state, 'reserve_ratio': 0.31}, digest)
+    assert state_bytes({'value': -0.0}, digest) == state_bytes({'value': 0.0}, digest)
@@ -0,0 +1,30 @@
+"""
+Test the execution of runs on a local dask cluster
+"""
+import copy
+
+import pytest
+from radcad import Backend, Simulation
+
+from model import model
+from model.utils.distributed import Distributed
+from model.utils.engine import Engine
+
+pytest.importorskip('dask.distributed')
+
+
+def test_distributed_runs_match_single_process():
+    """
+    Check that distributed runs return the single process results in run order
+    """
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=3, runs=3)
+    simulation.engine = Engine(backend=Backend.SINGLE_PROCESS, drop_substeps=True)
+    expected = simulation.run()
+
+    simulation.engine = Engine(
+        processes=2,
+        drop_substeps=True,
+        distributed=Distributed(window=2),
+    )
+    assert simulation.run() == expected
+    assert [record['run'] for record in simulation.exceptions] == [0, 1, 2]
@@ -0,0 +1,58 @@
+"""
+Test forking a simulation from a shared warm-up
+"""
+import copy
+
+import pandas as pd
+from radcad import Backend, Simulation
+
+from model import model
+from model.types.base import MentoExchange
+from model.utils.engine import Engine
+
+
+def create_simulation(timesteps=10):
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=timesteps, runs=1)
+    simulation.engine = Engine(backend=Backend.SINGLE_PROCESS, deepcopy=False, drop_substeps=True)
+    return simulation
+
+
+def test_fork_without_overrides_matches_full_run():
+    """
+    A branch that doesn't override any parameters continues
+    exactly like the unforked simulation
+    """
+    simulation = create_simulation()
+    df_full = pd.DataFrame(simulation.run())
+
+    simulation = create_simulation()
+    df_forked = pd.DataFrame(simulation.engine.run_forked(simulation, 5, [{}, {}]))
+
+    assert set(df_forked['subset']) == {0, 1}
+    for subset in [0, 1]:
+        df_subset = df_forked.query(f'subset == {subset}')
+        assert list(df_subset['timestep']) == list(df_full['timestep'])
+        assert list(df_subset['market_price']) == list(df_full['market_price'])
+        assert list(df_subset['mento_buckets']) == list(df_full['mento_buckets'])
+
+
+def test_fork_applies_overrides_after_warmup():
+    """
+    Branches share the warm-up and diverge once their parameters differ
+    """
+    # Buckets are reset every 60 timesteps
+    simulation = create_simulation(timesteps=65)
+    exchanges_config = simulation.model.params['mento_exchanges_config'][0]
+    high_reserve_fraction = {
+        exchange: config._replace(reserve_fraction=2 * config.reserve_fraction)
+        for exchange, config in exchanges_config.items()
+    }
+    df_forked = pd.DataFrame(simulation.engine.run_forked(
+        simulation, 5, [{}, {'mento_exchanges_config': high_reserve_fraction}]))
+
+    def reserve_asset_bucket(subset, timestep):
+        state = df_forked.query(f'subset == {subset} and timestep == {timestep}').iloc[0]
+        return state['mento_buckets'][MentoExchange.CUSD_CELO]['reserve_asset']
+
+    assert reserve_asset_bucket(0, 5) == reserve_asset_bucket(1, 5)
+    assert reserve_asset_bucket(1, 65) > reserve_asset_bucket(0, 65)
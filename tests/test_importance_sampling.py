@@ -0,0 +1,66 @@
+"""
+Test importance sampling of rare market events
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+from radcad import Backend, Simulation
+from scipy.stats import norm
+
+from model import model
+from model.generators.markets import MarketPriceGenerator
+from model.types.base import CryptoAsset, Fiat
+from model.types.configs import ImportanceSamplingConfig
+from model.types.pair import Pair
+from model.utils.engine import Engine
+from model.utils.importance_sampling import (
+    MARKET_PRICE_GENERATOR, WEIGHT_RECORD_KEY, event_probability, tilt
+)
+
+CELO_USD = Pair(CryptoAsset.CELO, Fiat.USD)
+
+
+def test_tilted_estimates_recover_rare_probabilities():
+    """
+    Check that weighted estimates of a tilted sample match the untilted probability
+    """
+    # P(sum of 16 standard normals < -12) is about 1.3e-3
+    steps, runs, threshold = 16, 400, -12
+    normals = np.random.default_rng(5).standard_normal((runs, steps, 1))
+    rows, exceptions = [], []
+    for run in range(runs):
+        tilted, log_weights = tilt(normals[run], [threshold / steps])
+        rows.append({'simulation': 0, 'subset': 0, 'run': run + 1, 'sum': tilted.sum()})
+        exceptions.append({
+            'simulation': 0, 'subset': 0, 'run': run, WEIGHT_RECORD_KEY: log_weights[steps]
+        })
+    estimate = event_probability(
+        pd.DataFrame(rows), exceptions, lambda states: states['sum'].iloc[-1] < threshold
+    ).iloc[0]
+
+    expected = norm.cdf(threshold / np.sqrt(steps))
+    assert estimate['events'] > runs / 4
+    assert estimate['ci_low'] < expected < estimate['ci_high']
+    assert estimate['stderr'] < expected / 5
+
+
+def test_engine_records_the_weight_of_tilted_runs():
+    """
+    Check that tilted runs record their weight and move prices towards the event
+    """
+    def run(importance_sampling):
+        simulation = Simulation(model=copy.deepcopy(model), timesteps=5, runs=2)
+        simulation.model.params['importance_sampling'] = [importance_sampling]
+        simulation.engine = Engine(backend=Backend.SINGLE_PROCESS, drop_substeps=True)
+        result = simulation.run()
+        final = [state['market_price'][CELO_USD] for state in result if state['timestep'] == 5]
+        return final, simulation.exceptions
+
+    assert MarketPriceGenerator.__name__ == MARKET_PRICE_GENERATOR
+    prices, exceptions = run(None)
+    assert not any(WEIGHT_RECORD_KEY in record for record in exceptions)
+
+    tilted_prices, exceptions = run(ImportanceSamplingConfig(shift={CELO_USD: -0.5}))
+    assert all(record[WEIGHT_RECORD_KEY] != 0 for record in exceptions)
+    assert all(tilted < price for tilted, price in zip(tilted_prices, prices))
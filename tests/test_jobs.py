@@ -0,0 +1,81 @@
+"""
+Test the queue of experiment jobs
+"""
+import io
+
+import pandas as pd
+import pytest
+
+from model.types.base import MarketPriceModel
+from experiments.job_server import create_app
+from experiments.jobs import JobQueue, JobSpec, JobState
+
+
+def test_specs_are_validated():
+    """
+    Check that invalid specs are rejected and enum values converted
+    """
+    spec = JobSpec.from_json({
+        'parameters': {'market_price_model': ['hist_sim'], 'reserve_target_weight': [0.5, 1.0]},
+        'timesteps': 10,
+    })
+    assert spec.parameters['market_price_model'] == [MarketPriceModel.HIST_SIM]
+    assert spec.params()['reserve_target_weight'] == [0.5, 1.0]
+
+    for invalid in [
+        {'parameters': {'unknown': [1]}},
+        {'parameters': {'reserve_target_weight': 0.5}},
+        {'parameters': {'traders': [[]]}},
+        {'timesteps': 0},
+        {'seed': 1},
+    ]:
+        with pytest.raises(ValueError):
+            JobSpec.from_json(invalid)
+
+
+def test_jobs_run_in_order(tmp_path):
+    """
+    Check that queued jobs run one after another and report their progress
+    """
+    job_queue = JobQueue(tmp_path, processes=1)
+    try:
+        first = job_queue.submit(JobSpec({'reserve_target_weight': [0.5, 0.75]}, 3, 2))
+        second = job_queue.submit(JobSpec({'rng_seed': [-1]}, 3, 1))
+        assert second.done.wait(timeout=600)
+    finally:
+        job_queue.close()
+
+    assert first.finished <= second.started
+    status = first.status()
+    assert status['state'] == JobState.DONE.value
+    assert status['completed_runs'] == status['runs'] == 4
+    assert status['subset_completion'] == {0: 1.0, 1: 1.0}
+    assert status['blocks_per_second'] > 0
+    df = pd.read_parquet(first.results)
+    assert sorted(df['reserve_target_weight'].unique()) == [0.5, 0.75]
+    assert len(df) == 2 * 2 * 3
+
+    assert second.state == JobState.FAILED
+    assert second.error
+
+
+def test_server_reports_jobs(tmp_path):
+    """
+    Check the HTTP routes of the job server
+    """
+    job_queue = JobQueue(tmp_path, processes=1)
+    try:
+        client = create_app(job_queue).test_client()
+        assert client.post('/jobs', json={'parameters': {'unknown': [1]}}).status_code == 400
+        response = client.post('/jobs', json={'timesteps': 2, 'runs': 1})
+        assert response.status_code == 202
+        job_id = response.get_json()['id']
+        job_queue.get(job_id).done.wait(timeout=600)
+        assert client.get(f'/jobs/{job_id}').get_json()['state'] == JobState.DONE.value
+        results = client.get(f'/jobs/{job_id}/results')
+        assert results.status_code == 200
+        assert len(pd.read_parquet(io.BytesIO(results.data))) == 2
+        assert [job['id'] for job in client.get('/jobs').get_json()] == [job_id]
+        assert client.get('/jobs/missing').status_code == 404
+    finally:
+        job_queue.close()
@@ -0,0 +1,44 @@
+"""
+Test the market observables shared by trader strategies
+"""
+from model.generators.mento import MentoExchangeGenerator
+from model.system_parameters import parameters
+from model.types.base import (
+    CryptoAsset, Fiat, MentoBuckets, MentoExchange, Stable, TradingRegime
+)
+from model.types.pair import Pair
+
+EXCHANGE = MentoExchange.CUSD_CELO
+
+
+def create_state(timestep, stable_bucket):
+    return {
+        'timestep': timestep,
+        'market_price': {
+            Pair(CryptoAsset.CELO, Fiat.USD): 3,
+            Pair(Stable.CUSD, Fiat.USD): 1,
+        },
+        'mento_buckets': {
+            EXCHANGE: MentoBuckets(stable=stable_bucket, reserve_asset=1000),
+        },
+    }
+
+
+def test_observables_are_cached_until_the_buckets_move():
+    """
+    Check that observables are reused until an exchange moves the buckets
+    """
+    mento = MentoExchangeGenerator(
+        parameters['mento_exchanges_config'][0],
+        set(parameters['mento_exchanges_active'][0])
+    )
+    state = create_state(1, 3000)
+    observables = mento.observables(EXCHANGE, state)
+    assert observables.regime == TradingRegime.PASS
+    assert mento.observables(EXCHANGE, create_state(1, 3000)) is observables
+
+    mento.exchange(EXCHANGE, 100, True, state)
+    assert EXCHANGE not in mento.observables_cache
+    assert mento.observables(EXCHANGE, create_state(1, 2000)).regime == TradingRegime.SELL_STABLE
+    assert mento.observables(EXCHANGE, create_state(2, 4000)).regime == \
+        TradingRegime.SELL_RESERVE_ASSET
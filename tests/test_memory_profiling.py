@@ -0,0 +1,49 @@
+"""
+Test the memory profiling mode of the Engine
+"""
+import copy
+import json
+
+import numpy as np
+from radcad import Backend, Simulation
+
+from model import model
+from model.utils.engine import Engine
+from model.utils.memory_profiling import (
+    MemoryProfile, deep_sizeof, memory_table, write_memory_report
+)
+
+
+def test_deep_sizeof_counts_shared_objects_once():
+    array = np.zeros(1000)
+    seen = set()
+    first = deep_sizeof({'a': array}, seen)
+    second = deep_sizeof({'b': array}, seen)
+    assert first > array.nbytes
+    assert second < array.nbytes
+
+
+def test_memory_profile_samples_runs(tmp_path):
+    """
+    Runs are sampled at the interval and after the last timestep,
+    with the footprint attributed to state variables and generators
+    """
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=10, runs=1)
+    simulation.engine = Engine(
+        backend=Backend.SINGLE_PROCESS,
+        deepcopy=False,
+        drop_substeps=True,
+        memory_profile=MemoryProfile(interval=4, top=3)
+    )
+    simulation.run()
+
+    df = memory_table(simulation.exceptions)
+    assert list(df['timestep']) == [0, 4, 8, 10]
+    assert (df['history.market_price'].diff().dropna() > 0).all()
+    assert df['generator.MarketPriceGenerator'].iloc[-1] > 0
+
+    with open(write_memory_report(simulation.exceptions, tmp_path / 'memory.json'),
+              encoding='utf-8') as file:
+        report = json.load(file)
+    assert len(report[0]['top_allocations']) == 3
+    assert report[0]['peak_traced'] > 0
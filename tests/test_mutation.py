@@ -1,16 +1,19 @@
-import pytest
 from copy import deepcopy
 import time
 import pandas as pd
 from pandas._testing import assert_frame_equal
 from radcad import Simulation
 
-import experiments.templates.time_domain_analysis as time_domain_analysis
+import experiments.default_experiment as default_experiment
 
 
 def test_deepcopy():
-    simulation_1: Simulation = deepcopy(time_domain_analysis.experiment.simulations[0])
-    simulation_2: Simulation = deepcopy(time_domain_analysis.experiment.simulations[0])
+    simulation_1: Simulation = deepcopy(default_experiment.experiment.simulations[0])
+    simulation_2: Simulation = deepcopy(default_experiment.experiment.simulations[0])
+    # the default experiment simulates two days of blocks, a slice suffices
+    # to compare the two copy modes
+    simulation_1.timesteps = simulation_2.timesteps = 100
+    simulation_1.runs = simulation_2.runs = 1
 
     exec_time_1 = time.time()
     simulation_1.engine.deepcopy = True
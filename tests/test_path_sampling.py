@@ -0,0 +1,74 @@
+"""
+Test antithetic and quasi-Monte Carlo market path sampling
+"""
+import copy
+
+import numpy as np
+import QuantLib as ql
+from radcad import Backend, Simulation
+
+from model import model
+from model.system_parameters import parameters
+from model.types.base import MarketPriceModel
+from model.utils.engine import Engine
+from model.utils.path_sampling import (
+    QMC_BLOCK_SIZE, antithetic_normals, brownian_bridge, sobol_normals
+)
+from model.utils.quantlib_wrapper import QuantLibWrapper
+from model.utils.rng_provider import RNGProvider
+
+
+def test_brownian_bridge_keeps_increments_independent():
+    normals = np.random.default_rng(0).standard_normal((7, 20000))
+    increments = brownian_bridge(normals)
+    assert np.allclose(np.cov(increments), np.eye(7), atol=0.05)
+    assert np.allclose(increments.sum(axis=0), np.sqrt(7) * normals[0])
+
+
+def test_evolved_paths_match_quantlib_paths():
+    """
+    Check that paths evolved at once match QuantLib's path generator
+    """
+    steps = 20
+    processes = parameters['market_price_processes'][0]
+    wrapper = QuantLibWrapper(
+        processes, parameters['market_price_correlation_matrix'][0], steps, 42
+    )
+    generator = ql.GaussianRandomSequenceGenerator(ql.UniformRandomSequenceGenerator(
+        steps * len(processes), ql.UniformRandomGenerator(seed=42)))
+    sequence = generator.nextSequence()
+    normals = np.array(list(sequence.value())).reshape(steps, len(processes))
+
+    assert np.allclose(wrapper.evolve_paths(normals), wrapper.generate_correlated_paths())
+
+
+def test_antithetic_runs_share_negated_draws():
+    def normals(run):
+        return antithetic_normals(RNGProvider(1, run), 100, 3)
+
+    assert (normals(0) == -normals(1)).all()
+    assert (normals(2) != normals(0)).all()
+
+
+def test_sobol_runs_stratify_the_path_ends():
+    ends = np.array([
+        sobol_normals(RNGProvider(1, run), 16, 2).sum(axis=0)
+        for run in range(QMC_BLOCK_SIZE)
+    ]) / 4
+    strata = np.floor(QMC_BLOCK_SIZE * ql_normal_cdf(ends))
+    for process in range(2):
+        assert sorted(strata[:, process]) == list(range(QMC_BLOCK_SIZE))
+
+
+def ql_normal_cdf(values):
+    cdf = ql.CumulativeNormalDistribution()
+    return np.vectorize(cdf)(values)
+
+
+def test_engine_runs_sobol_paths():
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=3, runs=2)
+    simulation.model.params['market_price_model'] = [MarketPriceModel.SOBOL]
+    simulation.engine = Engine(backend=Backend.SINGLE_PROCESS, drop_substeps=True)
+    result = simulation.run()
+    final = [state['market_price'] for state in result if state['timestep'] == 3]
+    assert final[0] != final[1]
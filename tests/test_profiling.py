@@ -0,0 +1,40 @@
+"""
+Test the timing instrumentation of the Engine
+"""
+import copy
+import json
+
+from radcad import Backend, Simulation
+
+from model import model
+from model.utils.engine import Engine
+from model.utils.profiling import timing_table, write_timing_report
+
+
+def test_timing_covers_generator_policies(tmp_path):
+    """
+    Every policy, including the ones injected by generators, is timed
+    and the report can be exported as CSV and speedscope profile
+    """
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=5, runs=1)
+    simulation.engine = Engine(
+        backend=Backend.SINGLE_PROCESS, deepcopy=False, drop_substeps=True, timing=True)
+    simulation.run()
+
+    df = timing_table(simulation.exceptions)
+    policies = df.query("kind == 'policies'")
+    functions = set(policies['function'])
+    assert any('p_oracle_report' in function for function in functions)
+    assert any('p_bucket_update' in function for function in functions)
+    assert (policies['key'] == 'trader_policy').any()
+    assert (policies['calls'] == 5).all()
+
+    blocks = timing_table(simulation.exceptions, level='block')
+    assert len(blocks) == len(policies) + 1
+
+    csv_path, speedscope_path = write_timing_report(simulation.exceptions, tmp_path)
+    assert csv_path.exists()
+    with open(speedscope_path, encoding='utf-8') as file:
+        profile = json.load(file)
+    assert len(profile['profiles']) == 1
+    assert len(profile['profiles'][0]['samples']) == len(df)
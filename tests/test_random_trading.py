@@ -0,0 +1,54 @@
+"""
+Test the random order stream of RandomTrading
+"""
+import copy
+
+import numpy as np
+from radcad import Backend, Simulation
+
+from model import model
+from model.entities.balance import Balance
+from model.entities.strategies.strategy_random_trader import RandomOrderStream
+from model.types.base import CryptoAsset, MentoExchange, Stable, TraderType
+from model.types.configs import TraderConfig
+from model.utils.engine import Engine
+
+
+def order_stream(chunk_size):
+    return RandomOrderStream(
+        np.random.default_rng(1), np.random.default_rng(2), chunk_size
+    )
+
+
+def test_orders_do_not_depend_on_chunk_size():
+    small_chunks = order_stream(7)
+    large_chunks = order_stream(4096)
+    for index in range(0, 10000, 3):
+        assert small_chunks[index] == large_chunks[index]
+    assert len(small_chunks.sell_amount) == 7
+
+
+def test_random_traders_are_deterministic():
+    """
+    Check that random traders trade the same way in repeated simulations
+    """
+    def run():
+        simulation = Simulation(model=copy.deepcopy(model), timesteps=10, runs=1)
+        simulation.model.params.update({
+            'traders': [[
+                TraderConfig(
+                    trader_type=TraderType.RANDOM_TRADER,
+                    count=2,
+                    balance=Balance({CryptoAsset.CELO: 500000, Stable.CUSD: 1000000}),
+                    exchange=MentoExchange.CUSD_CELO
+                )
+            ]]
+        })
+        simulation.engine = Engine(
+            backend=Backend.SINGLE_PROCESS, deepcopy=False, drop_substeps=True
+        )
+        return [state['mento_buckets'] for state in simulation.run()]
+
+    buckets = run()
+    assert buckets == run()
+    assert buckets[0] != buckets[-1]
@@ -0,0 +1,95 @@
+"""
+Test the in-worker reduction of runs
+"""
+import copy
+import pickle
+
+import numpy as np
+import pandas as pd
+from radcad import Backend, Simulation
+
+from model import model
+from model.entities.balance import Balance
+from model.types.base import CryptoAsset, Fiat, MentoExchange, Stable, TraderType
+from model.types.configs import TraderConfig
+from model.types.pair import Pair
+from model.utils.aggregation import market_price, state_variable
+from model.utils.engine import Engine
+from model.utils.generator_container import GENERATOR_CONTAINER_PARAM_KEY
+from model.utils.reduction import (
+    Reduction, final, maximum, mean, minimum, reduction_table, time_below, trade_volume
+)
+from model.utils.trade_ledger import trade_table
+
+CUSD_USD = Pair(Stable.CUSD, Fiat.USD)
+REDUCERS = {
+    'min_reserve_ratio': minimum(state_variable('reserve_ratio')),
+    'max_reserve_ratio': maximum(state_variable('reserve_ratio')),
+    'mean_reserve_ratio': mean(state_variable('reserve_ratio')),
+    'final_reserve_ratio': final(state_variable('reserve_ratio')),
+    'time_below_peg': time_below(market_price(CUSD_USD), 1.0),
+    'volume': trade_volume(),
+    'arbitrage_volume': trade_volume(TraderType.ARBITRAGE_TRADER),
+}
+
+
+def simulate(keep_results):
+    """
+    Run random traders with the reducers and return the results and run records
+    """
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=5, runs=2)
+    simulation.model.params['traders'] = [
+        simulation.model.params['traders'][0] + [TraderConfig(
+            trader_type=TraderType.RANDOM_TRADER,
+            count=2,
+            balance=Balance({CryptoAsset.CELO: 500000, Stable.CUSD: 1000000}),
+            exchange=MentoExchange.CUSD_CELO
+        )]
+    ]
+    simulation.engine = Engine(
+        backend=Backend.SINGLE_PROCESS,
+        drop_substeps=True,
+        trade_ledger=True,
+        reduction=Reduction(REDUCERS, keep_results=keep_results),
+    )
+    results = simulation.run()
+    return results, simulation.exceptions
+
+
+def test_reducers_match_results():
+    """
+    Check the reduced values against the states and trades of each run
+    """
+    results, exceptions = simulate(keep_results=True)
+    df = pd.DataFrame(results)
+    reduced = reduction_table(exceptions).set_index('run')
+    trades = trade_table(exceptions)
+    assert len(trades)
+    trades['volume'] = np.where(
+        trades['sell_reserve_asset'], trades['sell_amount'] * trades['price'],
+        trades['sell_amount'])
+
+    for run, states in df.groupby('run'):
+        row = reduced.loc[run]
+        assert row['min_reserve_ratio'] == states['reserve_ratio'].min()
+        assert row['max_reserve_ratio'] == states['reserve_ratio'].max()
+        assert np.isclose(row['mean_reserve_ratio'], states['reserve_ratio'].mean())
+        assert row['final_reserve_ratio'] == states['reserve_ratio'].iloc[-1]
+        assert row['time_below_peg'] == sum(
+            price[CUSD_USD] < 1.0 for price in states['market_price'])
+        run_trades = trades[trades['run'] == run]
+        assert np.isclose(row['volume'], run_trades['volume'].sum())
+        arbitrage = run_trades['trader'].astype(str).str.startswith(
+            f"{TraderType.ARBITRAGE_TRADER}_")
+        assert np.isclose(row['arbitrage_volume'], run_trades['volume'][arbitrage].sum())
+        assert row['arbitrage_volume'] < row['volume']
+
+
+def test_reduction_drops_results():
+    results, exceptions = simulate(keep_results=False)
+    assert not results
+    assert len(reduction_table(exceptions)) == 2
+    # records leave out the generators, with the market paths they're megabytes
+    for record in exceptions:
+        assert GENERATOR_CONTAINER_PARAM_KEY not in record['parameters']
+        assert len(pickle.dumps(record)) < 100_000
@@ -0,0 +1,61 @@
+"""
+Test the content-addressed result cache
+"""
+import copy
+
+from radcad import Backend, Simulation
+
+from experiments import simulation_configuration
+from model import model
+from model.types.base import MentoExchange
+from model.utils.engine import Engine
+from model.utils.fingerprint import data_fingerprint, fingerprint
+from model.utils.result_cache import ResultCache
+
+
+def test_fingerprint_ignores_dict_order():
+    first = {MentoExchange.CUSD_CELO: 1.0, MentoExchange.CEUR_CELO: [1, 2]}
+    second = {MentoExchange.CEUR_CELO: [1, 2], MentoExchange.CUSD_CELO: 1.0}
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first) != fingerprint({**first, MentoExchange.CUSD_CELO: 1.5})
+
+
+def test_engine_loads_cached_runs(tmp_path):
+    """
+    Check that runs are loaded from the cache until their inputs change
+    """
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=5, runs=2)
+    simulation.engine = Engine(
+        backend=Backend.SINGLE_PROCESS,
+        drop_substeps=True,
+        result_cache=ResultCache(tmp_path),
+    )
+    results = copy.deepcopy(simulation.run())
+    assert not any(record.get('cached') for record in simulation.exceptions)
+
+    assert simulation.run() == results
+    assert all(record['cached'] for record in simulation.exceptions)
+    assert [record['run'] for record in simulation.exceptions] == [0, 1]
+
+    simulation.model.params['reserve_target_weight'] = [
+        simulation.model.params['reserve_target_weight'][0] / 2
+    ]
+    simulation.run()
+    assert not any(record.get('cached') for record in simulation.exceptions)
+
+    simulation.model.state_update_blocks = simulation.model.state_update_blocks[:-1]
+    simulation.run()
+    assert not any(record.get('cached') for record in simulation.exceptions)
+
+
+def test_data_fingerprint_follows_the_data_source(monkeypatch):
+    """
+    Runs on the data of another source don't share cache keys
+    """
+    configured = simulation_configuration.DATA_SOURCE
+    key = data_fingerprint()
+    other = 'mock' if configured == 'historical' else 'historical'
+    monkeypatch.setattr(simulation_configuration, 'DATA_SOURCE', other)
+    assert data_fingerprint() != key
+    monkeypatch.setattr(simulation_configuration, 'DATA_SOURCE', configured)
+    assert data_fingerprint() == key
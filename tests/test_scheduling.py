@@ -0,0 +1,78 @@
+"""
+Test the cost-aware scheduling of runs
+"""
+import copy
+
+from radcad import Backend, Simulation
+
+from model import model
+from model.system_parameters import parameters
+from model.types.base import MarketPriceModel
+from model.utils.engine import Engine
+from model.utils.scheduling import SCHEDULE_RECORD_KEY, CostScheduler, Scheduling
+
+
+def with_traders(count):
+    return {
+        **{key: value[0] for key, value in parameters.items()},
+        'traders': [parameters['traders'][0][0]._replace(count=count)],
+    }
+
+
+def test_estimates_learn_from_timings(tmp_path):
+    """
+    Check that estimates move towards the observed timings and are saved
+    """
+    scheduling = Scheduling(history=str(tmp_path / 'costs.json'))
+    scheduler = CostScheduler(scheduling)
+    assert scheduler.estimate(with_traders(4), 10) > scheduler.estimate(with_traders(1), 10)
+
+    scheduler.observe(with_traders(1), seconds=2.0, timesteps=10)
+    assert scheduler.estimate(with_traders(1), 10) == 2.0
+    # features without timings are scaled to seconds by the timed ones
+    assert scheduler.estimate(with_traders(3), 10) > 2.0
+    scheduler.observe(with_traders(1), seconds=4.0, timesteps=10)
+    assert 2.0 < scheduler.estimate(with_traders(1), 10) < 4.0
+    scheduler.save()
+
+    reloaded = CostScheduler(scheduling)
+    assert reloaded.history == scheduler.history
+    assert len(reloaded.history) == 1
+    reloaded.observe(
+        {**with_traders(1), 'market_price_model': MarketPriceModel.HIST_SIM}, 1.0, 10)
+    assert len(reloaded.history) == 2
+
+
+def test_scheduled_runs_match_stream(tmp_path):
+    """
+    Check that scheduled runs return the same results as streamed ones
+    """
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=4, runs=2)
+    simulation.model.params['traders'] = [
+        [parameters['traders'][0][0]._replace(count=count)] for count in (1, 3)
+    ]
+    simulation.engine = Engine(backend=Backend.SINGLE_PROCESS, drop_substeps=True)
+    expected = simulation.run()
+
+    history = tmp_path / 'costs.json'
+    simulation.engine = Engine(
+        backend=Backend.SINGLE_PROCESS,
+        drop_substeps=True,
+        scheduling=Scheduling(history=str(history)),
+    )
+    assert simulation.run() == expected
+    assert [(record['run'], record['subset']) for record in simulation.exceptions] == [
+        (0, 0), (0, 1), (1, 0), (1, 1)
+    ]
+    schedules = [record[SCHEDULE_RECORD_KEY] for record in simulation.exceptions]
+    assert all(schedule['timesteps'] == 4 for schedule in schedules)
+    # the runs with more traders are dispatched first
+    assert max(schedules[1]['started'], schedules[3]['started']) < min(
+        schedules[0]['started'], schedules[2]['started'])
+    assert history.exists()
+    assert len(simulation.engine.scheduler.history) == 2
+
+    utilization = simulation.engine.scheduler.utilization()
+    assert len(utilization) == 1
+    assert utilization['runs'].sum() == 4
+    assert 0 < utilization['utilization'].iloc[0] <= 1
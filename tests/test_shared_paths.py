@@ -0,0 +1,85 @@
+"""
+Test sharing market price paths through shared memory
+"""
+import copy
+import os
+import pickle
+
+import numpy as np
+from radcad import Backend, Simulation
+
+from model import model
+from model.generators.markets import MarketPriceGenerator
+from model.system_parameters import parameters
+from model.utils.engine import Engine
+from model.utils.generator_container import GENERATOR_CONTAINER_PARAM_KEY
+from model.utils.rng_provider import RNGProvider
+from model.utils.shared_paths import SHARED_PATHS_PARAM_KEY, SharedPathStore
+
+
+def generator(run, store=None):
+    params = {key: value[0] for key, value in parameters.items()}
+    params.update({'rngp': RNGProvider(params['rng_seed'], run), SHARED_PATHS_PARAM_KEY: store})
+    return MarketPriceGenerator.from_parameters(params, None, None)
+
+
+def test_workers_attach_published_paths():
+    """
+    Check that pickled generators attach the published increments read-only
+    """
+    store = SharedPathStore()
+    try:
+        published = generator(0, store)
+        reused = generator(0, store)
+        generator(1, store)
+        assert len(store.blocks) == 2
+
+        expected = generator(0).increments
+        for shared in (published, reused):
+            copied = pickle.loads(pickle.dumps(shared))
+            assert copied.shared_increments == published.shared_increments
+            for pair, increments in expected.items():
+                assert np.array_equal(copied.increments[pair], increments)
+                assert not copied.increments[pair].flags.writeable
+        # the pickled generator carries the handle instead of the increments
+        assert len(pickle.dumps(published)) < len(pickle.dumps(generator(0))) / 2
+    finally:
+        store.close()
+
+
+def test_shared_paths_match_private_paths():
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=5, runs=2)
+    simulation.model.params['reserve_target_weight'] = [0.5, 0.75]
+    simulation.engine = Engine(backend=Backend.SINGLE_PROCESS, drop_substeps=True)
+    expected = simulation.run()
+
+    simulation.engine = Engine(
+        backend=Backend.PATHOS, processes=2, drop_substeps=True, shared_paths=True)
+    assert simulation.run() == expected
+    assert simulation.engine.path_store is None
+
+
+def test_workers_attach_paths_published_by_the_parent(tmp_path, monkeypatch):
+    """
+    Check that the parent generates the paths once per run for the workers
+    """
+    calls = tmp_path / 'quantlib_returns'
+    quantlib_returns = MarketPriceGenerator.quantlib_returns
+
+    def recorded_quantlib_returns(self, params):
+        with open(calls, 'a', encoding='utf-8') as file:
+            file.write(f"{os.getpid()}\n")
+        quantlib_returns(self, params)
+
+    monkeypatch.setattr(MarketPriceGenerator, 'quantlib_returns', recorded_quantlib_returns)
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=5, runs=2)
+    simulation.model.params['reserve_target_weight'] = [0.5, 0.75]
+    simulation.engine = Engine(
+        backend=Backend.PATHOS, processes=2, drop_substeps=True, shared_paths=True)
+    simulation.run()
+
+    # one path set per run, shared by its subsets and generated by the parent
+    assert calls.read_text(encoding='utf-8').split() == [str(os.getpid())] * 2
+    for record in simulation.exceptions:
+        container = record['parameters'][GENERATOR_CONTAINER_PARAM_KEY]
+        assert container.get(MarketPriceGenerator).shared_increments is not None
@@ -0,0 +1,49 @@
+"""
+Test early termination of runs with stop conditions
+"""
+import copy
+
+import pandas as pd
+from radcad import Backend, Simulation
+
+from model import model
+from model.types.base import Fiat, Stable
+from model.types.pair import Pair
+from model.utils.engine import Engine
+from model.utils.stop_conditions import depeg, state_below, stopping_times
+
+
+def run_simulation(stop_conditions, timesteps=10):
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=timesteps, runs=2)
+    simulation.engine = Engine(
+        backend=Backend.SINGLE_PROCESS,
+        deepcopy=False,
+        drop_substeps=True,
+        stop_conditions=stop_conditions
+    )
+    df = pd.DataFrame(simulation.run())
+    return df, stopping_times(simulation.exceptions)
+
+
+def test_runs_stop_when_condition_is_met():
+    """
+    Runs end after the first timestep that meets a stop condition
+    """
+    df, stops = run_simulation([state_below('reserve_ratio', float('inf'))])
+
+    assert df['timestep'].max() == 1
+    assert list(stops['stop_timestep']) == [1, 1]
+    assert list(stops['stop_reason']) == ['reserve_ratio < inf'] * 2
+
+
+def test_runs_continue_while_conditions_are_not_met():
+    """
+    Runs without a met stop condition run until the last timestep
+    """
+    df, stops = run_simulation([
+        state_below('reserve_ratio', float('-inf')),
+        depeg(Pair(Stable.CUSD, Fiat.USD), band=0.5),
+    ])
+
+    assert df['timestep'].max() == 10
+    assert stops['stop_timestep'].isna().all()
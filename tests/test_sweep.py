@@ -0,0 +1,87 @@
+"""
+Test lazily enumerated and sampled parameter sweeps
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+from radcad import Backend, Simulation
+
+from model import model
+from model.system_parameters import parameters
+from model.types.base import MentoExchange, SweepMethod
+from model.utils.engine import Engine
+from model.utils.sweep import Choice, Range, SweepPlan
+from experiments.post_processing import assign_parameters
+
+SPREAD = ('mento_exchanges_config', MentoExchange.CUSD_CELO, 'spread')
+
+
+def test_grid_enumerates_every_combination_lazily():
+    """
+    Check the size and order of a grid without materializing it
+    """
+    plan = SweepPlan(parameters, {
+        SPREAD: Range(0.001, 0.01, num=4),
+        'reserve_target_weight': Choice([0.5, 0.75, 1.0]),
+    })
+    assert len(plan) == 12
+    subsets = list(plan)
+    assert [plan[index] for index in range(len(plan))] == subsets
+    assert subsets[5]['mento_exchanges_config'][MentoExchange.CUSD_CELO].spread == 0.004
+    assert subsets[5]['reserve_target_weight'] == 1.0
+    # untouched parameters are shared with the base subset
+    assert subsets[5]['mento_exchanges_config'][MentoExchange.CEUR_CELO] is (
+        parameters['mento_exchanges_config'][0][MentoExchange.CEUR_CELO])
+    assert parameters['mento_exchanges_config'][0][MentoExchange.CUSD_CELO].spread != 0.004
+
+
+def test_latin_hypercube_stratifies_every_dimension():
+    """
+    Check that every stratum of every dimension gets the same number of samples
+    """
+    samples = 1500
+    plan = SweepPlan(parameters, {
+        SPREAD: Range(0, 1),
+        'reserve_target_weight': Range(0, 1),
+    }, method=SweepMethod.LATIN_HYPERCUBE, samples=samples, seed=3)
+    values = plan.frame()
+    for column in values:
+        strata = np.floor(values[column] * samples)
+        assert sorted(strata) == list(range(samples))
+    assert plan.point(1234) == tuple(values.loc[1234])
+
+
+def test_sobol_samples_are_reproducible():
+    """
+    Check that Sobol plans with a seed are reproducible
+    """
+    plan = SweepPlan(parameters, {
+        SPREAD: Range(0.001, 0.1, log=True),
+        ('traders', 0, 'count'): Range(1, 5, integer=True),
+    }, method=SweepMethod.SOBOL, samples=2000, seed=1)
+    values = plan.frame()
+    assert values['mento_exchanges_config.cusd_celo.spread'].between(0.001, 0.1).all()
+    assert set(values['traders.0.count']) == {1, 2, 3, 4, 5}
+    again = SweepPlan(parameters, plan_dimensions(plan), SweepMethod.SOBOL, 2000, seed=1)
+    assert again.frame([1999, 3]).equals(values.loc[[3, 1999]])
+
+
+def plan_dimensions(plan):
+    return dict(zip(plan.paths, plan.dimensions))
+
+
+def test_engine_runs_sweep_plans():
+    """
+    Check that the engine runs the subsets of a sweep plan
+    """
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=2, runs=1)
+    simulation.model.params = SweepPlan(simulation.model.params, {
+        'reserve_target_weight': Choice([0.5, 0.75]),
+    })
+    simulation.engine = Engine(backend=Backend.SINGLE_PROCESS, drop_substeps=True)
+    df = pd.DataFrame(simulation.run())
+    assign_parameters(df, simulation.model.params)
+
+    assert sorted(df['subset'].unique()) == [0, 1]
+    assert (df.groupby('subset')['reserve_target_weight'].first() == [0.5, 0.75]).all()
@@ -0,0 +1,73 @@
+"""
+Test the live throughput telemetry of simulations
+"""
+import copy
+import io
+
+from radcad import Backend, Simulation
+
+from model import model
+from model.utils.engine import Engine
+from model.utils.telemetry import (
+    PrometheusSink, ProgressBarSink, Telemetry, TelemetryHook, TelemetryMonitor, TelemetryReport
+)
+from experiments.simulation_configuration import BLOCKS_PER_TIMESTEP
+
+
+def test_reports_progress_of_runs(tmp_path):
+    """
+    Check the final report and the output of the sinks
+    """
+    metrics = tmp_path / 'mento.prom'
+    progress = io.StringIO()
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=3, runs=2)
+    simulation.engine = Engine(
+        backend=Backend.SINGLE_PROCESS,
+        drop_substeps=True,
+        telemetry=Telemetry(
+            interval=0.01,
+            sinks=[PrometheusSink(metrics), ProgressBarSink(stream=progress)],
+        ),
+    )
+    simulation.run()
+
+    report = simulation.engine.telemetry_report
+    assert report.runs_completed == report.runs_total == 2
+    assert report.blocks == 2 * 3 * BLOCKS_PER_TIMESTEP
+    assert report.running == {}
+    assert 0 < len(report.slowest_blocks) <= 5
+    assert simulation.engine.telemetry_monitor is None
+
+    text = metrics.read_text()
+    assert "mento_runs_completed 2" in text
+    assert "mento_runs_total 2" in text
+    assert text.count("# TYPE mento_block_seconds gauge") == 1
+    assert "[" + "#" * 40 + "] 2/2 runs" in progress.getvalue()
+
+
+def test_monitor_combines_heartbeats():
+    """
+    Check that running runs are reported from their heartbeats
+    """
+    monitor = TelemetryMonitor(Telemetry(sinks=[]), runs_total=3)
+    hook = TelemetryHook(monitor.directory, interval=0.0, block_timing=False)
+
+    class Execution:  # pylint: disable=too-few-public-methods
+        run_args = type('RunArgs', (), {'simulation': 0, 'subset': 1, 'run': 2, 'timesteps': 10})
+        state = {'timestep': 4}
+
+    hook.heartbeat(Execution())
+    monitor.consume(([], {'timesteps': 10}))
+    report = monitor.report()
+    assert report.running == {(0, 1, 2): (4, 10)}
+    assert report.blocks == 14 * BLOCKS_PER_TIMESTEP
+    assert report.runs_completed == 1
+
+    final = monitor.stop()
+    assert isinstance(final, TelemetryReport)
+    assert final.runs_total == 3
+
+
+def test_no_hook_without_telemetry():
+    engine = Engine(backend=Backend.SINGLE_PROCESS)
+    assert not any(isinstance(hook, TelemetryHook) for hook in engine.run_hooks())
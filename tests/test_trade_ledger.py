@@ -0,0 +1,66 @@
+"""
+Test the trade ledger recording executed swaps
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+from radcad import Backend, Simulation
+
+from model import model
+from model.entities.balance import Balance
+from model.types.base import CryptoAsset, MentoExchange, Stable, TraderType
+from model.types.configs import TraderConfig
+from model.utils.engine import Engine
+from model.utils.trade_ledger import TradeLedger, trade_table
+
+
+def test_ledger_grows():
+    """
+    Check that the ledger keeps its swaps when it grows
+    """
+    ledger = TradeLedger(capacity=2)
+    for timestep in range(5):
+        ledger.record(timestep, 'trader', MentoExchange.CUSD_CELO, True, 10, 20, 0.01)
+    flushed = ledger.flush()
+    assert list(flushed['columns']['timestep']) == list(range(5))
+    assert flushed['columns']['price'][0] == 2
+    assert flushed['exchanges'] == ['cusd_celo']
+
+
+def test_trades_reconcile_with_buckets():
+    """
+    The swaps in the ledger account for every change of the buckets
+    between two bucket resets
+    """
+    simulation = Simulation(model=copy.deepcopy(model), timesteps=10, runs=1)
+    simulation.model.params.update({
+        'traders': [[
+            TraderConfig(
+                trader_type=TraderType.RANDOM_TRADER,
+                count=2,
+                balance=Balance({CryptoAsset.CELO: 500000, Stable.CUSD: 1000000}),
+                exchange=MentoExchange.CUSD_CELO
+            )
+        ]]
+    })
+    simulation.engine = Engine(
+        backend=Backend.SINGLE_PROCESS, deepcopy=False, drop_substeps=True, trade_ledger=True
+    )
+    df = pd.DataFrame(simulation.run())
+    trades = trade_table(simulation.exceptions)
+
+    assert len(trades) == 20
+    assert set(trades['trader']) == {'TraderType.RANDOM_TRADER_0', 'TraderType.RANDOM_TRADER_1'}
+    assert (trades['spread_fee'] > 0).all()
+
+    trades = trades.query('timestep > 1')
+    stable_in = np.where(
+        trades['sell_reserve_asset'], -trades['buy_amount'], trades['sell_amount']
+    ).sum()
+    buckets = df.set_index('timestep')['mento_buckets']
+    stable_change = (
+        buckets[10][MentoExchange.CUSD_CELO]['stable']
+        - buckets[1][MentoExchange.CUSD_CELO]['stable']
+    )
+    assert np.isclose(stable_in, stable_change)
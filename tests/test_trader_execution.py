@@ -0,0 +1,61 @@
+"""
+Test the two-phase execution of traders
+"""
+import copy
+
+from model.generators import AccountGenerator
+from model.types.base import MentoBuckets, MentoExchange, TraderExecutionMode
+from model.types.configs import TraderExecutionConfig
+from model.utils.warm_run import WarmRun
+
+
+def mispriced_state(run: WarmRun):
+    """
+    State in which the cEUR exchange sells stables 10% below the market
+    """
+    state = copy.deepcopy(run.state)
+    buckets = state['mento_buckets'][MentoExchange.CEUR_CELO]
+    state['mento_buckets'][MentoExchange.CEUR_CELO] = MentoBuckets(
+        stable=buckets['stable'] * 0.9,
+        reserve_asset=buckets['reserve_asset']
+    )
+    return state
+
+
+def two_phase_run(max_slippage: float = 0.0) -> WarmRun:
+    return WarmRun(timesteps=1, trader_execution=TraderExecutionConfig(
+        mode=TraderExecutionMode.TWO_PHASE, max_slippage=max_slippage))
+
+
+def test_traders_decide_on_the_same_state():
+    """
+    No order is settled before all are decided, so every trader decides
+    as if it was the only one
+    """
+    run = two_phase_run()
+    accounts = run.get(AccountGenerator)
+    orders = accounts.decide_orders(accounts.traders(), run.params, mispriced_state(run))
+    assert len(orders) > 1
+    assert all(order is not None for order in orders)
+    for index, order in enumerate(orders):
+        alone = two_phase_run()
+        alone_accounts = alone.get(AccountGenerator)
+        assert alone_accounts.decide_orders(
+            [alone_accounts.traders()[index]], alone.params, mispriced_state(alone)) == [order]
+
+
+def test_settlement_drops_orders_that_slipped():
+    """
+    Both traders decide on the same state, after the first order moved the
+    buckets the second one no longer fills unless slippage is tolerated
+    """
+    for max_slippage, second_order_fills in [(0, False), (1, True)]:
+        run = two_phase_run(max_slippage)
+        accounts = run.get(AccountGenerator)
+        traders = accounts.traders()
+        state = mispriced_state(run)
+        orders = accounts.decide_orders(traders, run.params, state)
+
+        state.update(traders[0].settle(orders[0], state))
+        settled = traders[1].settle(orders[1], state)
+        assert (settled['mento_buckets'] is not state['mento_buckets']) == second_order_fills
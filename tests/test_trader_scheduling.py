@@ -0,0 +1,34 @@
+"""
+Test that only traders due in a timestep are executed
+"""
+from model.entities.balance import Balance
+from model.generators import AccountGenerator
+from model.types.base import CryptoAsset, MentoExchange, Stable, TraderType
+from model.types.configs import TraderConfig
+from model.utils.warm_run import WarmRun
+
+
+def trader_config(trader_type, count):
+    return TraderConfig(
+        trader_type=trader_type,
+        count=count,
+        balance=Balance({CryptoAsset.CELO: 500000, Stable.CUSD: 1000000}),
+        exchange=MentoExchange.CUSD_CELO
+    )
+
+
+def test_due_traders_follow_acting_frequency():
+    """
+    Check that traders are only due in timesteps their acting frequency divides
+    """
+    run = WarmRun(timesteps=1, traders=[
+        trader_config(TraderType.MAX_TRADER, 1),
+        trader_config(TraderType.ARBITRAGE_TRADER, 2),
+    ])
+    accounts = run.get(AccountGenerator)
+    traders = accounts.traders()
+    names = [trader.account_name for trader in traders]
+
+    assert sorted(accounts.schedule) == [1, 1000]
+    assert [trader.account_name for trader in accounts.due_traders(999)] == names[1:]
+    assert [trader.account_name for trader in accounts.due_traders(1000)] == names